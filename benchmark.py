@@ -0,0 +1,415 @@
+# Benchmark for the dashboard's data paths as the repositories table grows.
+#
+# Generates a deterministic synthetic repositories table (skewed language and
+# license popularity, heavy-tailed stars, variable-length descriptions), loads
+# it into a local SQLite file (or any database URL), then times each stage the
+# pages run, headlessly, and reports latency percentiles and peak memory.
+#
+# Run it with:  python benchmark.py --rows 10000 100000 1000000 --repeat 5
+#
+# With --startup it instead measures, in fresh interpreters, how long the entry
+# script's imports and each page module's imports take and checks them against
+# IMPORT_BUDGETS, so the Home page keeps rendering without the charting stack.
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+import seaborn as sns
+from sqlalchemy import create_engine, text
+from wordcloud import WordCloud
+
+import data_layer
+import export
+import figure_cache
+import filter_engine
+import frame_schema
+import large_charts
+import query_builder
+import rollups
+import sketches
+import term_index
+import timeseries
+
+LANGUAGES = ['Python', 'JavaScript', 'TypeScript', 'Java', 'Go', 'C++', 'Rust', 'C#', 'PHP', 'Ruby',
+             'Jupyter Notebook', 'Shell', 'C', 'Kotlin', 'Swift', 'R', 'Scala', 'Dart', 'HTML', 'Lua']
+LICENSES = ['MIT', 'Apache-2.0', 'GPL-3.0', 'BSD-3-Clause', 'NOASSERTION', 'AGPL-3.0',
+            'BSD-2-Clause', 'MPL-2.0', 'LGPL-3.0', 'Unlicense']
+WORDS = ('machine learning deep neural network data visualization dashboard web framework api server '
+         'client library tool cli fast simple lightweight modern python javascript react vue model '
+         'training inference dataset analysis plot chart interactive open source toolkit platform '
+         'cloud kubernetes docker database sql query engine search index cache stream pipeline').split()
+# Never the app's own table, so --database-url can point at a shared server
+BENCHMARK_TABLE = 'repositories_benchmark'
+GENERATE_CHUNK_ROWS = 200000
+# Modules git_d1.py imports on every page, and the module behind each page
+ENTRY_MODULES = ['streamlit', 'streamlit_option_menu', 'instrumentation', 'debug_panel', 'github_data_dive.assets']
+PAGE_MODULES = {
+    'Home': 'github_data_dive.home',
+    'Data Exploration': 'github_data_dive.exploration',
+    'Visualizations': 'github_data_dive.visualizations',
+    'Conclusion': 'github_data_dive.conclusion',
+}
+HEAVY_MODULES = ['pandas', 'sqlalchemy', 'matplotlib', 'seaborn', 'plotly.express', 'wordcloud', 'pyarrow']
+# Seconds allowed for importing a page module on top of the entry imports,
+# and the heavy modules it must not pull in
+IMPORT_BUDGETS = {
+    'entry': (1.0, HEAVY_MODULES),
+    'Home': (0.05, HEAVY_MODULES),
+    'Data Exploration': (4.0, ['wordcloud', 'plotly.express']),
+    'Visualizations': (5.0, []),
+    'Conclusion': (0.05, HEAVY_MODULES),
+}
+START_DATE = pd.Timestamp('2010-01-01')
+END_DATE = pd.Timestamp('2024-12-31')
+
+
+def _zipf_weights(count, exponent=1.1):
+    weights = 1.0 / np.arange(1, count + 1) ** exponent
+    return weights / weights.sum()
+
+
+# One chunk of synthetic repositories; the same seed always gives the same rows
+def generate_chunk(rng, start_id, rows):
+    span = (END_DATE - START_DATE).days
+    created = rng.integers(0, span, rows)
+    updated = np.minimum(created + rng.exponential(200, rows).astype(int), span)
+    stars = np.floor(rng.pareto(1.2, rows) * 10).astype(np.int64)
+    forks = np.floor(stars * rng.uniform(0.05, 0.4, rows)).astype(np.int64)
+    issues = rng.poisson(np.sqrt(stars) + 1).astype(np.int64)
+
+    languages = np.array(LANGUAGES + [None], dtype=object)
+    licenses = np.array(LICENSES + [None], dtype=object)
+    language = languages[rng.choice(len(languages), rows, p=_zipf_weights(len(languages)))]
+    license_type = licenses[rng.choice(len(licenses), rows, p=_zipf_weights(len(licenses), 1.4))]
+
+    lengths = rng.integers(0, 25, rows)
+    word_ids = rng.choice(len(WORDS), lengths.sum(), p=_zipf_weights(len(WORDS), 0.8))
+    words = np.array(WORDS, dtype=object)[word_ids]
+    boundaries = np.concatenate([[0], np.cumsum(lengths)])
+    descriptions = [' '.join(words[boundaries[i]:boundaries[i + 1]]) if lengths[i] else None for i in range(rows)]
+
+    ids = np.arange(start_id, start_id + rows)
+    return pd.DataFrame({
+        'id': ids,
+        'Repository_Name': [f'repo-{i}' for i in ids],
+        'Owner': [f'owner-{i % 5000}' for i in ids],
+        'Description': descriptions,
+        'URL': [f'https://github.com/owner-{i % 5000}/repo-{i}' for i in ids],
+        'Programming_Language': language,
+        'Creation_Date': START_DATE + pd.to_timedelta(created, unit='D'),
+        'Last_Updated_Date': START_DATE + pd.to_timedelta(updated, unit='D'),
+        'Number_of_Stars': stars,
+        'Number_of_Forks': forks,
+        'Number_of_Open_Issues': issues,
+        'License_Type': license_type,
+    })
+
+
+# Write a synthetic repositories table of the given size
+def load_synthetic_table(database_url, rows, seed=42):
+    engine = create_engine(database_url)
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, GENERATE_CHUNK_ROWS):
+        chunk = generate_chunk(rng, start + 1, min(GENERATE_CHUNK_ROWS, rows - start))
+        chunk.to_sql(BENCHMARK_TABLE, engine, if_exists='replace' if start == 0 else 'append',
+                     index=False, chunksize=10000)
+    engine.dispose()
+
+
+def _draw(chart_id, draw, figsize=None):
+    # A fresh data version per call, so the figure cache never short-circuits the draw
+    return figure_cache.render(chart_id, {}, time.perf_counter_ns(), draw, figsize=figsize)
+
+
+# The stages the Data Exploration and Visualizations pages run, in page order
+def build_stages(tmp_dir):
+    state = {}
+
+    def load_data():
+        data_layer.invalidate()
+        state['df'] = data_layer.get_data()
+
+    def load_data_cached():
+        data_layer.get_data()
+
+    def load_data_delta():
+        # Touches 1% of the rows (timed too), then merges just those into the cached frame
+        state['delta_round'] = state.get('delta_round', 0) + 1
+        with data_layer.get_engine().begin() as conn:
+            conn.execute(
+                text(f"UPDATE {BENCHMARK_TABLE} SET Number_of_Stars = Number_of_Stars + 1, "
+                     f"Last_Updated_Date = :stamp WHERE id % 100 = :round"),
+                {'stamp': (END_DATE + pd.Timedelta(days=state['delta_round'])).to_pydatetime(), 'round': state['delta_round'] % 100},
+            )
+        state['df'] = data_layer.refresh()
+
+    def load_data_delta_derived():
+        # The same once the pages' derived data is in use: the refresh also
+        # prepares the filter index, sketches, time series and (from the
+        # changed rows alone) the term index for the merged frame
+        load_data_delta()
+
+    def filter_index_build():
+        filter_engine._cache.clear()
+        state['filter_index'] = filter_engine.get_index(state['df'])
+
+    def exploration_filter():
+        df = state['df']
+        languages = frame_schema.value_counts(df['Programming_Language']).index[:3].tolist()
+        licenses = ['MIT', 'Apache-2.0']
+        min_stars = int(df['Number_of_Stars'].median())
+        # Cleared so every run measures the bitmap filter, not the memoized result
+        state['filter_index']._results.clear()
+        state['filtered'] = state['filter_index'].filter(languages, licenses, min_stars)
+        state['filters'] = (languages, licenses, min_stars)
+
+    def sql_filter():
+        # The rows the page displays and the aggregates over all matching rows
+        query_builder._result_cache.clear()
+        query_builder.fetch_filtered(*state['filters'], limit=query_builder.DISPLAY_ROWS)
+        query_builder.fetch_summary(*state['filters'])
+
+    def aggregate_value_counts():
+        frame_schema.value_counts(state['df']['Programming_Language'])
+        frame_schema.value_counts(state['df']['License_Type'])
+
+    def aggregate_rollups():
+        rollups.compute_rollups(state['df'])
+
+    def sketches_build():
+        sketches._cache.clear()
+        sketches.get_sketches(state['df'])
+
+    def aggregate_summary():
+        sketches.totals(state['df'], state['filtered'], *state['filters'])
+        sketches.top_rows(state['df'], state['filtered'], 'Number_of_Stars', 10, *state['filters'])
+        for column in ('Number_of_Stars', 'Number_of_Forks'):
+            sketches.percentiles(state['df'], state['filtered'], column, (0.5, 0.9, 0.99), *state['filters'])
+
+    def aggregate_open_issues():
+        rows = sketches.open_issue_rows(state['df'], state['filtered'], 10, *state['filters'])
+        state['open_issues'] = sketches.top_open_issues(rows, 10)
+
+    def chart_language_bar():
+        counts = frame_schema.value_counts(state['filtered']['Programming_Language'])
+        _draw('bench_language_bar', lambda fig, ax: sns.barplot(x=counts.index, y=counts.values, ax=ax))
+
+    def chart_stars_histogram():
+        _draw('bench_stars_hist', lambda fig, ax: large_charts.histogram(ax, state['filtered']['Number_of_Stars'], bins=30, log=True))
+
+    def chart_license_pie():
+        counts = frame_schema.value_counts(state['filtered']['License_Type'])
+        _draw('bench_license_pie', lambda fig, ax: ax.pie(counts, labels=counts.index, autopct='%1.1f%%'))
+
+    def chart_open_issues():
+        _draw('bench_open_issues', lambda fig, ax: sns.barplot(
+            data=state['open_issues'], x='Programming_Language', y='Number_of_Open_Issues', hue='Repository_Name', ax=ax))
+
+    def timeseries_build():
+        timeseries._cache.clear()
+        state['series'] = timeseries.get_series(state['df'])
+
+    def timeseries_query():
+        languages, licenses, _ = state['filters']
+        for freq in timeseries.FREQUENCIES.values():
+            state['series'].series('updated', languages, licenses, freq=freq)
+        state['series'].series('stars', languages, licenses, by='Programming_Language')
+
+    def chart_activity_histogram():
+        days, counts = state['series'].histogram('Days_Since_Last_Update')
+        _draw('bench_activity_hist', lambda fig, ax: large_charts.histogram(
+            ax, days, bins=30, weights=counts), figsize=(12, 6))
+
+    def chart_stars_vs_forks():
+        # Serialized, since the JSON payload is what the browser receives
+        large_charts.stars_vs_forks(state['df']).to_json()
+
+    def wordcloud_index():
+        term_index._cache.clear()
+        state['index'] = term_index.get_index(state['df'])
+
+    def wordcloud_render():
+        frequencies = state['index'].frequencies()
+
+        def draw(fig, ax):
+            ax.imshow(WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(frequencies))
+            ax.axis('off')
+        _draw('bench_wordcloud', draw, figsize=(10, 6))
+
+    def csv_export():
+        name, _ = export.export_rows(export.iter_chunks(frame=state['filtered']), 'CSV', 'benchmark', directory=tmp_dir)
+        os.remove(os.path.join(tmp_dir, name))
+
+    return [
+        ('load_data', load_data),
+        ('load_data_cached', load_data_cached),
+        ('load_data_delta', load_data_delta),
+        ('filter_index_build', filter_index_build),
+        ('exploration_filter', exploration_filter),
+        ('sql_filter', sql_filter),
+        ('aggregate_value_counts', aggregate_value_counts),
+        ('aggregate_rollups', aggregate_rollups),
+        ('sketches_build', sketches_build),
+        ('aggregate_summary', aggregate_summary),
+        ('aggregate_open_issues', aggregate_open_issues),
+        ('chart_language_bar', chart_language_bar),
+        ('chart_stars_histogram', chart_stars_histogram),
+        ('chart_license_pie', chart_license_pie),
+        ('chart_open_issues', chart_open_issues),
+        ('timeseries_build', timeseries_build),
+        ('timeseries_query', timeseries_query),
+        ('chart_activity_histogram', chart_activity_histogram),
+        ('chart_stars_vs_forks', chart_stars_vs_forks),
+        ('wordcloud_index', wordcloud_index),
+        ('load_data_delta_derived', load_data_delta_derived),
+        ('wordcloud_render', wordcloud_render),
+        ('csv_export', csv_export),
+    ]
+
+
+# Time every stage `repeat` times, then run it once more under tracemalloc
+# for its peak memory (kept separate so tracing doesn't skew the timings)
+def run_stages(repeat=5, trace_memory=True):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for name, stage in build_stages(tmp_dir):
+            timings = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                stage()
+                timings.append(time.perf_counter() - start)
+
+            peak = None
+            if trace_memory:
+                tracemalloc.start()
+                stage()
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+
+            results[name] = {
+                'p50_ms': float(np.percentile(timings, 50) * 1000),
+                'p90_ms': float(np.percentile(timings, 90) * 1000),
+                'p99_ms': float(np.percentile(timings, 99) * 1000),
+                'max_ms': max(timings) * 1000,
+                'peak_mb': peak / (1024 * 1024) if peak is not None else None,
+            }
+    return results
+
+
+def run_benchmark(row_counts, database_url=None, repeat=5, seed=42, trace_memory=True):
+    report = {}
+    for rows in row_counts:
+        with tempfile.TemporaryDirectory() as db_dir:
+            url = database_url or f"sqlite:///{os.path.join(db_dir, 'benchmark.db')}"
+            start = time.perf_counter()
+            load_synthetic_table(url, rows, seed)
+            generate_seconds = time.perf_counter() - start
+
+            # Point the app's data layer at the benchmark table
+            data_layer.dispose_engine()
+            data_layer.DATABASE_URL = url
+            data_layer.TABLE_NAME = BENCHMARK_TABLE
+            # Every get_data() checks the version itself, as load_data_cached measures
+            data_layer.BACKGROUND_REFRESH = False
+            data_layer.invalidate()
+            report[rows] = {'generate_seconds': generate_seconds, 'stages': run_stages(repeat, trace_memory)}
+            data_layer.dispose_engine()
+    return report
+
+
+_IMPORT_PROBE = '''
+import importlib, json, sys, time
+def timed(names):
+    start = time.perf_counter()
+    for name in names:
+        importlib.import_module(name)
+    return time.perf_counter() - start
+entry = timed({entry})
+page = timed([{page!r}])
+print(json.dumps({{'entry': entry, 'page': page, 'loaded': [m for m in {heavy} if m in sys.modules]}}))
+'''
+
+
+# Cold import time of the entry script's modules and of each page, each in a fresh interpreter
+def measure_imports(repeat=3):
+    root = os.path.dirname(os.path.abspath(__file__))
+    results = {}
+    for page, module in PAGE_MODULES.items():
+        runs = []
+        for _ in range(repeat):
+            code = _IMPORT_PROBE.format(entry=ENTRY_MODULES, page=module, heavy=HEAVY_MODULES)
+            output = subprocess.run([sys.executable, '-c', code], cwd=root, capture_output=True, text=True, check=True)
+            runs.append(json.loads(output.stdout.strip().splitlines()[-1]))
+        results[page] = {
+            'entry_seconds': float(np.median([run['entry'] for run in runs])),
+            'page_seconds': float(np.median([run['page'] for run in runs])),
+            'loaded': runs[-1]['loaded'],
+        }
+    return results
+
+
+# Budget violations of measure_imports() results, as readable messages
+def check_import_budgets(results):
+    problems = []
+    entry_budget, entry_forbidden = IMPORT_BUDGETS['entry']
+    for page, result in results.items():
+        budget, forbidden = IMPORT_BUDGETS[page]
+        if result['entry_seconds'] > entry_budget:
+            problems.append(f"entry imports took {result['entry_seconds']:.3f}s (budget {entry_budget}s)")
+        if result['page_seconds'] > budget:
+            problems.append(f"{page} imports took {result['page_seconds']:.3f}s (budget {budget}s)")
+        heavy = [name for name in result['loaded'] if name in forbidden]
+        if heavy:
+            problems.append(f"{page} loads {', '.join(heavy)}")
+    return sorted(set(problems))
+
+
+def format_imports(results):
+    lines = [f"  {'page':<20}{'entry s':>10}{'page s':>10}  heavy modules loaded"]
+    for page, result in results.items():
+        lines.append(f"  {page:<20}{result['entry_seconds']:>10.3f}{result['page_seconds']:>10.3f}  {', '.join(result['loaded']) or '-'}")
+    return '\n'.join(lines)
+
+
+def format_report(report):
+    lines = []
+    for rows, result in report.items():
+        lines.append(f"{rows:,} rows (generated in {result['generate_seconds']:.1f}s)")
+        lines.append(f"  {'stage':<26}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'peak MB':>10}")
+        for name, stats in result['stages'].items():
+            peak = f"{stats['peak_mb']:.1f}" if stats['peak_mb'] is not None else '-'
+            lines.append(f"  {name:<26}{stats['p50_ms']:>10.1f}{stats['p90_ms']:>10.1f}{stats['p99_ms']:>10.1f}{peak:>10}")
+    return '\n'.join(lines)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Benchmark the dashboard's data paths on synthetic data.")
+    parser.add_argument('--rows', type=int, nargs='+', default=[10000, 100000])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--database-url', help=f"Benchmark against this database (table {BENCHMARK_TABLE}) instead of a temporary SQLite file.")
+    parser.add_argument('--no-memory', action='store_true', help="Skip the tracemalloc peak-memory runs.")
+    parser.add_argument('--json', metavar='PATH', help="Also write the raw results as JSON.")
+    parser.add_argument('--startup', action='store_true', help="Measure cold import times against IMPORT_BUDGETS instead.")
+    args = parser.parse_args()
+
+    if args.startup:
+        results = measure_imports(args.repeat)
+        print(format_imports(results))
+        problems = check_import_budgets(results)
+        for problem in problems:
+            print(f"OVER BUDGET: {problem}")
+        sys.exit(1 if problems else 0)
+
+    report = run_benchmark(args.rows, args.database_url, args.repeat, args.seed, not args.no_memory)
+    print(format_report(report))
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(report, f, indent=2)
@@ -0,0 +1,546 @@
+# Shared data-access layer for the GitHub Data Dive app.
+#
+# Streamlit re-executes git_d1.py on every widget interaction, but imported
+# modules stay in sys.modules, so the state kept here (one engine with its
+# connection pool and one cached copy of the repositories table) is shared by
+# every rerun and every session of the process.
+import collections
+import os
+import threading
+import time
+import weakref
+
+import pandas as pd
+from sqlalchemy import create_engine, text
+
+import frame_schema
+import instrumentation
+
+# Database credentials (the whole URL can be overridden with GDD_DATABASE_URL)
+DB_USER = 'root'  # replace with your username
+DB_PASSWORD = 'new_password'  # replace with your password
+DB_HOST = '127.0.0.1:3306'  # or '127.0.0.1'
+DB_NAME = 'github_data'
+DATABASE_URL = os.environ.get(
+    'GDD_DATABASE_URL',
+    f"mysql+pymysql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}/{DB_NAME}",
+)
+
+TABLE_NAME = 'repositories'
+
+# 'database' reads MySQL; 'snapshot' reads the columnar export written by
+# snapshot.py and keeps the database out of the request path; 'shared' maps
+# the frame published by the host's refresher (shared_cache.py), so workers
+# share one copy of the data
+DATA_SOURCE = os.environ.get('GDD_DATA_SOURCE', 'database')
+
+# Seconds during which the last version probe is trusted without asking the
+# database again whether the table changed
+PROBE_INTERVAL = float(os.environ.get('GDD_PROBE_INTERVAL', 30))
+# Seconds after which a cached frame is reloaded even if the probe reports no change
+CACHE_TTL = float(os.environ.get('GDD_CACHE_TTL', 3600))
+# Once a frame is loaded, a background thread checks the version every
+# REFRESH_INTERVAL seconds and swaps in a reloaded frame when it changed;
+# requests keep getting the last good frame meanwhile, even if the reload
+# fails. With GDD_BACKGROUND_REFRESH=0 every get_data() call checks the
+# version itself and blocks while the table is reloaded.
+REFRESH_INTERVAL = float(os.environ.get('GDD_REFRESH_INTERVAL', PROBE_INTERVAL))
+BACKGROUND_REFRESH = os.environ.get('GDD_BACKGROUND_REFRESH', '1') != '0'
+# Reloads from the database fetch only the rows whose Last_Updated_Date is at
+# or after the loaded frame's high-water mark, DELTA_PAGE_SIZE rows per query,
+# and merge them into the cached frame; a full reload still happens every
+# CACHE_TTL seconds and whenever the row count shows deleted rows or rows
+# written with an older Last_Updated_Date
+DELTA_LOAD = os.environ.get('GDD_DELTA_LOAD', '1') != '0'
+DELTA_PAGE_SIZE = int(os.environ.get('GDD_DELTA_PAGE_SIZE', 10000))
+# Merges remembered for changes_between()
+CHANGE_HISTORY = 8
+
+_engine = None
+_engine_lock = threading.Lock()
+
+# Last result of the version probe, shared by everything that needs to know
+# whether the table changed. The probe lock lets one probe run at a time
+# without holding the version lock during the query.
+_version_lock = threading.Lock()
+_probe_lock = threading.Lock()
+_version = {'value': None, 'probed_at': 0.0}
+
+# The refresh lock is held for the whole load, so concurrent sessions asking
+# for the data at the same time wait for a single query instead of each
+# running one; the cache lock only guards swapping the frame in
+_refresh_lock = threading.Lock()
+_cache_lock = threading.Lock()
+# loaded_at is the time of the last full load (delta merges keep it) and day
+# the date the day-count columns were computed for
+_cache = {'version': None, 'frame': None, 'loaded_at': 0.0, 'day': None}
+# Wall-clock times shown in the UI, and the error of the last failed refresh
+_status = {'loaded_at': None, 'checked_at': None, 'refreshing': False, 'last_error': None, 'failed_at': None}
+
+_refresher_lock = threading.Lock()
+_refresher = {'thread': None}
+
+# Recent frame updates, oldest first: weak references to the frame before
+# and after, and the rows replaced and added (see changes_between)
+_changes = collections.deque(maxlen=CHANGE_HISTORY)
+
+# Caches of data derived from the loaded frame (see FrameCache)
+_frame_caches = []
+
+_metrics_lock = threading.Lock()
+_metrics = {
+    'cache_hits': 0,
+    'cache_misses': 0,
+    'version_probes': 0,
+    'loads': 0,
+    'load_errors': 0,
+    'background_refreshes': 0,
+    'delta_loads': 0,
+    'delta_rows': 0,
+    'last_delta_rows': 0,
+    'last_load_seconds': 0.0,
+    'total_load_seconds': 0.0,
+    'last_load_rows': 0,
+    'last_load_bytes': 0,
+    'bytes_transferred': 0,
+    'last_frame_bytes': 0,
+}
+
+
+def _record(**changes):
+    with _metrics_lock:
+        for key, value in changes.items():
+            if key.startswith('last_'):
+                _metrics[key] = value
+            else:
+                _metrics[key] += value
+
+
+# Process-wide engine; created once and reused so the connection pool persists
+def get_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is None:
+            options = {'pool_pre_ping': True}
+            if not DATABASE_URL.startswith('sqlite'):
+                options.update(pool_size=10, max_overflow=20, pool_recycle=3600)
+            _engine = create_engine(DATABASE_URL, **options)
+            instrumentation.instrument_engine(_engine)
+        return _engine
+
+
+def dispose_engine():
+    global _engine
+    with _engine_lock:
+        if _engine is not None:
+            _engine.dispose()
+            _engine = None
+
+
+# Cheap query that changes whenever rows are added, removed or updated
+def probe_version(engine=None):
+    if DATA_SOURCE == 'snapshot':
+        import snapshot
+        _record(version_probes=1)
+        return snapshot.current_version()
+    if DATA_SOURCE == 'shared':
+        import shared_cache
+        _record(version_probes=1)
+        return shared_cache.current_version()
+
+    engine = engine or get_engine()
+    query = text(f"SELECT COUNT(*), MAX(Last_Updated_Date) FROM {TABLE_NAME}")
+    with instrumentation.timer('data.probe'), engine.connect() as conn:
+        row_count, last_updated = conn.execute(query).one()
+    _record(version_probes=1)
+    return (int(row_count), str(last_updated))
+
+
+def _read_table(engine):
+    start = time.perf_counter()
+    if DATA_SOURCE == 'shared':
+        return _map_shared_frame(start)
+    with instrumentation.timer('data.read') as span:
+        if DATA_SOURCE == 'snapshot':
+            import snapshot
+            df = snapshot.read_frame()
+        else:
+            df = pd.read_sql(text(f"SELECT * FROM {TABLE_NAME}"), engine)
+        span['rows'] = len(df)
+    # Categoricals, downcast counts, parsed dates and derived day counts
+    # (converted in place: the frame was just read and nothing else holds it)
+    with instrumentation.timer('data.optimize'):
+        df, report = frame_schema.optimize_frame(df, copy=False)
+    elapsed = time.perf_counter() - start
+    _record(
+        loads=1,
+        last_load_seconds=elapsed,
+        total_load_seconds=elapsed,
+        last_load_rows=len(df),
+        last_load_bytes=report['bytes_before'],
+        bytes_transferred=report['bytes_before'],
+        last_frame_bytes=report['bytes_after'],
+    )
+    return df
+
+
+# The refresher already optimized the published frame; mapping it copies
+# almost nothing, so only the (shallow) frame size is recorded
+def _map_shared_frame(start):
+    import shared_cache
+    with instrumentation.timer('data.read') as span:
+        df = shared_cache.read_frame()
+        span['rows'] = len(df)
+    elapsed = time.perf_counter() - start
+    _record(
+        loads=1,
+        last_load_seconds=elapsed,
+        total_load_seconds=elapsed,
+        last_load_rows=len(df),
+        last_load_bytes=0,
+        last_frame_bytes=int(df.memory_usage().sum()),
+    )
+    return df
+
+
+# Rows updated at or after `since`, read in pages ordered by
+# (Last_Updated_Date, id), each page resuming after the last row of the
+# previous one. Rows stamped exactly `since` are read again, since more may
+# have been written with that timestamp after the mark was taken.
+def _read_changes(engine, since):
+    first = text(
+        f"SELECT * FROM {TABLE_NAME} WHERE Last_Updated_Date >= :since "
+        f"ORDER BY Last_Updated_Date, id LIMIT :limit"
+    )
+    after = text(
+        f"SELECT * FROM {TABLE_NAME} "
+        f"WHERE Last_Updated_Date > :since OR (Last_Updated_Date = :since AND id > :last_id) "
+        f"ORDER BY Last_Updated_Date, id LIMIT :limit"
+    )
+    pages = []
+    query, params = first, {'since': since, 'limit': DELTA_PAGE_SIZE}
+    with engine.connect() as conn:
+        while True:
+            page = pd.read_sql(query, conn, params=params)
+            pages.append(page)
+            if len(page) < DELTA_PAGE_SIZE:
+                break
+            last_updated, last_id = page['Last_Updated_Date'].iloc[-1], page['id'].iloc[-1]
+            if isinstance(last_updated, pd.Timestamp):
+                last_updated = last_updated.to_pydatetime()
+            query, params = after, {'since': last_updated, 'last_id': int(last_id), 'limit': DELTA_PAGE_SIZE}
+    return pd.concat(pages, ignore_index=True) if len(pages) > 1 else pages[0]
+
+
+# Merge the rows changed since the cached frame's version into it; returns
+# the merged frame, the replaced rows and the new ones, or None when only a
+# full reload gives the right table
+def _read_delta(engine, cached, version, today):
+    # The high-water mark is the MAX(Last_Updated_Date) probed with the frame
+    since = cached['version'][1]
+    if since == 'None':
+        return None
+    start = time.perf_counter()
+    with instrumentation.timer('data.delta') as span:
+        rows = _read_changes(engine, since)
+        span['rows'] = len(rows)
+    with instrumentation.timer('data.merge'):
+        merged, old_rows, new_rows = frame_schema.merge_rows(cached['frame'], rows, today=today)
+    # Deleted rows, or rows written with an older Last_Updated_Date, leave
+    # the count off
+    if len(merged) != version[0]:
+        return None
+    elapsed = time.perf_counter() - start
+    _record(
+        delta_loads=1,
+        delta_rows=len(rows),
+        last_delta_rows=len(rows),
+        last_load_seconds=elapsed,
+        total_load_seconds=elapsed,
+    )
+    return merged, old_rows, new_rows
+
+
+# Update the cached frame for a new version (or a new day) without reading
+# the whole table; None when a full reload is needed
+def _update_frame(engine, cached, version, today):
+    frame = cached['frame']
+    if version == cached['version']:
+        # Only the day rolled over: recompute the day counts on a shallow copy
+        # (the empty frame holds no reference to the old one's buffers)
+        unchanged = pd.DataFrame(columns=frame.columns)
+        merged, old_rows, new_rows = frame.copy(deep=False), unchanged, unchanged
+    elif DATA_SOURCE == 'database' and DELTA_LOAD:
+        delta = _read_delta(engine, cached, version, today)
+        if delta is None:
+            return None
+        merged, old_rows, new_rows = delta
+    else:
+        return None
+    if cached['day'] != today:
+        frame_schema.add_derived_columns(merged, today)
+
+    with _cache_lock:
+        _changes.append({
+            'base': weakref.ref(frame), 'frame': weakref.ref(merged),
+            'old_rows': old_rows, 'new_rows': new_rows,
+        })
+    return merged
+
+
+def _fresh_version(max_age):
+    with _version_lock:
+        value, probed_at = _version['value'], _version['probed_at']
+    if value is not None and time.monotonic() - probed_at < max_age:
+        return value, value
+    return None, value
+
+
+# Current table version, probing the database at most once per max_age
+# seconds (PROBE_INTERVAL by default). While another thread probes, callers
+# that already have a version get it at once instead of waiting for the
+# query; only the first probe and max_age=0 (the refresher) wait.
+def table_version(engine=None, max_age=None):
+    max_age = PROBE_INTERVAL if max_age is None else max_age
+    fresh, last = _fresh_version(max_age)
+    if fresh is not None:
+        return fresh
+    if not _probe_lock.acquire(blocking=last is None or max_age == 0):
+        return last
+    try:
+        # Another probe may have finished while this one waited
+        fresh, _ = _fresh_version(max_age)
+        if fresh is not None:
+            return fresh
+        value = probe_version(engine)
+        with _version_lock:
+            _version.update(value=value, probed_at=time.monotonic())
+        return value
+    finally:
+        _probe_lock.release()
+
+
+# Check the version and reload the table if it changed (or the cached copy is
+# older than CACHE_TTL); returns the current frame and whether it was reloaded
+def _refresh(force=False, max_age=None):
+    with _refresh_lock:
+        engine = None if DATA_SOURCE in ('snapshot', 'shared') else get_engine()
+        with _cache_lock:
+            cached = dict(_cache)
+            _status['refreshing'] = True
+        try:
+            version = table_version(engine, max_age)
+            now = time.monotonic()
+            today = pd.Timestamp.today().normalize()
+            df = None
+            if not force and cached['frame'] is not None and now - cached['loaded_at'] < CACHE_TTL:
+                if version == cached['version'] and cached['day'] == today:
+                    with _cache_lock:
+                        _status.update(checked_at=time.time(), last_error=None, failed_at=None)
+                    # Requests still on the frame before the last swap are done by now
+                    for cache in list(_frame_caches):
+                        cache.retain(cached['frame'])
+                    return cached['frame'], False
+                df = _update_frame(engine, cached, version, today)
+                if df is not None:
+                    # Merged frames keep the time of the last full load for CACHE_TTL
+                    now = cached['loaded_at']
+            if df is None:
+                df = _read_table(engine)
+            # The version (and the day the day counts are for) travels with the
+            # frame, so charts keyed on it always match the rows they were drawn from
+            df.attrs['data_version'] = (version, today.date().isoformat())
+            _prepare_derived(cached['frame'], df)
+        except Exception as e:
+            _record(load_errors=1)
+            with _cache_lock:
+                # First line only: driver errors append a multi-line background note
+                _status.update(last_error=(str(e).splitlines() or [type(e).__name__])[0], failed_at=time.time())
+            raise
+        finally:
+            with _cache_lock:
+                _status['refreshing'] = False
+
+        with _cache_lock:
+            _cache.update(version=version, frame=df, loaded_at=now, day=today)
+            _status.update(loaded_at=time.time(), checked_at=time.time(), last_error=None, failed_at=None)
+        return df, True
+
+
+# Check for changes now and swap in a reloaded frame if needed (a forced
+# refresh always reloads); raises if the check or the reload fails
+def refresh(force=False):
+    return _refresh(force, max_age=0)[0]
+
+
+def _refresh_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            _refresh(max_age=0)
+        except Exception:
+            # Recorded in _status; requests keep getting the last good frame
+            pass
+        _record(background_refreshes=1)
+
+
+# Start the background refresher of this process (once)
+def start_refresher(interval=None):
+    with _refresher_lock:
+        if _refresher['thread'] is not None and _refresher['thread'].is_alive():
+            return
+        thread = threading.Thread(
+            target=_refresh_loop, args=(REFRESH_INTERVAL if interval is None else interval,),
+            name='data-refresher', daemon=True,
+        )
+        thread.start()
+        _refresher['thread'] = thread
+
+
+# Return the repositories table. Only the first call (or the first after
+# invalidate()) waits for the load; afterwards the cached frame is returned
+# at once and kept fresh by the background refresher
+def get_data():
+    if BACKGROUND_REFRESH:
+        with _cache_lock:
+            frame = _cache['frame']
+        if frame is not None:
+            _record(cache_hits=1)
+            return frame
+
+    frame, reloaded = _refresh()
+    _record(**({'cache_misses': 1} if reloaded else {'cache_hits': 1}))
+    if BACKGROUND_REFRESH:
+        start_refresher()
+    return frame
+
+
+# The updates that turned frame `base` into `frame`, oldest first, as
+# (replaced rows, new rows) pairs: lets derived data be updated from the
+# changed rows alone. None when `frame` wasn't derived from `base` by
+# recent merges (e.g. after a full reload).
+def changes_between(base, frame):
+    with _cache_lock:
+        history = list(_changes)
+    steps = []
+    target = frame
+    for change in reversed(history):
+        if target is base:
+            break
+        if change['frame']() is target:
+            steps.append((change['old_rows'], change['new_rows']))
+            target = change['base']()
+    return steps[::-1] if target is base else None
+
+
+# Data derived from a loaded frame (indexes, sketches, time series), built
+# once per frame. A refresh prepares every cache that is in use for the new
+# frame before swapping it in, so requests don't wait for the build; the
+# previous frame's entry is kept until the next refresh for requests that
+# started before the swap. With `update`, a frame merged from the cached one
+# is derived as update(value, frame, changes) from the changed rows alone
+# (see changes_between) instead of build(frame).
+class FrameCache:
+    def __init__(self, name, build, update=None):
+        self.name = name
+        self.build = build
+        self.update = update
+        self._lock = threading.Lock()
+        # Held while building, so concurrent sessions wait for a single build
+        # while lookups for frames already cached go through
+        self._build_lock = threading.Lock()
+        self._entries = []
+        _frame_caches.append(self)
+
+    def _lookup(self, df):
+        with self._lock:
+            for frame, value in self._entries:
+                if frame is df:
+                    return True, value
+            return False, self._entries[-1] if self._entries else None
+
+    def get(self, df):
+        found, value = self._lookup(df)
+        if found:
+            return value
+        with self._build_lock:
+            found, latest = self._lookup(df)
+            if found:
+                return latest
+            value = None
+            changes = None if self.update is None or latest is None else changes_between(latest[0], df)
+            if changes is not None:
+                with instrumentation.timer(f'{self.name}.update') as span:
+                    value = self.update(latest[1], df, changes)
+                    span['rows'] = sum(len(new_rows) for _, new_rows in changes)
+            else:
+                with instrumentation.timer(f'{self.name}.build') as span:
+                    value = self.build(df)
+                    span['rows'] = len(df)
+            with self._lock:
+                self._entries = self._entries[-1:] + [(df, value)]
+            return value
+
+    def in_use(self):
+        with self._lock:
+            return bool(self._entries)
+
+    # Drop the entries of every frame but `frame`
+    def retain(self, frame):
+        with self._lock:
+            self._entries = [entry for entry in self._entries if entry[0] is frame]
+
+    def clear(self):
+        with self._lock:
+            self._entries = []
+
+
+# Build the derived data in use for the frame about to be swapped in; a
+# failure is left for the requests to report
+def _prepare_derived(current, df):
+    for cache in list(_frame_caches):
+        if not cache.in_use():
+            continue
+        cache.retain(current)
+        try:
+            cache.get(df)
+        except Exception:
+            pass
+
+
+# Version of the frame currently held in the cache (None before the first load)
+def data_version():
+    return _cache['version']
+
+
+# Version the given frame was loaded at and the day its day counts are for
+# (None for frames not from get_data())
+def frame_version(df):
+    return df.attrs.get('data_version')
+
+
+# When the cached frame was loaded and last confirmed current (wall-clock
+# seconds), whether a refresh is running, and why the last one failed
+def data_status():
+    with _cache_lock:
+        return dict(_status, version=_cache['version'])
+
+
+def invalidate():
+    with _cache_lock:
+        _cache.update(version=None, frame=None, loaded_at=0.0, day=None)
+        _status.update(loaded_at=None, checked_at=None)
+        _changes.clear()
+    with _version_lock:
+        _version.update(value=None, probed_at=0.0)
+
+
+def get_metrics():
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    lookups = snapshot['cache_hits'] + snapshot['cache_misses']
+    snapshot['cache_hit_ratio'] = snapshot['cache_hits'] / lookups if lookups else 0.0
+    return snapshot
+
+
+instrumentation.register_collector('data', get_metrics)
@@ -0,0 +1,67 @@
+# Hidden debug panel: where the time of the current rerun went.
+#
+# Shown in the sidebar when the page is opened with ?debug=<GDD_DEBUG_KEY>
+# (see instrumentation.DEBUG_KEY); disabled while no key is configured.
+# Lists the rerun's timed steps and SQL statements, the process-wide
+# aggregates, and offers a one-off cProfile capture of the next rerun.
+import hmac
+import os
+
+import streamlit as st
+
+import instrumentation
+
+PROFILE_FLAG = 'debug_profile_next_rerun'
+PROFILE_PATH = 'debug_last_profile'
+
+
+def enabled():
+    key = instrumentation.DEBUG_KEY
+    if len(key) < instrumentation.MIN_DEBUG_KEY_LENGTH:
+        return False
+    return hmac.compare_digest(st.query_params.get('debug', ''), key)
+
+
+# Whether this rerun was requested to be profiled (consumes the request)
+def profile_requested():
+    return enabled() and st.session_state.pop(PROFILE_FLAG, False)
+
+
+def show(rerun):
+    # Imported here so that merely checking for ?debug doesn't load pandas
+    import pandas as pd
+
+    if rerun.profile_path:
+        st.session_state[PROFILE_PATH] = rerun.profile_path
+
+    with st.sidebar.expander("Debug: rerun timings", expanded=True):
+        st.write(f"**Rerun**: {rerun.seconds * 1000:.0f} ms on {rerun.page}")
+        if rerun.spans:
+            spans = pd.DataFrame(rerun.spans).sort_values('offset')
+            spans['ms'] = spans['seconds'] * 1000
+            spans['start ms'] = spans['offset'] * 1000
+            st.dataframe(spans[['name', 'start ms', 'ms'] + (['rows'] if 'rows' in spans else []) + ['thread']], hide_index=True)
+        if rerun.queries:
+            queries = pd.DataFrame(rerun.queries)
+            queries['ms'] = queries['seconds'] * 1000
+            st.write(f"**SQL**: {len(queries)} statements, {queries['ms'].sum():.0f} ms")
+            st.dataframe(queries[['statement', 'ms', 'rows']], hide_index=True)
+
+        timers = instrumentation.get_timers()
+        if timers:
+            st.write("**Since process start**")
+            totals = pd.DataFrame([
+                {'name': name, 'count': stats['count'], 'mean ms': stats['sum'] / stats['count'] * 1000, 'max ms': stats['max'] * 1000}
+                for name, stats in timers.items()
+            ]).sort_values('mean ms', ascending=False)
+            st.dataframe(totals, hide_index=True)
+
+        if st.button("Profile next rerun"):
+            st.session_state[PROFILE_FLAG] = True
+            st.rerun()
+        path = st.session_state.get(PROFILE_PATH)
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                st.download_button("Download last profile (.pstats)", f, file_name=os.path.basename(path))
+        st.caption(f"Sampling instead: py-spy record --pid {os.getpid()}")
+        st.download_button("Download metrics", instrumentation.prometheus_text(), file_name='metrics.prom', mime='text/plain')
@@ -0,0 +1,215 @@
+# Streaming export of the filtered repositories.
+#
+# Rows are read from the database (server-side cursor), the snapshot (record
+# batches) or the loaded frame in fixed-size chunks and written straight to a
+# file as CSV, gzip-compressed CSV or Parquet, so memory stays constant no
+# matter how many rows are exported. With Streamlit static serving enabled the
+# file is downloaded from disk through a link; otherwise it is handed to
+# st.download_button.
+import gzip
+import os
+import threading
+import time
+import uuid
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import data_layer
+import frame_schema
+import instrumentation
+import query_builder
+import term_index
+
+# Streamlit serves ./static at app/static when server.enableStaticServing is on
+EXPORT_DIR = os.environ.get('GDD_EXPORT_DIR', os.path.join('static', 'exports'))
+EXPORT_URL = 'app/static/exports'
+CHUNK_ROWS = int(os.environ.get('GDD_EXPORT_CHUNK_ROWS', 50000))
+MAX_EXPORT_ROWS = int(os.environ.get('GDD_EXPORT_MAX_ROWS', 2000000))
+MAX_EXPORT_BYTES = int(os.environ.get('GDD_EXPORT_MAX_BYTES', 512 * 1024 * 1024))
+# Exports running at once in the process, and per session
+MAX_CONCURRENT_EXPORTS = int(os.environ.get('GDD_EXPORT_CONCURRENCY', 4))
+MAX_SESSION_EXPORTS = 1
+# Finished export files are deleted after this many seconds
+EXPORT_TTL = 3600
+
+FORMATS = {
+    'CSV': ('csv', 'text/csv'),
+    'CSV (gzip)': ('csv.gz', 'application/gzip'),
+    'Parquet': ('parquet', 'application/vnd.apache.parquet'),
+}
+
+
+class ExportLimitError(Exception):
+    pass
+
+
+_lock = threading.Lock()
+_running = {'total': 0, 'sessions': {}}
+_metrics = {'exports': 0, 'rows': 0, 'bytes': 0, 'seconds': 0.0, 'rejected': 0}
+
+
+def _acquire(session_id):
+    with _lock:
+        if _running['total'] >= MAX_CONCURRENT_EXPORTS:
+            _metrics['rejected'] += 1
+            raise ExportLimitError("Too many exports are running, please try again in a moment.")
+        if _running['sessions'].get(session_id, 0) >= MAX_SESSION_EXPORTS:
+            _metrics['rejected'] += 1
+            raise ExportLimitError("An export for this session is already running.")
+        _running['total'] += 1
+        _running['sessions'][session_id] = _running['sessions'].get(session_id, 0) + 1
+
+
+def _release(session_id):
+    with _lock:
+        _running['total'] -= 1
+        _running['sessions'][session_id] -= 1
+        if not _running['sessions'][session_id]:
+            del _running['sessions'][session_id]
+
+
+# Chunks of the rows matching the filters, from whichever source holds them
+def iter_chunks(languages=(), licenses=(), min_stars=0, keyword='', frame=None, chunk_rows=CHUNK_ROWS):
+    if frame is not None:
+        chunks = (frame.iloc[start:start + chunk_rows] for start in range(0, len(frame), chunk_rows))
+    elif data_layer.DATA_SOURCE == 'snapshot':
+        import snapshot
+        dataset, _ = snapshot.open_dataset()
+        columns = [name for name in dataset.schema.names if name != 'Creation_Month']
+        batches = dataset.to_batches(
+            columns=columns,
+            filter=snapshot.filter_expression(languages, licenses, min_stars),
+            batch_size=chunk_rows,
+        )
+        chunks = (batch.to_pandas() for batch in batches)
+    else:
+        chunks = _database_chunks(languages, licenses, min_stars, keyword, chunk_rows)
+
+    for chunk in chunks:
+        if keyword and frame is None:
+            chunk = chunk[term_index.matches(chunk['Description'], keyword)]
+        if len(chunk):
+            yield chunk
+
+
+def _database_chunks(languages, licenses, min_stars, keyword, chunk_rows):
+    # (the keyword only pre-filters in SQL; iter_chunks makes the match exact)
+    query, params = query_builder.build_filter_query(languages, licenses, min_stars, columns=['*'], keyword=keyword)
+    # stream_results keeps the driver from buffering the whole result set
+    with data_layer.get_engine().connect().execution_options(stream_results=True) as conn:
+        yield from pd.read_sql(query, conn, params=params, chunksize=chunk_rows)
+
+
+class _CsvWriter:
+    def __init__(self, path, compress):
+        self.file = gzip.open(path, 'wt', encoding='utf-8', newline='') if compress else open(path, 'w', encoding='utf-8', newline='')
+        self.header = True
+
+    def write(self, chunk):
+        chunk.to_csv(self.file, index=False, header=self.header)
+        self.header = False
+
+    def close(self):
+        self.file.close()
+
+
+# Known columns get their fixed types; others are inferred from the first
+# chunk, and one that is all null there is written as strings
+def _schema_for(chunk):
+    fields = []
+    for column in chunk.columns:
+        arrow_type = frame_schema.ARROW_TYPES.get(column)
+        if arrow_type is None:
+            arrow_type = pa.Schema.from_pandas(chunk[[column]], preserve_index=False).field(column).type
+            if pa.types.is_null(arrow_type):
+                arrow_type = pa.string()
+        fields.append(pa.field(column, arrow_type))
+    return pa.schema(fields)
+
+
+class _ParquetWriter:
+    def __init__(self, path):
+        self.path = path
+        self.writer = None
+
+    def write(self, chunk):
+        # Some drivers return the dates as strings
+        for column in frame_schema.DATE_COLUMNS:
+            if column in chunk and not pd.api.types.is_datetime64_any_dtype(chunk[column]):
+                chunk = chunk.assign(**{column: pd.to_datetime(chunk[column], errors='coerce')})
+        if self.writer is None:
+            self.writer = pq.ParquetWriter(self.path, _schema_for(chunk))
+        self.writer.write_table(pa.Table.from_pandas(chunk, schema=self.writer.schema, preserve_index=False))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+
+
+def _cleanup(directory):
+    cutoff = time.time() - EXPORT_TTL
+    for name in os.listdir(directory):
+        path = os.path.join(directory, name)
+        if os.path.isfile(path) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
+
+
+# Write the chunks to a file in EXPORT_DIR; returns the file name and the
+# export statistics (rows, bytes, seconds, rows_per_second, mb_per_second)
+def export_rows(chunks, export_format='CSV', session_id='default', directory=EXPORT_DIR):
+    extension, _ = FORMATS[export_format]
+    os.makedirs(directory, exist_ok=True)
+    _cleanup(directory)
+    _acquire(session_id)
+
+    # Unguessable name: the file is reachable by anyone who knows its URL
+    name = f"{uuid.uuid4().hex}.{extension}"
+    path = os.path.join(directory, name)
+    writer = _ParquetWriter(path) if extension == 'parquet' else _CsvWriter(path, extension == 'csv.gz')
+    start = time.perf_counter()
+    rows = 0
+    try:
+        for chunk in chunks:
+            rows += len(chunk)
+            if rows > MAX_EXPORT_ROWS:
+                raise ExportLimitError(f"Exports are limited to {MAX_EXPORT_ROWS:,} rows; narrow the filters.")
+            writer.write(chunk)
+            if os.path.getsize(path) > MAX_EXPORT_BYTES:
+                raise ExportLimitError(f"Exports are limited to {MAX_EXPORT_BYTES // (1024 * 1024)} MB; narrow the filters.")
+        writer.close()
+    except BaseException:
+        writer.close()
+        os.remove(path)
+        raise
+    finally:
+        _release(session_id)
+
+    seconds = time.perf_counter() - start
+    size = os.path.getsize(path)
+    stats = {
+        'rows': rows,
+        'bytes': size,
+        'seconds': seconds,
+        'rows_per_second': rows / seconds if seconds else 0.0,
+        'mb_per_second': size / (1024 * 1024) / seconds if seconds else 0.0,
+    }
+    with _lock:
+        _metrics['exports'] += 1
+        _metrics['rows'] += rows
+        _metrics['bytes'] += size
+        _metrics['seconds'] += seconds
+    return name, stats
+
+
+def file_path(name, directory=EXPORT_DIR):
+    return os.path.join(directory, name)
+
+
+def get_metrics():
+    with _lock:
+        return dict(_metrics, running=_running['total'])
+
+
+instrumentation.register_collector('export', get_metrics)
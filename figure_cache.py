@@ -0,0 +1,105 @@
+# Render cache for the matplotlib/seaborn charts.
+#
+# Each chart is drawn once per (chart id, normalized filter state, data
+# version) and kept as PNG bytes in a size-bounded LRU, so reruns, repeated
+# views and switching pages serve the image without touching matplotlib.
+# Figures are created with the object-oriented API (never registered with
+# pyplot) and cleared right after rendering, so figure memory stays flat.
+# With GDD_DATA_SOURCE=shared the images are also written to the shared
+# version directory, so a chart rendered by one worker is reused by the others.
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+from matplotlib.figure import Figure
+
+import data_layer
+import instrumentation
+
+MAX_ENTRIES = int(os.environ.get('GDD_FIGURE_CACHE_ENTRIES', 256))
+MAX_BYTES = int(os.environ.get('GDD_FIGURE_CACHE_BYTES', 64 * 1024 * 1024))
+DPI = 150
+
+_lock = threading.Lock()
+_cache = OrderedDict()
+_state = {'bytes': 0}
+_metrics = {'hits': 0, 'misses': 0, 'shared_hits': 0, 'evictions': 0}
+
+
+def _normalize_value(value):
+    if pd.api.types.is_list_like(value):
+        return tuple(sorted(_normalize_value(item) for item in value))
+    if value is None or pd.isna(value):
+        return ''
+    return str(value)
+
+
+# Hashable, order-independent form of the filter widgets' values
+def normalize_filters(filters):
+    return tuple(sorted((name, _normalize_value(value)) for name, value in (filters or {}).items()))
+
+
+# Draw the chart with draw(fig, ax) unless a rendered image for this key is
+# cached; returns PNG (or SVG with fmt='svg') bytes
+def render(chart_id, filters, data_version, draw, figsize=None, fmt='png'):
+    key = (chart_id, normalize_filters(filters), data_version, fmt)
+    with _lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            _metrics['hits'] += 1
+            return _cache[key]
+        _metrics['misses'] += 1
+
+    shared_path = None
+    if data_layer.DATA_SOURCE == 'shared':
+        import shared_cache
+        shared_path = shared_cache.figure_path(key, fmt)
+        image = shared_cache.read_figure(shared_path)
+        if image is not None:
+            with _lock:
+                _metrics['shared_hits'] += 1
+            return _store(key, image)
+
+    fig = Figure(figsize=figsize)
+    try:
+        # Drawing (aggregation, KDE fitting) and encoding are timed separately
+        with instrumentation.timer(f'chart.draw:{chart_id}'):
+            ax = fig.subplots()
+            draw(fig, ax)
+        with instrumentation.timer(f'chart.encode:{chart_id}'):
+            buffer = io.BytesIO()
+            fig.savefig(buffer, format=fmt, dpi=DPI, bbox_inches='tight')
+    finally:
+        fig.clear()
+    image = buffer.getvalue()
+    if shared_path is not None:
+        shared_cache.write_figure(shared_path, image)
+    return _store(key, image)
+
+
+def _store(key, image):
+    with _lock:
+        if key not in _cache:
+            _cache[key] = image
+            _state['bytes'] += len(image)
+        while _cache and (len(_cache) > MAX_ENTRIES or _state['bytes'] > MAX_BYTES):
+            _, evicted = _cache.popitem(last=False)
+            _state['bytes'] -= len(evicted)
+            _metrics['evictions'] += 1
+    return image
+
+
+def clear():
+    with _lock:
+        _cache.clear()
+        _state['bytes'] = 0
+
+
+def get_metrics():
+    with _lock:
+        return dict(_metrics, entries=len(_cache), bytes=_state['bytes'])
+
+
+instrumentation.register_collector('figure_cache', get_metrics)
@@ -0,0 +1,184 @@
+# Bitmap filter engine shared by the Data Exploration and Visualizations pages.
+#
+# Built once per loaded frame: a packed bitmap per Programming_Language and
+# License_Type value, and the rows sorted by Number_of_Stars with packed
+# bitmaps for a few star thresholds. A filter ORs the bitmaps of the selected
+# values, ANDs the columns together with the nearest star threshold and only
+# clears the few rows between that threshold and the slider value, so no
+# full-length boolean mask is rebuilt per rerun. Results are memoized per
+# filter tuple.
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+import data_layer
+import instrumentation
+import term_index
+
+CATEGORY_COLUMNS = ['Programming_Language', 'License_Type']
+STAR_COLUMN = 'Number_of_Stars'
+# Precomputed star thresholds (quantiles); more levels use more memory
+# (rows / 8 bytes each) but leave fewer rows to clear per query
+STAR_LEVELS = int(os.environ.get('GDD_FILTER_STAR_LEVELS', 32))
+RESULT_CACHE_SIZE = 64
+
+# Code used for missing values, which can be selected like any other value
+MISSING = -1
+
+
+def _bitmap(positions, row_count):
+    mask = np.zeros(row_count, dtype=bool)
+    mask[positions] = True
+    return np.packbits(mask)
+
+
+def _clear(bitmap, positions):
+    np.bitwise_and.at(bitmap, positions >> 3, ~(np.uint8(0x80) >> (positions & 7).astype(np.uint8)))
+
+
+class FilterIndex:
+    def __init__(self, df):
+        self.frame = df
+        self.row_count = len(df)
+        self._empty = np.zeros((self.row_count + 7) // 8, dtype=np.uint8)
+
+        # value -> code and code -> packed bitmap, per category column
+        self._values = {}
+        self._bitmaps = {}
+        for column in CATEGORY_COLUMNS:
+            codes, uniques = pd.factorize(df[column], use_na_sentinel=True)
+            self._values[column] = {value: code for code, value in enumerate(uniques)}
+            order = np.argsort(codes, kind='stable')
+            boundaries = np.searchsorted(codes[order], np.arange(MISSING, len(uniques) + 1))
+            self._bitmaps[column] = {
+                code: _bitmap(order[boundaries[i]:boundaries[i + 1]], self.row_count)
+                for i, code in enumerate(range(MISSING, len(uniques)))
+            }
+
+        # Rows ordered by stars; missing star counts sort last and never match a
+        # star threshold
+        stars = df[STAR_COLUMN].to_numpy(dtype=float, na_value=np.nan)
+        self._star_order = np.argsort(stars, kind='stable')
+        self._valid_stars = int(np.count_nonzero(~np.isnan(stars)))
+        self._sorted_stars = stars[self._star_order][:self._valid_stars]
+        self._star_levels = np.unique(np.quantile(self._sorted_stars, np.linspace(0, 1, STAR_LEVELS, endpoint=False))) if self._valid_stars else np.empty(0)
+        self._star_bitmaps = [
+            _bitmap(self._star_order[np.searchsorted(self._sorted_stars, level):self._valid_stars], self.row_count)
+            for level in self._star_levels
+        ]
+
+        self._lock = threading.Lock()
+        self._results = OrderedDict()
+
+    def _codes(self, column, values):
+        codes = set()
+        for value in values:
+            if value is None or (not isinstance(value, str) and pd.isna(value)):
+                codes.add(MISSING)
+            elif value in self._values[column]:
+                codes.add(self._values[column][value])
+        return tuple(sorted(codes))
+
+    def _category_bitmap(self, column, codes):
+        bitmaps = self._bitmaps[column]
+        selected = [bitmaps[code] for code in codes if code in bitmaps]
+        if not selected:
+            return self._empty
+        return np.bitwise_or.reduce(selected) if len(selected) > 1 else selected[0]
+
+    def _stars_bitmap(self, result, min_stars):
+        if not len(self._star_levels):
+            return self._empty
+        # Nearest precomputed threshold at or below min_stars, then clear the
+        # rows between that threshold and min_stars
+        level = max(int(np.searchsorted(self._star_levels, min_stars, side='right')) - 1, 0)
+        result = result & self._star_bitmaps[level] if result is not None else self._star_bitmaps[level].copy()
+        start = np.searchsorted(self._sorted_stars, self._star_levels[level])
+        stop = np.searchsorted(self._sorted_stars, min_stars)
+        if stop > start:
+            _clear(result, self._star_order[start:stop])
+        return result
+
+    def _select(self, language_codes, license_codes, min_stars, keyword):
+        result = None
+        for column, codes in ((CATEGORY_COLUMNS[0], language_codes), (CATEGORY_COLUMNS[1], license_codes)):
+            if codes is not None:
+                bitmap = self._category_bitmap(column, codes)
+                result = bitmap if result is None else result & bitmap
+        # Skipped without a threshold, or when every row already satisfies it
+        if min_stars is not None and (self._valid_stars < self.row_count
+                                      or (self._valid_stars and min_stars > self._sorted_stars[0])):
+            result = self._stars_bitmap(result, min_stars)
+        # (viewing the unpacked bits as bool makes flatnonzero several times faster)
+        positions = None if result is None else np.flatnonzero(np.unpackbits(result, count=self.row_count).view(bool))
+
+        if keyword:
+            matches = term_index.get_index(self.frame).search(keyword)
+            positions = matches if positions is None else np.intersect1d(positions, matches, assume_unique=True)
+        return positions
+
+    # Positions of the rows matching the filters (None when nothing is filtered);
+    # an empty language/license selection means no filter, like the multiselects,
+    # and min_stars=None keeps rows whatever their star count, even a missing one
+    def positions(self, languages=(), licenses=(), min_stars=None, keyword=''):
+        key = (
+            self._codes(CATEGORY_COLUMNS[0], languages) if len(languages) > 0 else None,
+            self._codes(CATEGORY_COLUMNS[1], licenses) if len(licenses) > 0 else None,
+            min_stars,
+            ' '.join(term_index.tokenize(keyword)) if keyword else '',
+        )
+        with self._lock:
+            if key in self._results:
+                self._results.move_to_end(key)
+                _record(hits=1)
+                return self._results[key]
+
+        _record(misses=1)
+        with instrumentation.timer('filter.select') as span:
+            positions = self._select(*key)
+            span['rows'] = self.row_count if positions is None else len(positions)
+
+        with self._lock:
+            self._results[key] = positions
+            while len(self._results) > RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return positions
+
+    # The rows of the frame matching the filters
+    def filter(self, languages=(), licenses=(), min_stars=None, keyword=''):
+        positions = self.positions(languages, licenses, min_stars, keyword)
+        return self.frame if positions is None else self.frame.take(positions)
+
+
+_metrics_lock = threading.Lock()
+_metrics = {'hits': 0, 'misses': 0, 'builds': 0}
+
+
+def _record(**changes):
+    with _metrics_lock:
+        for key, value in changes.items():
+            _metrics[key] += value
+
+
+def _build(df):
+    _record(builds=1)
+    return FilterIndex(df)
+
+
+_cache = data_layer.FrameCache('filter', _build)
+
+
+# Index of the given frame, built once per loaded frame
+def get_index(df):
+    return _cache.get(df)
+
+
+def get_metrics():
+    with _metrics_lock:
+        return dict(_metrics)
+
+
+instrumentation.register_collector('filter', get_metrics)
@@ -0,0 +1,118 @@
+# Compact in-memory representation of the repositories frame.
+#
+# pd.read_sql returns object strings, int64 counts and (depending on the
+# driver) string dates. optimize_frame turns the low-cardinality columns into
+# categoricals (so isin filters compare category codes), stores free text as
+# Arrow strings, downcasts the counts, parses the dates once and precomputes
+# the derived columns the Visualizations page used to recompute on every render.
+import pandas as pd
+import pyarrow as pa
+
+# Columns with few distinct values, stored as categoricals
+CATEGORY_COLUMNS = ['Programming_Language', 'License_Type']
+# Free-text columns, stored as Arrow-backed strings instead of Python objects
+TEXT_COLUMNS = ['Repository_Name', 'Owner', 'Description', 'URL']
+COUNT_COLUMNS = ['Number_of_Stars', 'Number_of_Forks', 'Number_of_Open_Issues']
+DATE_COLUMNS = ['Creation_Date', 'Last_Updated_Date']
+DERIVED_COLUMNS = ['Days_Since_Last_Update', 'Repository_Age']
+
+# Arrow types of the known columns, for writers that must fix the schema
+# before seeing every row (a chunk of nulls says nothing about a column)
+ARROW_TYPES = {
+    'id': pa.int64(),
+    **{column: pa.string() for column in CATEGORY_COLUMNS + TEXT_COLUMNS},
+    **{column: pa.timestamp('us') for column in DATE_COLUMNS},
+    **{column: pa.int64() for column in COUNT_COLUMNS + DERIVED_COLUMNS},
+}
+
+
+# types_mapper for Table.to_pandas: keep strings in the Arrow buffers (shared
+# with a memory-mapped file) instead of copying them into Python objects
+def arrow_string_types(arrow_type):
+    if arrow_type in (pa.string(), pa.large_string()):
+        return pd.StringDtype('pyarrow')
+    return None
+
+
+def _downcast(series):
+    if series.isna().any():
+        return pd.to_numeric(series, downcast='float')
+    if len(series) and series.min() >= 0:
+        return pd.to_numeric(series, downcast='unsigned')
+    return pd.to_numeric(series, downcast='integer')
+
+
+def _days_since(dates, today):
+    return _downcast((today - dates).dt.days)
+
+
+# Add Days_Since_Last_Update and Repository_Age (whole days before today)
+def add_derived_columns(df, today=None):
+    today = pd.Timestamp.today().normalize() if today is None else today
+    df['Days_Since_Last_Update'] = _days_since(df['Last_Updated_Date'], today)
+    df['Repository_Age'] = _days_since(df['Creation_Date'], today)
+    return df
+
+
+# Return a compact copy of the frame and a before/after memory report
+# (copy=False converts a frame the caller owns in place)
+def optimize_frame(df, today=None, copy=True):
+    bytes_before = int(df.memory_usage(deep=True).sum())
+    if copy:
+        df = df.copy()
+    for column in CATEGORY_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('category')
+    for column in TEXT_COLUMNS:
+        if column in df:
+            df[column] = df[column].astype('string[pyarrow]')
+    for column in COUNT_COLUMNS:
+        if column in df:
+            df[column] = _downcast(df[column])
+    for column in DATE_COLUMNS:
+        if column in df:
+            df[column] = pd.to_datetime(df[column], errors='coerce')
+    if all(column in df for column in DATE_COLUMNS):
+        add_derived_columns(df, today)
+
+    bytes_after = int(df.memory_usage(deep=True).sum())
+    report = {
+        'bytes_before': bytes_before,
+        'bytes_after': bytes_after,
+        'reduction': bytes_before / bytes_after if bytes_after else 0.0,
+    }
+    return df, report
+
+
+# Merge changed rows (raw, as read from the database) into an optimized
+# frame: rows whose key is already present are replaced, the others are
+# appended. Returns the merged frame, the replaced rows as they were and the
+# new rows (optimized).
+def merge_rows(frame, rows, key='id', today=None):
+    rows, _ = optimize_frame(rows, today)
+    # Each key once, keeping the last version of the row
+    rows = rows.drop_duplicates(subset=[key], keep='last')
+    replaced = frame[key].isin(rows[key]).to_numpy()
+    old_rows = frame[replaced]
+    base = frame[~replaced] if replaced.any() else frame
+
+    # Concatenated categoricals only stay categorical with identical categories
+    base = base.copy(deep=False)
+    for column in CATEGORY_COLUMNS:
+        if column in rows:
+            categories = base[column].cat.categories.union(rows[column].cat.categories)
+            base[column] = base[column].cat.set_categories(categories)
+            rows[column] = rows[column].cat.set_categories(categories)
+    merged = pd.concat([base, rows], ignore_index=True)
+    return merged, old_rows, rows
+
+
+# value_counts() without the zero counts a categorical reports for values
+# that were filtered out, indexed by plain values so charts only show those
+def value_counts(series, normalize=False):
+    counts = series.value_counts()
+    counts = counts[counts > 0]
+    counts.index = counts.index.astype(object)
+    if normalize:
+        counts = counts / counts.sum()
+    return counts
@@ -0,0 +1,4 @@
+# Page modules of the GitHub Data Dive app. git_d1.py imports a page module
+# only when that page is selected, so each page pays only for its own
+# dependencies (the Home page never imports pandas, seaborn, plotly or
+# wordcloud); modules stay in sys.modules, so later reruns import nothing.
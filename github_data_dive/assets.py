@@ -0,0 +1,21 @@
+# Static assets, read and decoded once per process instead of on every rerun.
+import functools
+import os
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# Raw file bytes; st.image serves PNG bytes as they are, without re-encoding
+@functools.lru_cache(maxsize=None)
+def read_bytes(name):
+    with open(os.path.join(ROOT, name), 'rb') as f:
+        return f.read()
+
+
+# Decoded image, for APIs that need a PIL image (e.g. the page icon)
+@functools.lru_cache(maxsize=None)
+def image(name):
+    from PIL import Image
+    with Image.open(os.path.join(ROOT, name)) as img:
+        img.load()
+        return img.copy()
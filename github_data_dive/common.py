@@ -0,0 +1,48 @@
+# Helpers shared by the pages that work on the repositories table.
+import time
+
+import streamlit as st
+
+import data_layer
+import instrumentation
+
+
+# Function to fetch the repositories table through the shared, cached data layer
+def load_data():
+    with instrumentation.timer('load_data'):
+        try:
+            # One pooled engine and one cached frame are shared by every rerun and
+            # session; only the first load waits, later changes to the table are
+            # picked up by the background refresher
+            df = data_layer.get_data()
+        except Exception as e:
+            st.error(f"Error connecting to the database: {e}")
+            st.warning("No data available to display.")
+            return None  # Return None if there's an error
+    show_data_age()
+    return df
+
+
+def _format_age(seconds):
+    if seconds < 60:
+        return f"{seconds:.0f} s"
+    if seconds < 3600:
+        return f"{seconds / 60:.0f} min"
+    return f"{seconds / 3600:.1f} h"
+
+
+# How old the served data is, and whether refreshing it is failing
+def show_data_age():
+    status = data_layer.data_status()
+    if status['loaded_at'] is None:
+        return
+    now = time.time()
+    caption = f"Data loaded {_format_age(now - status['loaded_at'])} ago, checked {_format_age(now - status['checked_at'])} ago"
+    if status['refreshing']:
+        caption += " (refreshing)"
+    st.sidebar.caption(caption)
+    if status['last_error']:
+        st.sidebar.warning(
+            f"Refreshing the data failed {_format_age(now - status['failed_at'])} ago ({status['last_error']}); "
+            "showing the last loaded copy."
+        )
@@ -0,0 +1,37 @@
+# Conclusion page.
+import streamlit as st
+
+
+def render():
+    st.header("Key Insights and Conclusion")
+
+    # Summary of key insights
+    st.subheader("Summary of Key Insights")
+    st.markdown(
+        """
+        - **Programming Languages**: Python and JavaScript are the most popular languages in GitHub repositories.
+        - **Repository Trends**: Machine Learning and Web Development projects show significant growth.
+        - **License Types**: MIT and Apache licenses dominate the open-source landscape.
+        - **Developer Engagement**: Repositories with higher stars tend to attract more forks and contributors.
+        """
+    )
+
+    # Conclusion and Future Directions
+    st.subheader("Conclusion and Future Directions")
+    st.markdown(
+        """
+        GitHub Data Dive has provided valuable insights into the dynamics of open-source repositories. 
+        Future enhancements could include real-time updates, advanced machine learning models for trend prediction, 
+        and integration with additional data sources to enrich analysis capabilities.
+        """
+    )
+
+    # Footer text
+    st.markdown(
+        """
+        <p style="text-align: center; margin-top: 50px;">
+        Built with ❤️ by Ponishadevi | Inspiring the Open-Source Future 🌐
+        </p>
+        """,
+        unsafe_allow_html=True,
+    )
@@ -0,0 +1,257 @@
+# Data Exploration page: sidebar filters, the filtered table, charts and export.
+import uuid
+
+import streamlit as st
+import seaborn as sns
+
+import data_layer
+import export
+import figure_cache
+import filter_engine
+import frame_schema
+import large_charts
+import instrumentation
+import query_builder
+import sketches
+from github_data_dive import common
+
+
+def _show_query_error(error):
+    st.error(f"Error connecting to the database: {error}")
+    st.warning("No data available to display.")
+
+
+# Whether the filtered results are the last cached copy because the database failed
+def show_query_status():
+    status = query_builder.query_status()
+    if status['last_error']:
+        st.sidebar.warning(f"Querying the database failed ({status['last_error']}); showing the last cached results.")
+
+
+def render():
+    st.header("Explore GitHub Repositories")
+
+    # Large tables are filtered in SQL, so the full frame is only loaded when
+    # the filters run in memory
+    use_sql_filters = query_builder.use_sql_filters()
+    df = None if use_sql_filters else common.load_data()
+    if df is None and not use_sql_filters:
+        return
+
+    # Sidebar filters for user input
+    st.sidebar.header("Filter Repositories")
+    if use_sql_filters:
+        try:
+            options = query_builder.filter_options()
+        except Exception as e:
+            _show_query_error(e)
+            return
+        language_options, license_options, max_stars = options['languages'], options['licenses'], options['max_stars']
+    else:
+        language_options = df['Programming_Language'].unique()
+        license_options = df['License_Type'].unique()
+        max_stars = int(df['Number_of_Stars'].max())
+    selected_language = st.sidebar.multiselect("Select Programming Language", language_options)
+    selected_license = st.sidebar.multiselect("Select License Type", license_options)
+    min_stars = st.sidebar.slider("Minimum Stars", 0, max_stars, 0)
+    keyword = st.sidebar.text_input("Search Descriptions", help="Only show repositories whose description contains all of these words.")
+
+    # Apply filters in the database (large tables) or to the dataframe. In SQL
+    # only the most-starred rows are fetched for the table; counts, totals and
+    # charts come from aggregate queries over every matching row.
+    summary = None
+    with instrumentation.timer('exploration.filter') as span:
+        if use_sql_filters:
+            try:
+                filtered_data = query_builder.fetch_filtered(
+                    selected_language, selected_license, min_stars, limit=query_builder.DISPLAY_ROWS, keyword=keyword)
+                summary = query_builder.fetch_summary(selected_language, selected_license, min_stars, keyword)
+            except Exception as e:
+                _show_query_error(e)
+                return
+        else:
+            # Bitmap indexes built at load time, shared with the Visualizations page;
+            # the keyword goes through the description index
+            filtered_data = filter_engine.get_index(df).filter(selected_language, selected_license, min_stars, keyword)
+        span['rows'] = len(filtered_data)
+    found = len(filtered_data) if summary is None else summary['count']
+    if use_sql_filters:
+        show_query_status()
+
+    # Totals, top-N lists and percentiles come from the load-time sketches
+    # unless the rows were filtered in SQL or by keyword
+    sketch_df = None if use_sql_filters or keyword else df
+    sketch_filters = (selected_language, selected_license, min_stars)
+
+    # Rendered charts are cached per filter state and data version
+    filter_state = {'languages': selected_language, 'licenses': selected_license, 'min_stars': min_stars, 'keyword': keyword}
+    if use_sql_filters:
+        # (charts of the last cached results are kept apart from current ones)
+        status = query_builder.query_status()
+        data_version = (status['version'], 'stale') if status['last_error'] else status['version']
+    else:
+        data_version = data_layer.frame_version(df)
+
+    # Create columns for the dashboard layout with adjusted widths
+    col1, col2 = st.columns([3, 2])  # Adjust column proportions
+
+    # Column 1: Filtered Data Table
+    with col1:
+        st.subheader(f"Filtered Repositories ({found} found)")
+        if not filtered_data.empty:
+            st.dataframe(filtered_data[['Repository_Name', 'Number_of_Stars', 'Number_of_Forks', 'Description']])
+            if found > len(filtered_data):
+                st.caption(f"Showing the {len(filtered_data):,} most-starred repositories; export the data for all of them.")
+        else:
+            st.write("No data matches the selected filters.")
+
+        # Download options for filtered data, streamed to a file in chunks
+        export_format = st.selectbox("Export Format", list(export.FORMATS))
+        if st.button("Download Filtered Data"):
+            session_id = st.session_state.setdefault('export_session_id', uuid.uuid4().hex)
+            if use_sql_filters:
+                chunks = export.iter_chunks(selected_language, selected_license, min_stars, keyword)
+            else:
+                chunks = export.iter_chunks(frame=filtered_data)
+            try:
+                name, stats = export.export_rows(chunks, export_format, session_id)
+            except export.ExportLimitError as e:
+                st.warning(str(e))
+            except Exception as e:
+                st.error(f"Export failed: {e}")
+            else:
+                st.caption(
+                    f"Exported {stats['rows']:,} rows ({stats['bytes'] / (1024 * 1024):.1f} MB) "
+                    f"in {stats['seconds']:.2f}s ({stats['rows_per_second']:,.0f} rows/s)"
+                )
+                extension, mime = export.FORMATS[export_format]
+                file_name = f'filtered_repositories.{extension}'
+                if st.get_option('server.enableStaticServing'):
+                    # Served from disk by the web server, never loaded into memory
+                    st.markdown(f'<a href="{export.EXPORT_URL}/{name}" download="{file_name}">Download {export_format}</a>', unsafe_allow_html=True)
+                else:
+                    with open(export.file_path(name), 'rb') as f:
+                        st.download_button(
+                            label=f"Download {export_format}",
+                            data=f,
+                            file_name=file_name,
+                            mime=mime,
+                        )
+
+    # Column 2: Count of Repositories by Programming Language
+    with col2:
+        st.subheader("Count of Repositories by Programming Language")
+        if summary is None:
+            language_counts = frame_schema.value_counts(filtered_data['Programming_Language'])
+        else:
+            language_counts = summary['languages']
+
+        # Create bar chart only if there are filtered repositories
+        if not language_counts.empty:
+            def draw_language_counts(fig1, ax1):
+                sns.barplot(x=language_counts.index, y=language_counts.values, ax=ax1, palette='viridis')
+                ax1.set_xlabel("Programming Language")
+                ax1.set_ylabel("Number of Repositories")
+                ax1.set_title("Number of Repositories by Programming Language")
+                ax1.tick_params(axis='x', labelrotation=45)  # Rotate x-axis labels for readability
+            st.image(figure_cache.render('exploration_language_counts', filter_state, data_version, draw_language_counts), use_column_width=True)
+        else:
+            st.write("No data available for the selected filters.")
+
+    # Column 1: Top Repositories by Stars
+    with col1:
+        # Distribution of Stars
+        st.subheader("Distribution of Stars")
+        def draw_stars_distribution(fig2, ax2):
+            # Log-spaced bins: star counts are heavy-tailed
+            if summary is None:
+                large_charts.histogram(ax2, filtered_data['Number_of_Stars'], bins=30, log=True, color='blue')
+            else:
+                stars = summary['distributions']['Number_of_Stars']
+                large_charts.histogram(ax2, stars.index, weights=stars.values, bins=30, log=True, color='blue')
+            ax2.set_xlabel("Stars (log scale)")
+            ax2.set_ylabel("Frequency")
+            ax2.set_title("Distribution of Stars")
+        st.image(figure_cache.render('exploration_stars_distribution', filter_state, data_version, draw_stars_distribution), use_column_width=True)
+
+    # Column 2: Summary Statistics and Distribution
+    with col2:
+        st.subheader("Summary Statistics of Filtered Data")
+        if not filtered_data.empty:
+            if summary is None:
+                totals = sketches.totals(sketch_df, filtered_data, *sketch_filters)
+            else:
+                totals = summary['totals']
+            st.write(f"**Total Stars**: {int(totals['Number_of_Stars'])}")
+            st.write(f"**Total Forks**: {int(totals['Number_of_Forks'])}")
+            for column, label in (('Number_of_Stars', 'Stars'), ('Number_of_Forks', 'Forks')):
+                if summary is None:
+                    quantiles = sketches.percentiles(sketch_df, filtered_data, column, (0.5, 0.9, 0.99), *sketch_filters)
+                else:
+                    quantiles = sketches.percentiles_from_counts(summary['distributions'][column], (0.5, 0.9, 0.99))
+                st.write(f"**{label} p50 / p90 / p99**: " + " / ".join(f"{value:,.0f}" for value in quantiles.values()))
+
+            st.subheader("Top 10 Repositories by Stars")
+            # (the rows fetched in SQL are the most-starred ones)
+            top_10_by_stars = sketches.top_rows(sketch_df, filtered_data, 'Number_of_Stars', 10, *sketch_filters)
+            st.dataframe(top_10_by_stars[['Repository_Name', 'Number_of_Stars']])
+
+    # Column 1: License Type Distribution
+    with col1:
+        st.subheader("License Type Distribution")
+        if summary is None:
+            license_counts = frame_schema.value_counts(filtered_data['License_Type'])
+        else:
+            license_counts = summary['licenses']
+        if not license_counts.empty:
+            def draw_license_pie(fig3, ax3):
+                ax3.pie(license_counts, labels=license_counts.index, autopct='%1.1f%%', startangle=90)
+                ax3.axis('equal')  # Equal aspect ratio ensures that pie chart is circular.
+            st.image(figure_cache.render('exploration_license_pie', filter_state, data_version, draw_license_pie), use_column_width=True)
+        else:
+            st.write("No license data available to generate the distribution chart.")
+    with col2:        
+        # License Type Insights
+        st.subheader("Insights on License Types")
+        if not filtered_data.empty:
+            license_summary = license_counts / license_counts.sum() * 100
+            for license_type, percent in license_summary.items():
+                st.write(f"**{license_type}**: {percent:.2f}% of repositories")
+
+
+    # Group and aggregate filtered data
+    with instrumentation.timer('exploration.open_issues'):
+        # Limit to top N repositories based on Number of Open Issues
+        top_n = query_builder.TOP_REPOSITORIES  # Adjust as necessary
+
+        if summary is None:
+            # Only the top rows by open issues of each language/license can make the chart
+            grouped_data = sketches.top_open_issues(
+                sketches.open_issue_rows(sketch_df, filtered_data, top_n, *sketch_filters), top_n)
+        else:
+            grouped_data = summary['open_issues']
+
+    # Plotting the grouped bar chart
+    def draw_open_issues(fig, ax):
+        sns.barplot(
+            data=grouped_data, 
+            x='Programming_Language', 
+            y='Number_of_Open_Issues', 
+            hue='Repository_Name', 
+            ax=ax
+        )
+
+        # Customizing the chart
+        ax.set_xlabel('Programming Language', fontsize=12)
+        ax.set_ylabel('Number of Open Issues', fontsize=12)
+        ax.set_title('Number of Open Issues per Repository by Programming Language', fontsize=16)
+        ax.tick_params(axis='x', labelrotation=45)  # Rotate x-axis labels for readability
+
+        # Specify legend location and format
+        ax.legend(title='Repository Name', bbox_to_anchor=(1.05, 1), loc='upper left')  # Legend outside
+
+        # Ensure the plot layout is tight
+        fig.tight_layout()
+
+    # Display in Streamlit (figure size adjusted as needed)
+    st.image(figure_cache.render('exploration_open_issues', filter_state, data_version, draw_open_issues, figsize=(8, 6)), use_column_width=True)
@@ -0,0 +1,97 @@
+# Home page. Imports only Streamlit, so it renders without loading the data
+# or the charting stack.
+import streamlit as st
+
+from github_data_dive import assets
+
+
+def render():
+    st.markdown(
+        """
+        <style>
+        .big-font {
+            font-size:50px !important;
+            font-weight: bold;
+            color: #FF5A5F;
+        }
+        .header-text {
+            font-size:25px !important;
+            font-style: italic;
+        }
+        .description {
+            font-size:18px;
+            text-align: justify;
+        }
+        .button-container {
+            display: flex;
+            justify-content: center;
+            margin-top: 20px;
+        }
+        .button-container a {
+            background-color: #FF5A5F;
+            color: white;
+            padding: 12px 24px;
+            text-decoration: none;
+            border-radius: 6px;
+            font-size: 18px;
+            margin: 10px;
+            font-weight: bold;
+        }
+        </style>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    # Displaying a banner image (Optional: Replace 'home_image.png' with your banner image)
+    st.image(assets.read_bytes("download (3).png"), use_column_width=True)
+
+    # Main Title with large font
+    st.markdown('<p class="big-font">Welcome to GitHub Data Dive 🌐</p>', unsafe_allow_html=True)
+
+    # Subtitle in italic
+    st.markdown('<p class="header-text">Explore Trends, Analyze Repositories, and Discover Insights!</p>', unsafe_allow_html=True)
+
+    # Descriptive text
+    st.markdown(
+        """
+        <p class="description">
+        GitHub Data Dive is your gateway to explore the ever-evolving open-source ecosystem. 
+        This interactive app empowers developers, researchers, and organizations to unlock valuable 
+        insights from GitHub repositories. Dive deep into trends, identify popular technologies, 
+        and make informed decisions about collaboration and learning.
+        </p>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    # Summary of pages with emojis for visual appeal
+    st.markdown(
+        """
+        **🚀 Features at a Glance:**
+        - 🔍 **Data Exploration**: Filter repositories by programming language, stars, and more.
+        - 📊 **Visualizations**: Explore interactive charts to uncover trends and patterns.
+        - 📑 **Conclusion**: Review key insights from the analyzed data.
+
+        """,
+    )
+
+    # Buttons for quick navigation
+    st.markdown(
+        """
+        <div class="button-container">
+            <a href="#data-exploration">Explore Data</a>
+            <a href="#visualizations">View Visualizations</a>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+
+    # Footer text
+    st.markdown(
+        """
+        <p style="text-align: center; margin-top: 50px;">
+        Built with ❤️ by Ponishadevi | Inspiring the Open-Source Future 🌐
+        </p>
+        """,
+        unsafe_allow_html=True,
+    )
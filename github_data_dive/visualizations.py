@@ -0,0 +1,237 @@
+# Visualizations page: the aggregate charts and the lazily rendered sections.
+import streamlit as st
+import seaborn as sns
+import plotly.express as px
+from wordcloud import WordCloud
+
+import data_layer
+import figure_cache
+import filter_engine
+import instrumentation
+import large_charts
+import lazy_sections
+import rollups
+import sketches
+import term_index
+import timeseries
+from github_data_dive import common
+
+
+def render():
+    st.header("Data Visualizations")
+    df = common.load_data()
+    if df is None:
+        return
+
+    # Pre-aggregated (language, license) groups behind the aggregate charts
+    rollup = rollups.get_rollups(df)
+
+    # Selecting visualization type using radio buttons
+    visualization_type = st.radio("Select Visualization Type", ("Bar Chart", "Pie Chart", "Scatter Plot"))
+
+    # Visualization based on selected type
+    if visualization_type == "Bar Chart":
+        # 3. Bar Chart: Total Repositories by Programming Language
+        st.subheader("Total Repositories by Programming Language")
+        language_counts = rollups.counts_by(rollup, 'Programming_Language')
+        st.bar_chart(language_counts)
+
+    elif visualization_type == "Pie Chart":
+        st.subheader("Distribution of Programming Languages")
+        language_counts = rollups.counts_by(rollup, 'Programming_Language')
+        fig_pie = px.pie(language_counts, values=language_counts.values, names=language_counts.index, title='Distribution of Programming Languages')
+        st.plotly_chart(fig_pie, use_container_width=True)
+
+    elif visualization_type == "Scatter Plot":
+            # 2. Scatter Plot: Stars vs. Forks
+        st.subheader("Stars vs. Forks by Programming Language")
+        # WebGL for larger frames, a binned heatmap once the points would flood the browser
+        fig4 = large_charts.stars_vs_forks(df, title="Stars vs. Forks")
+        st.plotly_chart(fig4)
+        if len(df) > large_charts.SCATTER_MAX_POINTS:
+            st.caption("Too many repositories to plot individually; showing counts per (stars, forks) bin.")
+
+        
+
+
+    # Sidebar filters for user input
+    st.sidebar.header("Filter Visualizations")
+    selected_language = st.sidebar.multiselect(
+    "Select Programming Language", 
+    df['Programming_Language'].unique(),
+    help="Choose one or more programming languages to filter the repositories."
+)
+
+    selected_license = st.sidebar.multiselect("Select License Type", df['License_Type'].unique())
+
+    # Per-group day totals built at load time answer every trend chart for
+    # any granularity and date range
+    series = timeseries.get_series(df)
+    granularity = st.sidebar.selectbox("Time Granularity", list(timeseries.FREQUENCIES), index=2)
+    freq = timeseries.FREQUENCIES[granularity]
+    start_date = end_date = None
+    if series.date_range is not None:
+        first_day, last_day = (day.date() for day in series.date_range)
+        start_date, end_date = st.sidebar.slider(
+            "Date Range", min_value=first_day, max_value=last_day, value=(first_day, last_day),
+            help="Limits the charts over time to this period."
+        )
+
+    # Apply filters to the dataframe
+    with instrumentation.timer('visualizations.filter') as span:
+        filtered_data = filter_engine.get_index(df).filter(selected_language, selected_license)
+        span['rows'] = len(filtered_data)
+    filtered_rollup = rollups.filter_rollup(rollup, selected_language, selected_license)
+
+
+    # Subheader with the count of filtered repositories
+    st.subheader(f"Visualizations for Filtered Repositories ({len(filtered_data)} found)")
+
+    # Drop rows with invalid dates (if any)
+    filtered_count = len(filtered_data)
+    filtered_data = filtered_data.dropna(subset=['Days_Since_Last_Update'])
+    # Top-N lists come from the load-time sketches unless rows were dropped above
+    sketch_df = df if len(filtered_data) == filtered_count else None
+
+    # Rendered charts are cached per filter state and data version
+    filter_state = {'languages': selected_language, 'licenses': selected_license}
+    time_state = {'start': start_date, 'end': end_date, 'granularity': granularity}
+    data_version = data_layer.frame_version(df)
+
+    # Each section below is computed in a worker thread and shown as soon as it is ready
+    def show_image(image):
+        st.image(image, use_column_width=True)
+
+    # 1. Histogram: Days Since Last Update
+    def draw_activity(fig1, ax1):
+        days, counts = series.histogram('Days_Since_Last_Update', selected_language, selected_license)
+        large_charts.histogram(ax1, days, bins=30, color='blue', weights=counts)
+
+        # Customize the plot
+        ax1.set_title('Distribution of Days Since Last Update', fontsize=16)
+        ax1.set_xlabel('Days Since Last Update', fontsize=14)
+        ax1.set_ylabel('Frequency', fontsize=14)
+        ax1.grid(True, linestyle='--', alpha=0.7)
+
+    def compute_activity():
+        return figure_cache.render('visual_activity', filter_state, data_version, draw_activity, figsize=(12, 6))
+
+    # 2. Repository Age Chart (as earlier)
+    def draw_age(fig2, ax2):
+        ages, counts = series.histogram('Repository_Age', selected_language, selected_license)
+        large_charts.histogram(ax2, ages, bins=30, color='green', weights=counts)
+        ax2.set_xlabel('Repository Age (Days)')
+        ax2.set_ylabel('Frequency')
+        ax2.set_title('Distribution of Repository Age')
+
+    def compute_age():
+        return figure_cache.render('visual_age', filter_state, data_version, draw_age, figsize=(12, 6))
+
+    # 3. Stars summed by creation period and Programming Language
+    def compute_stars_over_time():
+        return series.series('stars', selected_language, selected_license, start_date, end_date, freq, by='Programming_Language')
+
+    # Plot the multi-line chart using Streamlit
+    def show_stars_over_time(stars_over_time):
+        st.line_chart(stars_over_time)
+
+    # 4. Repositories Last Updated Over Time (Line Chart)
+    def draw_updates(fig8, ax8):
+        update_counts = series.series('updated', selected_language, selected_license, start_date, end_date, freq)
+        # Plotted by matplotlib directly: pandas would switch regular (e.g. daily)
+        # indexes to its period axis
+        ax8.plot(update_counts.index, update_counts.values, color='orange', linestyle='-', marker='o')
+        ax8.set_title('Repositories Last Updated Over Time', fontsize=16)
+        ax8.set_xlabel('Date', fontsize=14)
+        ax8.set_ylabel('Number of Repositories Updated', fontsize=14)
+        ax8.tick_params(axis='x', labelrotation=45)
+        ax8.grid(True)  # Add gridlines for better readability
+
+    def compute_updates():
+        return figure_cache.render('visual_updates', {**filter_state, **time_state}, data_version, draw_updates, figsize=(12, 6))
+
+    # Repositories Created Over Time (Line Chart, all repositories)
+    def draw_creations(fig7, ax7):
+        creation_counts = series.series('created', start=start_date, end=end_date, freq=freq)
+        ax7.plot(creation_counts.index, creation_counts.values)
+        ax7.set_title('Repositories Created Over Time')
+        ax7.set_xlabel('Date')
+        ax7.set_ylabel('Number of Repositories Created')
+        ax7.tick_params(axis='x', labelrotation=45)
+
+    def compute_creations():
+        return figure_cache.render('visual_creations', time_state, data_version, draw_creations, figsize=(12, 6))
+
+    # 5. License Analysis Bar Chart
+    def draw_licenses(fig6, ax6):
+        license_counts = rollups.counts_by(filtered_rollup, 'License_Type')
+        sns.barplot(x=license_counts.index, y=license_counts.values, palette='cubehelix', ax=ax6)
+        ax6.set_xlabel('License Type')
+        ax6.set_ylabel('Number of Repositories')
+        ax6.set_title('Number of Repositories by License Type')
+        ax6.tick_params(axis='x', labelrotation=45)
+
+    def compute_licenses():
+        return figure_cache.render('visual_licenses', filter_state, data_version, draw_licenses, figsize=(12, 6))
+
+    # Word Cloud for Repository Descriptions, from the description index built at load time
+    def compute_wordcloud():
+        frequencies = term_index.get_index(df).frequencies(selected_language, selected_license)
+        if not frequencies:
+            return None
+
+        def draw_wordcloud(fig4, ax4):
+            wordcloud = WordCloud(width=800, height=400, background_color='white').generate_from_frequencies(frequencies)
+            ax4.imshow(wordcloud, interpolation='bilinear')
+            ax4.axis('off')  # Hide axes
+        return figure_cache.render('visual_wordcloud', filter_state, data_version, draw_wordcloud, figsize=(10, 6))
+
+    def show_wordcloud(image):
+        if image is None:
+            st.write("No descriptions available to generate a word cloud.")
+        else:
+            show_image(image)
+
+    # 6. Top 10 Repositories by Stars (Filtered)
+    def draw_top_stars(fig7, ax7):
+        top_stars = sketches.top_rows(sketch_df, filtered_data, 'Number_of_Stars', 10, selected_language, selected_license)[['Repository_Name', 'Number_of_Stars']]
+        sns.barplot(data=top_stars, x='Number_of_Stars', y='Repository_Name', palette='viridis', ax=ax7)
+        ax7.set_title('Top 10 Repositories by Stars')
+        ax7.set_xlabel('Number of Stars')
+        ax7.set_ylabel('Repository Name')
+
+    def compute_top_stars():
+        return figure_cache.render('visual_top_stars', filter_state, data_version, draw_top_stars, figsize=(12, 6))
+
+    # 7. Top 10 Repositories by Forks (Filtered)
+    def draw_top_forks(fig8, ax8):
+        top_forks = sketches.top_rows(sketch_df, filtered_data, 'Number_of_Forks', 10, selected_language, selected_license)[['Repository_Name', 'Number_of_Forks']]
+        sns.barplot(data=top_forks, x='Number_of_Forks', y='Repository_Name', palette='plasma', ax=ax8)
+        ax8.set_title('Top 10 Repositories by Forks')
+        ax8.set_xlabel('Number of Forks')
+        ax8.set_ylabel('Repository Name')
+
+    def compute_top_forks():
+        return figure_cache.render('visual_top_forks', filter_state, data_version, draw_top_forks, figsize=(12, 6))
+
+    sections = [
+        lazy_sections.Section("Activity Analysis: Days Since Last Update", compute_activity, show_image),
+        lazy_sections.Section("Repository Age Distribution", compute_age, show_image),
+        lazy_sections.Section("Trend of Programming Language Popularity Over Time (Stars)", compute_stars_over_time, show_stars_over_time),
+        lazy_sections.Section("Repositories Last Updated Over Time", compute_updates, show_image),
+        lazy_sections.Section("Repositories Created Over Time", compute_creations, show_image),
+        lazy_sections.Section("Number of Repositories by License Type", compute_licenses, show_image),
+        lazy_sections.Section("Word Cloud of Repository Descriptions", compute_wordcloud, show_wordcloud),
+        lazy_sections.Section("Top 10 Repositories by Stars", compute_top_stars, show_image),
+        lazy_sections.Section("Top 10 Repositories by Forks", compute_top_forks, show_image),
+    ]
+
+    # Only the selected sections are computed
+    section_titles = [section.title for section in sections]
+    selected_sections = st.sidebar.multiselect(
+        "Sections to Show",
+        section_titles,
+        default=section_titles,
+        help="Deselect charts you don't need; they won't be computed."
+    )
+    lazy_sections.render_sections(sections, selected_sections)
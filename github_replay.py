@@ -0,0 +1,78 @@
+# Local stand-in for the GitHub API that replays responses recorded with
+# `python ingest.py --record DIR`.
+#
+# Run it with:  python github_replay.py DIR --port 8765
+# and ingest against it with:  python ingest.py --base-url http://127.0.0.1:8765
+# Requests carrying the recorded ETag in If-None-Match get a 304, like GitHub.
+# Several recordings of one path are replayed in file-name order, the last one
+# repeating, e.g. a rate-limited response followed by the page itself.
+import argparse
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def load_recordings(directory):
+    recordings = {}
+    for name in sorted(os.listdir(directory)):
+        if name.endswith('.json'):
+            with open(os.path.join(directory, name)) as f:
+                recording = json.load(f)
+            recordings.setdefault(recording['path'], []).append(recording)
+    return recordings
+
+
+def make_handler(recordings):
+    served = {}
+    lock = threading.Lock()
+
+    class ReplayHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            sequence = recordings.get(self.path)
+            if sequence is None:
+                self._reply(404, {}, json.dumps({'message': 'Not Found'}))
+                return
+            with lock:
+                position = served.get(self.path, 0)
+                served[self.path] = position + 1
+            recording = sequence[min(position, len(sequence) - 1)]
+            headers = recording.get('headers', {})
+            etag = headers.get('ETag')
+            if etag and self.headers.get('If-None-Match') == etag:
+                self._reply(304, {'ETag': etag}, '')
+                return
+            self._reply(recording['status'], headers, recording['body'])
+
+        def _reply(self, status, headers, body):
+            payload = body.encode('utf-8')
+            self.send_response(status)
+            for key, value in headers.items():
+                if key.lower() not in ('content-length', 'transfer-encoding', 'connection', 'content-encoding'):
+                    self.send_header(key, value)
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+
+        def log_message(self, format, *args):
+            pass
+
+    return ReplayHandler
+
+
+# Start a replay server in a background thread; returns (server, base_url)
+def start_server(directory, port=0):
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(load_recordings(directory)))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Replay recorded GitHub API responses.")
+    parser.add_argument('directory', help="Directory written by `python ingest.py --record`.")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(('127.0.0.1', args.port), make_handler(load_recordings(args.directory)))
+    print(f"Replaying {args.directory} on http://127.0.0.1:{args.port}")
+    server.serve_forever()
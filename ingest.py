@@ -0,0 +1,351 @@
+# Incremental GitHub API ingestion into the repositories table.
+#
+# Pages through the search API with a bounded number of concurrent requests,
+# backs off on rate limits and server errors, sends If-None-Match with the
+# ETag of the previous response so unchanged pages cost nothing, and only asks
+# for repositories pushed since the last run. The search API stops at 1000
+# results per query, so larger result sets are split into `pushed:` date
+# windows that each fit under the cap, and a query's cursor only moves past a
+# window once it (and every earlier one) has been fetched completely. Rows are
+# bulk-upserted in batches and the rollup table is maintained in the same
+# transaction.
+#
+# Run it with:  python ingest.py --query "topic:machine-learning"
+# Point --base-url at github_replay.py to run against recorded responses.
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import os
+import time
+import urllib.error
+import urllib.parse
+import urllib.request
+from datetime import datetime, timedelta, timezone
+
+import pandas as pd
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, MetaData, String, Table, Text, select
+from sqlalchemy.dialects import mysql, sqlite
+
+import data_layer
+import rollups
+
+GITHUB_API_URL = os.environ.get('GITHUB_API_URL', 'https://api.github.com')
+GITHUB_TOKEN = os.environ.get('GITHUB_TOKEN')
+STATE_PATH = os.environ.get('GDD_INGEST_STATE', 'ingest_state.json')
+
+# Topics fetched when no --query is given
+DEFAULT_QUERIES = ['topic:machine-learning', 'topic:data-visualization', 'topic:web-development']
+
+PER_PAGE = 100
+# The search API never returns more than 1000 results per query
+MAX_PAGES = 10
+MAX_RESULTS = PER_PAGE * MAX_PAGES
+# No repository was pushed before this; the lower end of a first run's windows
+EARLIEST_PUSH = datetime(2007, 10, 1)
+TIME_FORMAT = '%Y-%m-%dT%H:%M:%SZ'
+CONCURRENCY = 4
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+# Never sleep longer than this for a rate-limit reset
+MAX_RATE_LIMIT_WAIT = 900
+REQUEST_TIMEOUT = 30
+BATCH_SIZE = 500
+
+metadata = MetaData()
+
+# Schema of the table load_data() reads
+repositories = Table(
+    data_layer.TABLE_NAME, metadata,
+    Column('id', BigInteger, primary_key=True, autoincrement=False),
+    Column('Repository_Name', String(255)),
+    Column('Owner', String(255)),
+    Column('Description', Text),
+    Column('URL', String(500)),
+    Column('Programming_Language', String(100)),
+    Column('Creation_Date', DateTime),
+    Column('Last_Updated_Date', DateTime),
+    Column('Number_of_Stars', Integer),
+    Column('Number_of_Forks', Integer),
+    Column('Number_of_Open_Issues', Integer),
+    Column('License_Type', String(100)),
+    # Keyset order of the data layer's delta loads
+    Index('ix_repositories_updated', 'Last_Updated_Date', 'id'),
+)
+ROW_COLUMNS = [column.name for column in repositories.columns]
+
+
+def create_schema(engine=None):
+    metadata.create_all(engine or data_layer.get_engine())
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    return datetime.strptime(value, TIME_FORMAT)
+
+
+# Map one search API item onto a repositories row
+def repository_row(item):
+    license_info = item.get('license') or {}
+    return {
+        'id': item['id'],
+        'Repository_Name': item.get('name'),
+        'Owner': (item.get('owner') or {}).get('login'),
+        'Description': item.get('description'),
+        'URL': item.get('html_url'),
+        'Programming_Language': item.get('language'),
+        'Creation_Date': _parse_time(item.get('created_at')),
+        'Last_Updated_Date': _parse_time(item.get('updated_at')),
+        'Number_of_Stars': item.get('stargazers_count', 0),
+        'Number_of_Forks': item.get('forks_count', 0),
+        'Number_of_Open_Issues': item.get('open_issues_count', 0),
+        'License_Type': license_info.get('spdx_id') or license_info.get('name'),
+    }
+
+
+def load_state(path=STATE_PATH):
+    if not os.path.exists(path):
+        return {'cursors': {}, 'etags': {}}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_state(state, path=STATE_PATH):
+    temp_path = path + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+    os.replace(temp_path, path)
+
+
+class GitHubClient:
+    def __init__(self, base_url=GITHUB_API_URL, token=GITHUB_TOKEN, etags=None,
+                 concurrency=CONCURRENCY, record_dir=None):
+        self.base_url = base_url.rstrip('/')
+        self.token = token
+        self.etags = etags if etags is not None else {}
+        # Paths requested by this client; only their ETags are worth keeping
+        self.requested = set()
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.record_dir = record_dir
+        # Shared by all requests, so one rate-limited response pauses every worker
+        self.paused_until = 0.0
+        self.stats = {'requests': 0, 'not_modified': 0, 'retries': 0, 'rate_limited': 0}
+
+    def _headers(self, path):
+        headers = {'Accept': 'application/vnd.github+json', 'User-Agent': 'github-data-dive'}
+        if self.token:
+            headers['Authorization'] = f"Bearer {self.token}"
+        if path in self.etags:
+            headers['If-None-Match'] = self.etags[path]
+        return headers
+
+    def _send(self, url, headers):
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=REQUEST_TIMEOUT) as response:
+                return response.status, dict(response.headers), response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, dict(e.headers), e.read()
+
+    def _record(self, path, status, headers, body):
+        name = hashlib.sha1(path.encode()).hexdigest() + '.json'
+        with open(os.path.join(self.record_dir, name), 'w') as f:
+            json.dump({'path': path, 'status': status, 'headers': headers,
+                       'body': body.decode('utf-8', errors='replace')}, f, indent=2)
+
+    # Seconds to wait before retrying a rate-limited or failed response
+    def _retry_delay(self, status, headers, attempt):
+        retry_after = headers.get('Retry-After')
+        if retry_after:
+            return min(float(retry_after), MAX_RATE_LIMIT_WAIT)
+        if status in (403, 429) and headers.get('X-RateLimit-Remaining') == '0':
+            reset = float(headers.get('X-RateLimit-Reset', time.time()))
+            return min(max(reset - time.time(), 0) + 1, MAX_RATE_LIMIT_WAIT)
+        return BACKOFF_BASE * 2 ** attempt
+
+    # GET a path; returns (status, parsed body or None when not modified)
+    async def get(self, path):
+        self.requested.add(path)
+        for attempt in range(MAX_RETRIES + 1):
+            async with self.semaphore:
+                wait = self.paused_until - time.time()
+                if wait > 0:
+                    await asyncio.sleep(wait)
+                self.stats['requests'] += 1
+                try:
+                    status, headers, body = await asyncio.to_thread(
+                        self._send, self.base_url + path, self._headers(path))
+                except OSError:
+                    status, headers, body = None, {}, b''
+
+            if self.record_dir and status is not None:
+                self._record(path, status, headers, body)
+            if status == 304:
+                self.stats['not_modified'] += 1
+                return status, None
+            if status == 200:
+                if headers.get('ETag'):
+                    self.etags[path] = headers['ETag']
+                return status, json.loads(body)
+            if status is not None and status not in (403, 429) and status < 500:
+                raise RuntimeError(f"GitHub API returned {status} for {path}: {body[:200]!r}")
+
+            delay = self._retry_delay(status, headers, attempt)
+            if status in (403, 429):
+                self.stats['rate_limited'] += 1
+                self.paused_until = max(self.paused_until, time.time() + delay)
+            self.stats['retries'] += 1
+            await asyncio.sleep(delay)
+        raise RuntimeError(f"Giving up on {path} after {MAX_RETRIES} retries")
+
+    def search_path(self, query, page):
+        params = {'q': query, 'sort': 'updated', 'order': 'desc', 'per_page': PER_PAGE, 'page': page}
+        return '/search/repositories?' + urllib.parse.urlencode(params)
+
+
+# The query limited to repositories pushed after `after` (exclusive) up to
+# `until` (inclusive); None leaves that end open
+def window_query(query, after=None, until=None):
+    if until is None:
+        return f"{query} pushed:>{after.strftime(TIME_FORMAT)}" if after else query
+    since = (after or EARLIEST_PUSH) + timedelta(seconds=1)
+    return f"{query} pushed:{since.strftime(TIME_FORMAT)}..{until.strftime(TIME_FORMAT)}"
+
+
+# Fetch every page of one window, splitting it in two while it holds more
+# results than the search API returns. Returns (until, items, complete) per
+# window in push order; a window is incomplete when even one second of pushes
+# is over the cap.
+async def fetch_window(client, query, after, until, now):
+    search = window_query(query, after, until)
+    status, first = await client.get(client.search_path(search, 1))
+    if first is None:
+        # First page unchanged since the last run, so nothing new was pushed
+        return [(until, [], True)]
+
+    total = first.get('total_count', 0)
+    low, high = after or EARLIEST_PUSH, until or now
+    if total > MAX_RESULTS and high - low > timedelta(seconds=1):
+        middle = (low + (high - low) // 2).replace(microsecond=0)
+        halves = await asyncio.gather(
+            fetch_window(client, query, after, middle, now),
+            fetch_window(client, query, middle, until, now),
+        )
+        return halves[0] + halves[1]
+
+    pages = min(math.ceil(total / PER_PAGE), MAX_PAGES)
+    rest = await asyncio.gather(*(client.get(client.search_path(search, page)) for page in range(2, pages + 1)))
+    items = list(first.get('items', []))
+    for _, data in rest:
+        if data is not None:
+            items.extend(data.get('items', []))
+    return [(until, items, total <= MAX_RESULTS)]
+
+
+# Fetch every window of one search query changed since the cursor
+async def fetch_query(client, query, cursor=None, now=None):
+    now = now or datetime.now(timezone.utc).replace(tzinfo=None, microsecond=0)
+    return await fetch_window(client, query, _parse_time(cursor), None, now)
+
+
+# The cursor after fetching `windows` (see fetch_window): the end of the last
+# window reached without a gap, or the latest push seen in the open-ended one
+def advance_cursor(cursor, windows):
+    for until, items, complete in windows:
+        if not complete:
+            break
+        if until is not None:
+            cursor = max(cursor or '', until.strftime(TIME_FORMAT))
+        else:
+            pushed = [item['pushed_at'] for item in items if item.get('pushed_at')]
+            cursor = max([cursor or ''] + pushed) or None
+    return cursor
+
+
+def _upsert_statement(engine, rows):
+    if engine.dialect.name == 'sqlite':
+        statement = sqlite.insert(repositories).values(rows)
+        changed = {column: statement.excluded[column] for column in ROW_COLUMNS if column != 'id'}
+        return statement.on_conflict_do_update(index_elements=['id'], set_=changed)
+    # INSERT ... ON DUPLICATE KEY UPDATE
+    statement = mysql.insert(repositories).values(rows)
+    changed = {column: statement.inserted[column] for column in ROW_COLUMNS if column != 'id'}
+    return statement.on_duplicate_key_update(**changed)
+
+
+# Bulk-upsert rows in batches, keeping the rollup table in step
+def upsert_rows(engine, rows, batch_size=BATCH_SIZE):
+    maintain_rollup = rollups.rollup_table_exists(engine)
+    written = 0
+    for start in range(0, len(rows), batch_size):
+        batch = rows[start:start + batch_size]
+        with engine.begin() as conn:
+            if maintain_rollup:
+                ids = [row['id'] for row in batch]
+                grouped = [repositories.c[column] for column in rollups.GROUP_COLUMNS]
+                old_rows = pd.read_sql(select(*grouped).where(repositories.c.id.in_(ids)), conn)
+            conn.execute(_upsert_statement(engine, batch))
+            if maintain_rollup:
+                rollups.apply_changes(conn, old_rows, pd.DataFrame(batch, columns=ROW_COLUMNS))
+        written += len(batch)
+    return written
+
+
+async def _fetch_all(client, queries, cursors):
+    return await asyncio.gather(*(fetch_query(client, query, cursors.get(query)) for query in queries))
+
+
+# Run one incremental ingestion pass; returns a summary of what happened
+def run_ingest(queries=DEFAULT_QUERIES, engine=None, state_path=STATE_PATH, base_url=GITHUB_API_URL,
+               token=GITHUB_TOKEN, concurrency=CONCURRENCY, record_dir=None):
+    engine = engine or data_layer.get_engine()
+    create_schema(engine)
+    state = load_state(state_path)
+
+    async def fetch():
+        client = GitHubClient(base_url, token, state['etags'], concurrency, record_dir)
+        results = await _fetch_all(client, queries, state['cursors'])
+        return client, results
+
+    start = time.perf_counter()
+    client, results = asyncio.run(fetch())
+
+    rows = {}
+    incomplete = 0
+    for query, windows in zip(queries, results):
+        cursor = advance_cursor(state['cursors'].get(query), windows)
+        if cursor:
+            state['cursors'][query] = cursor
+        for _, items, complete in windows:
+            incomplete += not complete
+            for item in items:
+                rows[item['id']] = repository_row(item)
+
+    written = upsert_rows(engine, list(rows.values()))
+    # Window queries change between runs (moving cursor, split points), so the
+    # ETags of paths this run didn't request would only pile up
+    state['etags'] = {path: etag for path, etag in client.etags.items() if path in client.requested}
+    save_state(state, state_path)
+    data_layer.invalidate()
+
+    summary = dict(client.stats)
+    summary.update(rows_upserted=written, incomplete_windows=incomplete, seconds=round(time.perf_counter() - start, 3))
+    return summary
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Incrementally ingest GitHub repositories into the database.")
+    parser.add_argument('--query', action='append', help="Search query (repeatable); defaults to the README topics.")
+    parser.add_argument('--base-url', default=GITHUB_API_URL, help="GitHub API root, e.g. a github_replay.py stub.")
+    parser.add_argument('--state', default=STATE_PATH, help="File holding the cursors and ETags between runs.")
+    parser.add_argument('--concurrency', type=int, default=CONCURRENCY)
+    parser.add_argument('--record', metavar='DIR', help="Save every response to DIR for later replay.")
+    args = parser.parse_args()
+
+    if args.record:
+        os.makedirs(args.record, exist_ok=True)
+    summary = run_ingest(args.query or DEFAULT_QUERIES, state_path=args.state, base_url=args.base_url,
+                         concurrency=args.concurrency, record_dir=args.record)
+    print(json.dumps(summary, indent=2))
@@ -0,0 +1,282 @@
+# Timers, query timings and on-demand profiling for the dashboard.
+#
+# Every page section and data step runs inside a named timer. Timings are
+# aggregated per name for the whole process (count, sum, max and histogram
+# buckets) and also collected for the current rerun, together with every SQL
+# statement the rerun executed (duration and row count). The aggregates are
+# written in the Prometheus text format to GDD_METRICS_FILE and/or the log;
+# the per-rerun view is shown in the debug panel opened with ?debug=<key>. A
+# single rerun can be captured with cProfile (worker threads included) and
+# saved as a .pstats file for snakeviz, pstats or speedscope.
+import contextvars
+import cProfile
+import logging
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+logger = logging.getLogger('github_data_dive')
+
+# Upper bounds (seconds) of the histogram buckets
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# The debug panel is shown when the page is opened with ?debug=<DEBUG_KEY>;
+# it stays off unless a key of at least MIN_DEBUG_KEY_LENGTH characters is set
+DEBUG_KEY = os.environ.get('GDD_DEBUG_KEY', '')
+MIN_DEBUG_KEY_LENGTH = 16
+# Metrics are written at most once per METRICS_INTERVAL seconds
+METRICS_FILE = os.environ.get('GDD_METRICS_FILE')
+METRICS_LOG = os.environ.get('GDD_METRICS_LOG', '0') == '1'
+METRICS_INTERVAL = float(os.environ.get('GDD_METRICS_INTERVAL', 15))
+PROFILE_DIR = os.environ.get('GDD_PROFILE_DIR', 'profiles')
+# Statements longer than this are truncated in the per-rerun query log
+STATEMENT_CHARS = 200
+# Before 3.12 cProfile only sees the thread that enabled it, so worker threads
+# get profilers of their own. From 3.12 it hooks sys.monitoring, which covers
+# every thread and admits a single profiler at a time.
+THREAD_PROFILERS = sys.version_info < (3, 12)
+
+_lock = threading.Lock()
+_timers = {}
+_queries = {}
+_collectors = {}
+_written = {'at': 0.0}
+
+
+class Rerun:
+    def __init__(self, profile=False):
+        # Set by the script once the menu selection is known
+        self.page = None
+        self.started = time.perf_counter()
+        self.seconds = None
+        self.spans = []
+        self.queries = []
+        self.profiles = []
+        self.profile_path = None
+        self.profiling = profile
+        self._lock = threading.Lock()
+
+    def add(self, kind, record):
+        with self._lock:
+            (self.spans if kind == 'span' else self.queries).append(record)
+
+
+_current = contextvars.ContextVar('gdd_rerun', default=None)
+
+
+def _new_stats():
+    return {'count': 0, 'sum': 0.0, 'max': 0.0, 'rows': 0, 'buckets': [0] * len(BUCKETS)}
+
+
+def _observe(table, name, seconds, rows=None):
+    with _lock:
+        stats = table.setdefault(name, _new_stats())
+        stats['count'] += 1
+        stats['sum'] += seconds
+        stats['max'] = max(stats['max'], seconds)
+        if rows is not None:
+            stats['rows'] += rows
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                stats['buckets'][i] += 1
+
+
+# Time the block under `name`; the yielded dict can carry a row count
+# (span['rows'] = n) or any other detail shown in the debug panel
+@contextmanager
+def timer(name):
+    span = {'name': name, 'thread': threading.current_thread().name}
+    start = time.perf_counter()
+    try:
+        yield span
+    finally:
+        span['seconds'] = time.perf_counter() - start
+        _observe(_timers, name, span['seconds'], span.get('rows'))
+        rerun = _current.get()
+        if rerun is not None:
+            span['offset'] = start - rerun.started
+            rerun.add('span', span)
+
+
+def current_rerun():
+    return _current.get()
+
+
+def begin_rerun(profile=False):
+    rerun = Rerun(profile)
+    _current.set(rerun)
+    if profile:
+        _start_profile(rerun)
+    return rerun
+
+
+# Close the rerun: record its total time, save the profile if one was
+# requested and write the metrics if they are due
+def end_rerun(rerun):
+    if rerun.profiling:
+        _stop_profile(rerun)
+    rerun.seconds = time.perf_counter() - rerun.started
+    _observe(_timers, f'rerun.{rerun.page}', rerun.seconds)
+    write_metrics()
+    return rerun
+
+
+def _start_profile(rerun):
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler is active (e.g. another session's rerun on 3.12+)
+        logger.warning("Not profiling this rerun: another profiler is active")
+        rerun.profiling = False
+        return
+    rerun.profiles.append(profile)
+
+
+def _stop_profile(rerun):
+    rerun.profiles[0].disable()
+    stats = pstats.Stats(rerun.profiles[0])
+    for profile in rerun.profiles[1:]:
+        stats.add(profile)
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    rerun.profile_path = os.path.join(PROFILE_DIR, f"rerun-{time.strftime('%Y%m%d-%H%M%S')}-{os.getpid()}.pstats")
+    stats.dump_stats(rerun.profile_path)
+    rerun.profiling = False
+
+
+# Wrap fn for a worker thread: it runs timed under `name`, attached to the
+# submitting rerun and, when that rerun is profiled, under its own profiler
+# (see THREAD_PROFILERS)
+def bind(name, fn):
+    rerun = _current.get()
+
+    def run():
+        token = _current.set(rerun)
+        profile = None
+        if rerun is not None and rerun.profiling and THREAD_PROFILERS:
+            profile = cProfile.Profile()
+            with rerun._lock:
+                rerun.profiles.append(profile)
+            profile.enable()
+        try:
+            with timer(name):
+                return fn()
+        finally:
+            if profile is not None:
+                profile.disable()
+            _current.reset(token)
+    return run
+
+
+# Time every statement executed through the engine, with its row count
+def instrument_engine(engine):
+    from sqlalchemy import event
+
+    if event.contains(engine, 'before_cursor_execute', _before_execute):
+        return
+
+    event.listen(engine, 'before_cursor_execute', _before_execute)
+    event.listen(engine, 'after_cursor_execute', _after_execute)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('gdd_query_start', []).append(time.perf_counter())
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    seconds = time.perf_counter() - conn.info['gdd_query_start'].pop()
+    # -1 when the driver doesn't know yet (e.g. SELECTs before fetching)
+    rows = cursor.rowcount if cursor.rowcount >= 0 else None
+    kind = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else 'OTHER'
+    _observe(_queries, kind, seconds, rows)
+    rerun = _current.get()
+    if rerun is not None:
+        rerun.add('query', {
+            'statement': ' '.join(statement.split())[:STATEMENT_CHARS],
+            'seconds': seconds,
+            'rows': rows,
+        })
+
+
+# Modules report their own counters (cache hits, loads, ...) through a
+# collector returning a flat dict of numbers
+def register_collector(name, collect):
+    with _lock:
+        _collectors[name] = collect
+
+
+def get_timers():
+    with _lock:
+        return {name: dict(stats, buckets=list(stats['buckets'])) for name, stats in _timers.items()}
+
+
+def get_queries():
+    with _lock:
+        return {name: dict(stats, buckets=list(stats['buckets'])) for name, stats in _queries.items()}
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', ' ')
+
+
+def _histogram(lines, metric, label, table):
+    lines.append(f'# TYPE {metric} histogram')
+    for name, stats in sorted(table.items()):
+        # _observe already counts every bucket at or above the value
+        for bound, count in zip(BUCKETS, stats['buckets']):
+            lines.append(f'{metric}_bucket{{{label}="{_label(name)}",le="{bound}"}} {count}')
+        lines.append(f'{metric}_bucket{{{label}="{_label(name)}",le="+Inf"}} {stats["count"]}')
+        lines.append(f'{metric}_sum{{{label}="{_label(name)}"}} {stats["sum"]:.6f}')
+        lines.append(f'{metric}_count{{{label}="{_label(name)}"}} {stats["count"]}')
+
+
+# All timers, query timings and collector values in the Prometheus text format
+def prometheus_text():
+    lines = []
+    _histogram(lines, 'gdd_step_seconds', 'step', get_timers())
+    _histogram(lines, 'gdd_query_seconds', 'statement', get_queries())
+    lines.append('# TYPE gdd_query_rows_total counter')
+    for name, stats in sorted(get_queries().items()):
+        lines.append(f'gdd_query_rows_total{{statement="{_label(name)}"}} {stats["rows"]}')
+
+    with _lock:
+        collectors = dict(_collectors)
+    for prefix, collect in sorted(collectors.items()):
+        try:
+            values = collect()
+        except Exception:
+            logger.exception("Metrics collector %s failed", prefix)
+            continue
+        for key, value in sorted(values.items()):
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                metric = re.sub(r'[^a-zA-Z0-9_]', '_', f'gdd_{prefix}_{key}')
+                lines.append(f'# TYPE {metric} gauge')
+                lines.append(f'{metric} {value}')
+    return '\n'.join(lines) + '\n'
+
+
+# Write the metrics to METRICS_FILE (atomically, for a textfile collector or
+# static serving) and/or the log, at most once per METRICS_INTERVAL
+def write_metrics(force=False):
+    if not METRICS_FILE and not METRICS_LOG:
+        return
+    with _lock:
+        now = time.monotonic()
+        if not force and now - _written['at'] < METRICS_INTERVAL:
+            return
+        _written['at'] = now
+
+    text = prometheus_text()
+    if METRICS_FILE:
+        directory = os.path.dirname(METRICS_FILE)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        temporary = f'{METRICS_FILE}.{os.getpid()}.tmp'
+        with open(temporary, 'w') as f:
+            f.write(text)
+        os.replace(temporary, METRICS_FILE)
+    if METRICS_LOG:
+        logger.info("metrics\n%s", text)
@@ -0,0 +1,120 @@
+# Chart building blocks whose cost doesn't grow with the table.
+#
+# Histograms are drawn from counts binned with numpy (log-spaced bins for
+# heavy-tailed columns such as stars) and their KDE curve is a binned
+# approximation: the values are counted on a fine grid once and the grid is
+# smoothed with a Gaussian kernel, instead of evaluating a kernel per row.
+# The Stars vs. Forks scatter uses WebGL above WEBGL_ROWS points and, above
+# SCATTER_MAX_POINTS, becomes a server-side 2D-binned heatmap, so the browser
+# payload is bounded by the number of bins rather than the number of rows.
+import os
+
+import numpy as np
+
+WEBGL_ROWS = int(os.environ.get('GDD_SCATTER_WEBGL_ROWS', 5000))
+SCATTER_MAX_POINTS = int(os.environ.get('GDD_SCATTER_MAX_POINTS', 50000))
+SCATTER_BINS = 80
+KDE_GRID = 512
+
+
+def _finite(values):
+    values = np.asarray(values, dtype=float)
+    return values[np.isfinite(values)]
+
+
+def _edges(values, bins):
+    low, high = values.min(), values.max()
+    if low == high:
+        low, high = low - 0.5, high + 0.5
+    return np.linspace(low, high, bins + 1)
+
+
+# Counts of the values (each counted `weights` times, if given) on a fine
+# grid smoothed with a Gaussian kernel whose bandwidth follows Scott's rule
+# (at least min_bandwidth); returns the grid and the density on it
+def binned_kde(values, grid_size=KDE_GRID, min_bandwidth=0.0, weights=None):
+    edges = _edges(values, grid_size)
+    counts, _ = np.histogram(values, edges, weights=weights)
+    step = edges[1] - edges[0]
+    centers = edges[:-1] + step / 2
+
+    total = len(values) if weights is None else weights.sum()
+    std = values.std() if weights is None else np.sqrt(np.average((values - np.average(values, weights=weights)) ** 2, weights=weights))
+    bandwidth = max(std * total ** (-1 / 5), min_bandwidth)
+    if not bandwidth > 0:
+        return centers, counts / (total * step)
+    # Pad the grid so the tails aren't cut off at the data range
+    radius = int(np.ceil(4 * bandwidth / step))
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (offsets * step / bandwidth) ** 2)
+    kernel /= kernel.sum()
+    padded = np.concatenate([np.zeros(radius), counts, np.zeros(radius)])
+    density = np.convolve(padded, kernel, mode='same') / (total * step)
+    grid = np.concatenate([centers[0] - step * np.arange(radius, 0, -1), centers, centers[-1] + step * np.arange(1, radius + 1)])
+    return grid, density
+
+
+# Histogram (and KDE curve) of a column drawn from pre-binned counts; with
+# log=True the bins are evenly spaced in log(1 + value). Already counted data
+# can be passed as distinct values and their counts (weights).
+def histogram(ax, values, bins=30, log=False, kde=True, color=None, weights=None):
+    if weights is None:
+        values = _finite(values)
+        total = len(values)
+    else:
+        values, weights = np.asarray(values, dtype=float), np.asarray(weights, dtype=float)
+        keep = np.isfinite(values) & (weights > 0)
+        values, weights = values[keep], weights[keep]
+        total = weights.sum()
+    if not len(values):
+        return
+    transformed = np.log1p(np.clip(values, 0, None)) if log else values
+    edges = _edges(transformed, bins)
+    counts, _ = np.histogram(transformed, edges, weights=weights)
+    bar_edges = np.expm1(edges) if log else edges
+    ax.bar(bar_edges[:-1], counts, width=np.diff(bar_edges), align='edge', color=color, alpha=0.5, edgecolor='white', linewidth=0.5)
+
+    if kde and total > 1:
+        # Integer counts are discrete in log space; a bandwidth of at least
+        # one bin keeps the curve from ringing between them
+        grid, density = binned_kde(transformed, min_bandwidth=(edges[1] - edges[0]) if log else 0.0, weights=weights)
+        # Scaled to counts per bin, as seaborn's histplot(kde=True) does
+        curve = density * total * (edges[1] - edges[0])
+        ax.plot(np.expm1(grid) if log else grid, curve, color=color)
+        ax.set_xlim(bar_edges[0], bar_edges[-1])
+    if log:
+        ax.set_xscale('symlog', linthresh=1)
+
+
+# Stars vs. Forks: plain scatter for small frames, WebGL for medium ones and
+# a binned heatmap (log-spaced bins on both axes) beyond SCATTER_MAX_POINTS
+def stars_vs_forks(df, title="Stars vs. Forks"):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    if len(df) <= SCATTER_MAX_POINTS:
+        render_mode = 'webgl' if len(df) > WEBGL_ROWS else 'svg'
+        return px.scatter(df, x='Number_of_Stars', y='Number_of_Forks',
+                          color='Programming_Language', title=title, render_mode=render_mode)
+
+    stars = df['Number_of_Stars'].to_numpy(dtype=float, na_value=np.nan)
+    forks = df['Number_of_Forks'].to_numpy(dtype=float, na_value=np.nan)
+    present = np.isfinite(stars) & np.isfinite(forks)
+    x, y = np.log1p(stars[present]), np.log1p(forks[present])
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=[_edges(x, SCATTER_BINS), _edges(y, SCATTER_BINS)])
+    # Bin centers back in stars/forks for the axes and hover labels
+    x_centers = np.expm1((x_edges[:-1] + x_edges[1:]) / 2)
+    y_centers = np.expm1((y_edges[:-1] + y_edges[1:]) / 2)
+    z = np.where(counts.T > 0, np.log10(np.maximum(counts.T, 1)), np.nan)
+
+    fig = go.Figure(go.Heatmap(
+        x=x_centers, y=y_centers, z=z, customdata=counts.T,
+        colorscale='Viridis', colorbar={'title': 'log10(repos)'},
+        hovertemplate='Stars ≈ %{x:,.0f}<br>Forks ≈ %{y:,.0f}<br>Repositories: %{customdata:,}<extra></extra>',
+    ))
+    fig.update_layout(
+        title=f"{title} ({present.sum():,} repositories, binned)",
+        xaxis={'title': 'Number_of_Stars', 'type': 'log'},
+        yaxis={'title': 'Number_of_Forks', 'type': 'log'},
+    )
+    return fig
@@ -0,0 +1,47 @@
+# Independently rendered page sections.
+#
+# Every section gets its own placeholder up front; the expensive part
+# (aggregating and drawing the chart) runs in a shared worker pool and each
+# placeholder is filled as soon as its own section finishes, so one slow chart
+# no longer holds back the rest of the page. Only the selected sections are
+# computed at all.
+import os
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import streamlit as st
+
+import instrumentation
+
+WORKERS = int(os.environ.get('GDD_SECTION_WORKERS', 4))
+
+# compute() runs in a worker thread and must not call Streamlit;
+# show(value) runs on the script thread inside the section's placeholder
+Section = namedtuple('Section', ['title', 'compute', 'show'])
+
+# Shared by every session of the process
+_executor = ThreadPoolExecutor(max_workers=WORKERS, thread_name_prefix='gdd-section')
+
+
+def render_sections(sections, selected_titles):
+    placeholders = {}
+    futures = {}
+    for section in sections:
+        if section.title not in selected_titles:
+            continue
+        st.subheader(section.title)
+        placeholders[section.title] = st.empty()
+        placeholders[section.title].caption("Rendering…")
+        futures[_executor.submit(instrumentation.bind(f'section:{section.title}', section.compute))] = section
+
+    # Fill the placeholders in completion order, not page order
+    for future in as_completed(futures):
+        section = futures[future]
+        placeholder = placeholders[section.title]
+        try:
+            value = future.result()
+        except Exception as e:
+            placeholder.error(f"Could not render {section.title}: {e}")
+            continue
+        with instrumentation.timer(f'section.show:{section.title}'), placeholder.container():
+            section.show(value)
@@ -0,0 +1,407 @@
+# SQL pushdown for the Data Exploration filters.
+#
+# Instead of loading the whole repositories table and filtering it in pandas,
+# the sidebar selections are turned into a parameterized WHERE clause: the page
+# fetches only the most-starred rows it displays, and its counts, totals,
+# distributions and open-issue sums come from aggregate queries over all the
+# matching rows. In snapshot mode the same filters become a predicate pushed
+# into the columnar scan. Small tables keep using the in-memory path in
+# github_data_dive/exploration.py, filtered by filter_engine.py.
+import argparse
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import bindparam, inspect, text
+from sqlalchemy.types import Text
+
+import data_layer
+import frame_schema
+import instrumentation
+import rollups
+import sketches
+import term_index
+
+# Columns the Data Exploration page actually uses (table, charts, summaries)
+EXPLORATION_COLUMNS = [
+    'Repository_Name',
+    'Programming_Language',
+    'License_Type',
+    'Number_of_Stars',
+    'Number_of_Forks',
+    'Number_of_Open_Issues',
+    'Description',
+]
+
+# Rows fetched for the filtered table, most-starred first
+DISPLAY_ROWS = int(os.environ.get('GDD_DISPLAY_ROWS', 1000))
+# Repositories in the open-issues chart
+TOP_REPOSITORIES = 10
+# Columns summarized in pandas when the rows have to be read (snapshot mode,
+# keyword searches)
+SUMMARY_COLUMNS = ['Repository_Name', 'Programming_Language', 'License_Type',
+                   'Number_of_Stars', 'Number_of_Forks', 'Number_of_Open_Issues']
+TOTAL_COLUMNS = ['Number_of_Stars', 'Number_of_Forks']
+# Columns whose value distribution is returned (histogram and percentiles)
+DISTRIBUTION_COLUMNS = ['Number_of_Stars', 'Number_of_Forks']
+
+# 'auto' pushes filters into SQL once the table is larger than
+# IN_MEMORY_ROW_LIMIT rows; 'sql' and 'memory' force one path
+QUERY_MODE = os.environ.get('GDD_QUERY_MODE', 'auto')
+IN_MEMORY_ROW_LIMIT = int(os.environ.get('GDD_IN_MEMORY_ROW_LIMIT', 200000))
+
+# Composite indexes serving the language/license multiselects combined with
+# the min-stars slider, plus one for the slider on its own
+INDEXES = {
+    'idx_repositories_language_license_stars': ['Programming_Language', 'License_Type', 'Number_of_Stars'],
+    'idx_repositories_license_stars': ['License_Type', 'Number_of_Stars'],
+    'idx_repositories_stars': ['Number_of_Stars'],
+}
+# MySQL can only index TEXT columns on a prefix
+TEXT_INDEX_PREFIX = 100
+
+# Filtered results kept per (table version, filters), so reruns that don't
+# change the sidebar (e.g. the download button) don't hit the database again.
+# Bounded by entries and by memory; a result larger than the whole budget
+# (e.g. an unfiltered multi-million-row table) is not cached at all.
+RESULT_CACHE_SIZE = 16
+RESULT_CACHE_BYTES = int(float(os.environ.get('GDD_RESULT_CACHE_MB', 256)) * 1024 * 1024)
+
+_cache_lock = threading.Lock()
+_options_cache = {}
+_result_cache = OrderedDict()
+# Last table version seen, and the last error while the database can't be reached
+_status = {'version': None, 'last_error': None, 'failed_at': None}
+
+
+# Decide whether the Data Exploration filters should run in SQL
+def use_sql_filters():
+    if data_layer.DATA_SOURCE == 'shared':
+        # Workers share one mapped copy of the frame; keep the database out of the request path
+        return False
+    if QUERY_MODE in ('sql', 'memory'):
+        return QUERY_MODE == 'sql'
+    try:
+        row_count, _ = data_layer.table_version()
+    except Exception:
+        # Let the in-memory path report the connection error
+        return False
+    return row_count > IN_MEMORY_ROW_LIMIT
+
+
+# Build "column IN (...)" for a multiselect; None/NaN entries match NULLs
+def _in_clause(column, values, params):
+    values = list(values)
+    present = [value for value in values if not pd.isna(value)]
+    parts = []
+    bind = []
+    if present:
+        parts.append(f"{column} IN :{column}")
+        params[column] = present
+        bind.append(bindparam(column, expanding=True))
+    if len(present) < len(values):
+        parts.append(f"{column} IS NULL")
+    return '(' + ' OR '.join(parts) + ')', bind
+
+
+# Case-insensitive substring test that keeps every row whose description can
+# match the keyword (term_index.matches makes the match exact): a word matches
+# the words with the same term_index.normalize form, which all contain that
+# form. '!' escapes LIKE wildcards (tokens can contain '_').
+def _keyword_clauses(keyword, params):
+    clauses = []
+    for number, word in enumerate(dict.fromkeys(term_index.tokenize(keyword))):
+        stem = term_index.normalize(word)
+        params[f'keyword_{number}'] = '%' + stem.replace('!', '!!').replace('_', '!_').replace('%', '!%') + '%'
+        clauses.append(f"LOWER(Description) LIKE :keyword_{number} ESCAPE '!'")
+    return clauses
+
+
+# WHERE clause of the sidebar filters; an empty multiselect means "no
+# filter", the same as on the in-memory path
+def _where(languages, licenses, min_stars, keyword, params):
+    params['min_stars'] = int(min_stars)
+    clauses = ['Number_of_Stars >= :min_stars']
+    binds = []
+    for column, values in (('Programming_Language', languages), ('License_Type', licenses)):
+        if len(values) > 0:
+            clause, bind = _in_clause(column, values, params)
+            clauses.append(clause)
+            binds.extend(bind)
+    if keyword:
+        clauses.extend(_keyword_clauses(keyword, params))
+    return ' AND '.join(clauses), binds
+
+
+def _query(sql, binds):
+    query = text(sql)
+    return query.bindparams(*binds) if binds else query
+
+
+# Translate the sidebar filters into a parameterized SELECT. With a keyword
+# the rows still need term_index.matches (see _keyword_clauses).
+def build_filter_query(languages=(), licenses=(), min_stars=0, columns=EXPLORATION_COLUMNS, limit=None,
+                       keyword='', order_by=None):
+    params = {}
+    where, binds = _where(languages, licenses, min_stars, keyword, params)
+    sql = f"SELECT {', '.join(columns)} FROM {data_layer.TABLE_NAME} WHERE {where}"
+    if order_by is not None:
+        sql += f' ORDER BY {order_by}'
+    if limit is not None:
+        sql += ' LIMIT :limit'
+        params['limit'] = int(limit)
+    return _query(sql, binds), params
+
+
+# Run read() against the database; when it fails, serve the last cached copy
+# (`stale`) if there is one and remember the error for the page
+def _read_or_stale(read, stale):
+    try:
+        value = read()
+    except Exception as e:
+        if stale is None:
+            raise
+        with _cache_lock:
+            _status.update(last_error=str(e), failed_at=time.time())
+        return stale
+    with _cache_lock:
+        _status.update(last_error=None, failed_at=None)
+    return value
+
+
+# Version of the table, or the last one seen while the database can't be reached
+def table_version():
+    with _cache_lock:
+        stale = _status['version']
+    version = _read_or_stale(data_layer.table_version, stale)
+    with _cache_lock:
+        _status['version'] = version
+    return version
+
+
+# Whether the results shown are the last cached copy, and why
+def query_status():
+    with _cache_lock:
+        return dict(_status)
+
+
+def _filter_key(languages, licenses, min_stars, keyword):
+    normalize = lambda values: tuple(sorted('' if pd.isna(v) else str(v) for v in values))
+    words = tuple(sorted({term_index.normalize(word) for word in term_index.tokenize(keyword)}))
+    return (normalize(languages), normalize(licenses), int(min_stars), words)
+
+
+def _result_bytes(result):
+    if isinstance(result, dict):
+        return sum(_result_bytes(value) for value in result.values())
+    if isinstance(result, (pd.DataFrame, pd.Series)):
+        return int(np.sum(result.memory_usage(deep=True)))
+    return 0
+
+
+# Result of read() for the current table version, cached per filters; if the
+# database fails, the last cached result for the same filters is served instead
+def _cached(filters, read):
+    key = (table_version(), filters)
+    with _cache_lock:
+        if key in _result_cache:
+            _result_cache.move_to_end(key)
+            return _result_cache[key][0]
+        stale = next((result for (_, cached), (result, _) in reversed(_result_cache.items()) if cached == filters), None)
+
+    result = _read_or_stale(read, stale)
+    if result is stale:
+        return result
+
+    size = _result_bytes(result)
+    if size > RESULT_CACHE_BYTES:
+        return result
+    with _cache_lock:
+        _result_cache[key] = (result, size)
+        while len(_result_cache) > RESULT_CACHE_SIZE or sum(size for _, size in _result_cache.values()) > RESULT_CACHE_BYTES:
+            _result_cache.popitem(last=False)
+    return result
+
+
+def _read_filtered(languages, licenses, min_stars, columns, limit, keyword):
+    # Keyword matches are only exact after term_index.matches, so the limit
+    # is applied here instead of in the query
+    read_columns = list(columns) + (['Description'] if keyword and 'Description' not in columns else [])
+    query_limit = None if keyword else limit
+    with instrumentation.timer('query.filter') as span:
+        if data_layer.DATA_SOURCE == 'snapshot':
+            import snapshot
+            result = snapshot.read_frame(read_columns, snapshot.filter_expression(languages, licenses, min_stars))
+            query_limit = None
+        else:
+            order_by = None if query_limit is None else 'Number_of_Stars DESC'
+            query, params = build_filter_query(languages, licenses, min_stars, read_columns, query_limit, keyword, order_by)
+            result = pd.read_sql(query, data_layer.get_engine(), params=params)
+            if result.empty:
+                # Without rows every column comes back as object, which the
+                # summaries can't rank or sum
+                result = result.astype({column: float for column in frame_schema.COUNT_COLUMNS if column in result})
+        if keyword:
+            result = result[term_index.matches(result['Description'], keyword)][list(columns)]
+        if limit is not None and query_limit is None:
+            result = result.sort_values('Number_of_Stars', ascending=False, kind='stable').head(limit)
+        span['rows'] = len(result)
+    return result
+
+
+# The matching rows, or with `limit` the `limit` most-starred ones
+def fetch_filtered(languages=(), licenses=(), min_stars=0, columns=EXPLORATION_COLUMNS, limit=None, keyword=''):
+    filters = ('rows', tuple(columns), limit) + _filter_key(languages, licenses, min_stars, keyword)
+    return _cached(filters, lambda: _read_filtered(languages, licenses, min_stars, columns, limit, keyword))
+
+
+# Summary of the matching rows, computed in pandas (see fetch_summary)
+def summarize(rows, top_n=TOP_REPOSITORIES):
+    return {
+        'count': len(rows),
+        'totals': {column: float(rows[column].sum()) for column in TOTAL_COLUMNS},
+        'languages': frame_schema.value_counts(rows['Programming_Language']),
+        'licenses': frame_schema.value_counts(rows['License_Type']),
+        'distributions': {column: rows[column].value_counts().sort_index() for column in DISTRIBUTION_COLUMNS},
+        'open_issues': sketches.top_open_issues(rows, top_n),
+    }
+
+
+def _sql_summary(languages, licenses, min_stars, top_n):
+    params = {}
+    where, binds = _where(languages, licenses, min_stars, '', params)
+    table = data_layer.TABLE_NAME
+    sums = ', '.join(f'SUM({column}) AS {column}' for column in TOTAL_COLUMNS)
+    # (the chart leaves out rows without a language or name)
+    named = f"{where} AND Programming_Language IS NOT NULL AND Repository_Name IS NOT NULL"
+    with data_layer.get_engine().connect() as conn:
+        groups = pd.read_sql(_query(
+            f"SELECT Programming_Language, License_Type, COUNT(*) AS repo_count, {sums} "
+            f"FROM {table} WHERE {where} GROUP BY Programming_Language, License_Type", binds), conn, params=params)
+        distributions = {}
+        for column in DISTRIBUTION_COLUMNS:
+            counts = pd.read_sql(_query(
+                f"SELECT {column}, COUNT(*) AS repo_count FROM {table} "
+                f"WHERE {where} AND {column} IS NOT NULL GROUP BY {column}", binds), conn, params=params)
+            distributions[column] = counts.set_index(column)['repo_count'].sort_index()
+        top = pd.read_sql(_query(
+            f"SELECT Repository_Name, SUM(Number_of_Open_Issues) AS issues FROM {table} "
+            f"WHERE {named} GROUP BY Repository_Name ORDER BY issues DESC LIMIT :top_n", binds),
+            conn, params=dict(params, top_n=int(top_n)))
+        open_issues = pd.read_sql(_query(
+            f"SELECT Programming_Language, Repository_Name, SUM(Number_of_Open_Issues) AS Number_of_Open_Issues "
+            f"FROM {table} WHERE {named} AND Repository_Name IN :names "
+            f"GROUP BY Programming_Language, Repository_Name", binds + [bindparam('names', expanding=True)]),
+            conn, params=dict(params, names=top['Repository_Name'].tolist() or [None]))
+    open_issues['Number_of_Open_Issues'] = pd.to_numeric(open_issues['Number_of_Open_Issues']).fillna(0)
+    return {
+        'count': int(groups['repo_count'].sum()),
+        'totals': {column: float(pd.to_numeric(groups[column]).sum()) for column in TOTAL_COLUMNS},
+        'languages': rollups.counts_by(groups, 'Programming_Language'),
+        'licenses': rollups.counts_by(groups, 'License_Type'),
+        'distributions': distributions,
+        'open_issues': open_issues,
+    }
+
+
+def _read_summary(languages, licenses, min_stars, keyword, top_n):
+    with instrumentation.timer('query.summary') as span:
+        if keyword or data_layer.DATA_SOURCE == 'snapshot':
+            # The matching rows have to be read; only the summarized columns are
+            rows = _read_filtered(languages, licenses, min_stars, SUMMARY_COLUMNS, None, keyword)
+            summary = summarize(rows, top_n)
+        else:
+            summary = _sql_summary(languages, licenses, min_stars, top_n)
+        span['rows'] = summary['count']
+    return summary
+
+
+# Count, totals, language/license counts, star and fork distributions and the
+# open-issue sums of the top repositories for all the matching rows, from
+# aggregate queries (cached and served stale like fetch_filtered)
+def fetch_summary(languages=(), licenses=(), min_stars=0, keyword='', top_n=TOP_REPOSITORIES):
+    filters = ('summary', top_n) + _filter_key(languages, licenses, min_stars, keyword)
+    return _cached(filters, lambda: _read_summary(languages, licenses, min_stars, keyword, top_n))
+
+
+def _read_options():
+    if data_layer.DATA_SOURCE == 'snapshot':
+        import snapshot
+        languages = snapshot.distinct_values('Programming_Language')
+        licenses = snapshot.distinct_values('License_Type')
+        max_stars = snapshot.max_value('Number_of_Stars')
+    else:
+        table = data_layer.TABLE_NAME
+        with data_layer.get_engine().connect() as conn:
+            languages = [row[0] for row in conn.execute(text(f"SELECT DISTINCT Programming_Language FROM {table}"))]
+            licenses = [row[0] for row in conn.execute(text(f"SELECT DISTINCT License_Type FROM {table}"))]
+            max_stars = conn.execute(text(f"SELECT MAX(Number_of_Stars) FROM {table}")).scalar()
+    return {'languages': languages, 'licenses': licenses, 'max_stars': int(max_stars or 0)}
+
+
+# Values for the sidebar widgets, read with DISTINCT/MAX instead of from the
+# full frame (the last ones read while the database can't be reached)
+def filter_options():
+    version = table_version()
+    with _cache_lock:
+        if version in _options_cache:
+            return _options_cache[version]
+        stale = next(iter(_options_cache.values()), None)
+
+    options = _read_or_stale(_read_options, stale)
+    if options is stale:
+        return options
+    with _cache_lock:
+        _options_cache.clear()
+        _options_cache[version] = options
+    return options
+
+
+# CREATE INDEX statements for the indexes that don't exist yet
+def index_statements(engine=None):
+    engine = engine or data_layer.get_engine()
+    inspector = inspect(engine)
+    existing = {index['name'] for index in inspector.get_indexes(data_layer.TABLE_NAME)}
+    column_types = {column['name']: column['type'] for column in inspector.get_columns(data_layer.TABLE_NAME)}
+    prefix_text = engine.dialect.name == 'mysql'
+
+    statements = []
+    for name, columns in INDEXES.items():
+        if name in existing:
+            continue
+        parts = []
+        for column in columns:
+            if prefix_text and isinstance(column_types.get(column), Text):
+                parts.append(f"{column}({TEXT_INDEX_PREFIX})")
+            else:
+                parts.append(column)
+        statements.append(f"CREATE INDEX {name} ON {data_layer.TABLE_NAME} ({', '.join(parts)})")
+    return statements
+
+
+# Create the indexes the filter queries rely on; returns the statements it ran
+def create_indexes(engine=None):
+    engine = engine or data_layer.get_engine()
+    statements = index_statements(engine)
+    with engine.begin() as conn:
+        for statement in statements:
+            conn.execute(text(statement))
+    return statements
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Create the indexes used by the Data Exploration filters.")
+    parser.add_argument('--dry-run', action='store_true', help="Print the DDL instead of running it.")
+    args = parser.parse_args()
+
+    if args.dry_run:
+        statements = index_statements()
+    else:
+        statements = create_indexes()
+    for statement in statements:
+        print(statement + ';')
+    if not statements:
+        print("All indexes already exist.")
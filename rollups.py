@@ -0,0 +1,178 @@
+# Pre-aggregated rollup for the aggregate charts on the Visualizations page.
+#
+# The language and license counts are sums over (language, license) groups,
+# so they are materialized once and the page only reads a few hundred rows
+# (the charts over time read timeseries.py instead). The rollup lives in a
+# MySQL table when it exists (see rebuild_rollups and apply_changes) or is
+# computed locally from the loaded frame otherwise.
+import argparse
+import os
+
+import pandas as pd
+from sqlalchemy import Column, Integer, MetaData, String, Table, inspect, select, text, update, insert
+
+import data_layer
+import instrumentation
+
+# Missing languages and licenses are stored as '' so they can be part
+# of the primary key; they are turned back into None when the rollups are read
+MISSING = ''
+
+# 'auto' reads the rollup table when it exists and computes the rollup from
+# the loaded frame otherwise; 'table' and 'local' force one source
+ROLLUP_SOURCE = os.environ.get('GDD_ROLLUP_SOURCE', 'auto')
+
+GROUP_COLUMNS = ['Programming_Language', 'License_Type']
+
+metadata = MetaData()
+
+# Repositories grouped by language and license
+rollup_table = Table(
+    'repositories_rollup', metadata,
+    Column('Programming_Language', String(100), primary_key=True),
+    Column('License_Type', String(100), primary_key=True),
+    Column('repo_count', Integer, nullable=False),
+)
+
+
+
+# Compute the rollup from a frame of repository rows
+def compute_rollups(rows):
+    keys = pd.DataFrame({
+        column: rows[column].astype(object).fillna(MISSING).astype(str) for column in GROUP_COLUMNS
+    }, index=rows.index)
+    return keys.assign(repo_count=1).groupby(GROUP_COLUMNS, as_index=False)['repo_count'].sum()
+
+
+# Clear and re-materialize the rollup table from the repositories table
+def rebuild_rollups(engine=None):
+    engine = engine or data_layer.get_engine()
+    metadata.create_all(engine)
+    with engine.begin() as conn:
+        conn.execute(rollup_table.delete())
+        conn.execute(text(
+            f"INSERT INTO {rollup_table.name} (Programming_Language, License_Type, repo_count) "
+            f"SELECT COALESCE(Programming_Language, ''), COALESCE(License_Type, ''), COUNT(*) "
+            f"FROM {data_layer.TABLE_NAME} GROUP BY 1, 2"
+        ))
+    invalidate()
+
+
+# Change of the rollup when rows change: old_rows holds the previous values
+# of updated rows (empty for new ones) and new_rows the values written
+def compute_deltas(old_rows, new_rows):
+    delta = compute_rollups(new_rows)
+    if len(old_rows):
+        negated = compute_rollups(old_rows)
+        # (signed first: counts can go below zero)
+        negated['repo_count'] = -negated['repo_count'].astype('int64')
+        delta = pd.concat([delta, negated]).groupby(GROUP_COLUMNS, as_index=False)['repo_count'].sum()
+    return delta[delta['repo_count'] != 0]
+
+
+# Incrementally maintain the rollup table for rows that were inserted or
+# updated (see compute_deltas). Runs on the caller's connection so it
+# commits together with the ingested rows.
+def apply_changes(conn, old_rows, new_rows):
+    for row in compute_deltas(old_rows, new_rows).to_dict('records'):
+        match = [rollup_table.c[column] == row[column] for column in GROUP_COLUMNS]
+        result = conn.execute(update(rollup_table).where(*match).values(repo_count=rollup_table.c.repo_count + int(row['repo_count'])))
+        if result.rowcount == 0:
+            conn.execute(insert(rollup_table).values(**{key: (int(value) if key == 'repo_count' else value) for key, value in row.items()}))
+    conn.execute(rollup_table.delete().where(rollup_table.c.repo_count <= 0))
+    invalidate()
+
+
+# Whether the rollup table has been materialized
+def rollup_table_exists(engine=None):
+    engine = engine or data_layer.get_engine()
+    return rollup_table.name in set(inspect(engine).get_table_names())
+
+
+def _read_table(engine):
+    with engine.connect() as conn:
+        return pd.read_sql(select(rollup_table), conn)
+
+
+# Rollup (as returned by get_rollups) after a series of (old rows, new rows)
+# changes, computed from the changed rows only
+def update_rollups(rollup, changes):
+    deltas = [compute_deltas(old_rows, new_rows) for old_rows, new_rows in changes if len(old_rows) or len(new_rows)]
+    frame = rollup.copy()
+    frame[GROUP_COLUMNS] = frame[GROUP_COLUMNS].fillna(MISSING)
+    frame = pd.concat([frame] + deltas).groupby(GROUP_COLUMNS, as_index=False)['repo_count'].sum()
+    return _restore_missing(frame[frame['repo_count'] > 0].reset_index(drop=True))
+
+
+def _restore_missing(rollup):
+    for column in GROUP_COLUMNS:
+        rollup[column] = rollup[column].replace(MISSING, None)
+    return rollup
+
+
+# Rollup of a loaded frame, read from the rollup table when there is one or
+# computed from the frame otherwise (and when the table can't be read, so an
+# unreachable database doesn't break the page). In shared mode it is the
+# rollup published next to the frame by the refresher.
+def _build(df):
+    if data_layer.DATA_SOURCE == 'shared':
+        import shared_cache
+        with instrumentation.timer('rollups.read'):
+            return _restore_missing(shared_cache.read_rollups())
+    # The snapshot replaces the database, so its rollup is computed locally
+    if data_layer.DATA_SOURCE == 'database' and ROLLUP_SOURCE != 'local':
+        try:
+            engine = data_layer.get_engine()
+            if ROLLUP_SOURCE == 'table' or rollup_table_exists(engine):
+                with instrumentation.timer('rollups.read'):
+                    return _restore_missing(_read_table(engine))
+        except Exception:
+            pass
+    with instrumentation.timer('rollups.compute'):
+        return _restore_missing(compute_rollups(df))
+
+
+# A frame merged from the cached one by delta loads only needs the changed rows applied
+def _update(rollup, df, changes):
+    return update_rollups(rollup, changes)
+
+
+# Built once per loaded frame, by the background refresher before the frame
+# is swapped in, so page reruns never query the database for the rollup
+_cache = data_layer.FrameCache('rollups', _build, _update)
+
+
+# Rollup of the given frame (the current one by default)
+def get_rollups(df=None):
+    return _cache.get(data_layer.get_data() if df is None else df)
+
+
+def invalidate():
+    _cache.clear()
+
+
+# Keep only the groups matching the page filters; an empty selection means no filter
+def filter_rollup(rollup, languages=(), licenses=()):
+    mask = pd.Series(True, index=rollup.index)
+    for column, values in (('Programming_Language', languages), ('License_Type', licenses)):
+        if len(values) > 0:
+            selected = rollup[column].isin(values)
+            if any(pd.isna(value) for value in values):
+                selected |= rollup[column].isna()
+            mask &= selected
+    return rollup[mask]
+
+
+# Repository counts per language or license, largest first (like value_counts)
+def counts_by(rollup, column):
+    counts = rollup.dropna(subset=[column]).groupby(column)['repo_count'].sum()
+    counts = counts[counts > 0].sort_values(ascending=False)
+    counts.index.name = column
+    return counts.rename('count')
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Materialize the rollup table used by the Visualizations page.")
+    parser.parse_args()
+    rebuild_rollups()
+    print(f"Rebuilt {rollup_table.name}")
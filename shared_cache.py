@@ -0,0 +1,203 @@
+# Cross-process cache for multi-worker deployments.
+#
+# One refresher per host (python shared_cache.py) watches the database, and
+# whenever the table changes (or the day rolls over, for the day-count
+# columns) it loads and optimizes the frame once, computes the rollup, and
+# writes both as uncompressed Arrow IPC files to a new version directory under
+# GDD_SHARED_DIR (tmpfs at /dev/shm by default). The version is published by
+# atomically rewriting the CURRENT pointer. App workers started with
+# GDD_DATA_SOURCE=shared memory-map those files: numeric columns and strings
+# stay in the shared pages, so the host holds one copy of the data however
+# many workers it runs, and every worker sees the same version. Rendered
+# figures are shared through the same version directory.
+import argparse
+import datetime
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import pyarrow as pa
+
+import data_layer
+import frame_schema
+
+SHARED_DIR = os.environ.get(
+    'GDD_SHARED_DIR',
+    os.path.join('/dev/shm' if os.path.isdir('/dev/shm') else tempfile.gettempdir(), 'github_data_dive'),
+)
+REFRESH_INTERVAL = data_layer.REFRESH_INTERVAL
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = '_manifest.json'
+LOCK_FILE = '.refresher.lock'
+FRAME_FILE = 'frame.arrow'
+ROLLUP_FILE = 'rollup.arrow'
+FIGURES_DIR = 'figures'
+# Previous versions kept next to the current one (workers may still map them)
+KEEP_VERSIONS = 2
+
+
+def _write_table(path, frame):
+    table = pa.Table.from_pandas(frame, preserve_index=False)
+    with pa.OSFile(path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+
+
+def _read_table(path):
+    return pa.ipc.open_file(pa.memory_map(path)).read_all()
+
+
+def _publish_pointer(directory, name):
+    temp_path = os.path.join(directory, f'{CURRENT_FILE}.{os.getpid()}.tmp')
+    with open(temp_path, 'w') as f:
+        f.write(name)
+    os.replace(temp_path, os.path.join(directory, CURRENT_FILE))
+
+
+def _prune(directory, current):
+    versions = sorted(
+        entry for entry in os.listdir(directory)
+        if entry != current and os.path.isfile(os.path.join(directory, entry, MANIFEST_FILE))
+    )
+    for old in versions[:max(len(versions) - (KEEP_VERSIONS - 1), 0)]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+
+# Write the frame and its rollup as a new version and make it current
+def publish(df, rollup, source_version, directory=SHARED_DIR):
+    name = time.strftime('%Y%m%dT%H%M%S') + f"-{time.time_ns() % 1000000:06d}"
+    target = os.path.join(directory, name)
+    os.makedirs(os.path.join(target, FIGURES_DIR))
+
+    _write_table(os.path.join(target, FRAME_FILE), df)
+    _write_table(os.path.join(target, ROLLUP_FILE), rollup)
+
+    manifest = {
+        'name': name,
+        'rows': len(df),
+        'source_version': list(source_version),
+        'day': datetime.date.today().isoformat(),
+        'published_at': time.time(),
+    }
+    with open(os.path.join(target, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    _publish_pointer(directory, name)
+    _prune(directory, name)
+    return manifest
+
+
+def current_name(directory=SHARED_DIR):
+    try:
+        with open(os.path.join(directory, CURRENT_FILE)) as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        raise RuntimeError(f"No data published in {directory} yet; start the refresher (python shared_cache.py).")
+
+
+def current_manifest(directory=SHARED_DIR):
+    with open(os.path.join(directory, current_name(directory), MANIFEST_FILE)) as f:
+        return json.load(f)
+
+
+# Version of the published data, shaped like data_layer.probe_version()
+def current_version(directory=SHARED_DIR):
+    manifest = current_manifest(directory)
+    return (manifest['rows'], manifest['name'])
+
+
+# The published frame, backed by the memory-mapped file
+def read_frame(directory=SHARED_DIR):
+    path = os.path.join(directory, current_name(directory), FRAME_FILE)
+    return _read_table(path).to_pandas(types_mapper=frame_schema.arrow_string_types, split_blocks=True)
+
+
+# The published rollup (small, so read into an ordinary frame)
+def read_rollups(directory=SHARED_DIR):
+    return _read_table(os.path.join(directory, current_name(directory), ROLLUP_FILE)).to_pandas()
+
+
+# File holding a rendered figure for the given cache key in the current version
+def figure_path(key, fmt='png', directory=SHARED_DIR):
+    digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+    return os.path.join(directory, current_name(directory), FIGURES_DIR, f'{digest}.{fmt}')
+
+
+def read_figure(path):
+    try:
+        with open(path, 'rb') as f:
+            return f.read()
+    except FileNotFoundError:
+        return None
+
+
+def write_figure(path, image):
+    temp_path = f'{path}.{os.getpid()}.tmp'
+    try:
+        with open(temp_path, 'wb') as f:
+            f.write(image)
+        os.replace(temp_path, path)
+    except FileNotFoundError:
+        # The version was pruned meanwhile; the figure is simply not shared
+        pass
+
+
+# Publish a new version if the source changed (or the day rolled over);
+# returns the new manifest, or None when the published data is current
+def refresh(directory=SHARED_DIR, force=False):
+    import rollups
+
+    source_version = data_layer.probe_version()
+    try:
+        manifest = current_manifest(directory)
+    except (RuntimeError, FileNotFoundError):
+        manifest = None
+    if (
+        not force
+        and manifest is not None
+        and manifest['source_version'] == list(source_version)
+        and manifest['day'] == datetime.date.today().isoformat()
+    ):
+        return None
+
+    # Delta-loaded when possible, with the rollup updated from the changed rows
+    df = data_layer.refresh(force)
+    return publish(df, rollups.get_rollups(df), source_version, directory)
+
+
+# Refresh every `interval` seconds; only one refresher runs per directory
+def run_refresher(directory=SHARED_DIR, interval=REFRESH_INTERVAL, once=False):
+    os.makedirs(directory, exist_ok=True)
+    lock = open(os.path.join(directory, LOCK_FILE), 'w')
+    try:
+        fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        raise SystemExit(f"Another refresher is already publishing to {directory}.")
+
+    while True:
+        try:
+            manifest = refresh(directory)
+            if manifest is not None:
+                print(json.dumps(manifest), flush=True)
+        except Exception as e:
+            # Keep serving the last published version and try again later
+            print(f"Refresh failed: {e}", flush=True)
+        if once:
+            return
+        time.sleep(interval)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Publish the repositories table to the shared cache used by GDD_DATA_SOURCE=shared workers.")
+    parser.add_argument('--dir', default=SHARED_DIR)
+    parser.add_argument('--interval', type=float, default=REFRESH_INTERVAL)
+    parser.add_argument('--source', choices=['database', 'snapshot'], default='database',
+                        help="Where the refresher itself reads the table from.")
+    parser.add_argument('--once', action='store_true', help="Publish (if needed) and exit.")
+    args = parser.parse_args()
+
+    data_layer.DATA_SOURCE = args.source
+    run_refresher(args.dir, args.interval, args.once)
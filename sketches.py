@@ -0,0 +1,302 @@
+# Summary sketches of the loaded frame, built once per load.
+#
+# Rows are partitioned by (Programming_Language, License_Type), the same
+# groups the sidebar filters select. Each partition keeps:
+#   - the top TOP_K rows by stars, forks and open issues (candidates that are
+#     merged across the selected partitions to answer top-N lists),
+#   - running sums (count, stars, forks, open issues) per distinct star value,
+#     summed from the top, so totals for any min-stars value are exact,
+#   - t-digest style quantile sketches of stars and forks, which merge across
+#     partitions with a bounded rank error.
+# Queries the sketches can't answer exactly (a keyword filter, a top-N whose
+# candidates ran out under the min-stars filter, open-issue sums over repeated
+# repository names) fall back to the filtered frame.
+import os
+
+import numpy as np
+import pandas as pd
+
+import data_layer
+
+CATEGORY_COLUMNS = ['Programming_Language', 'License_Type']
+METRIC_COLUMNS = ['Number_of_Stars', 'Number_of_Forks', 'Number_of_Open_Issues']
+QUANTILE_COLUMNS = ['Number_of_Stars', 'Number_of_Forks']
+# Candidates kept per partition and metric; top-N lists are exact for N <= TOP_K
+TOP_K = int(os.environ.get('GDD_SKETCH_TOP_K', 50))
+# t-digest compression: at most about COMPRESSION / 2 centroids per sketch
+COMPRESSION = 200
+
+MISSING = -1
+
+
+def _scale(q, compression):
+    # t-digest k1 scale: small clusters near the tails, large ones in the middle
+    return compression / (2 * np.pi) * (np.arcsin(2 * np.clip(q, 0, 1) - 1) + np.pi / 2)
+
+
+class QuantileSketch:
+    def __init__(self, means, weights, minimum, maximum):
+        self.means = means
+        self.weights = weights
+        self.minimum = minimum
+        self.maximum = maximum
+
+    @property
+    def count(self):
+        return float(self.weights.sum())
+
+    # Cluster sorted points (value, weight) so each cluster spans at most one
+    # unit of the scale function
+    @classmethod
+    def _compress(cls, values, weights, compression, minimum, maximum):
+        if not len(values):
+            return cls(np.empty(0), np.empty(0), np.nan, np.nan)
+        cumulative = np.cumsum(weights)
+        total = cumulative[-1]
+        clusters = np.floor(_scale((cumulative - weights / 2) / total, compression)).astype(np.int64)
+        starts = np.flatnonzero(np.diff(clusters, prepend=-1))
+        sums = np.add.reduceat(values * weights, starts)
+        cluster_weights = np.add.reduceat(weights, starts)
+        return cls(sums / cluster_weights, cluster_weights, minimum, maximum)
+
+    @classmethod
+    def from_values(cls, values, compression=COMPRESSION):
+        values = np.sort(values[~np.isnan(values)])
+        if not len(values):
+            return cls._compress(values, values, compression, np.nan, np.nan)
+        return cls._compress(values, np.ones(len(values)), compression, values[0], values[-1])
+
+    @classmethod
+    def merge(cls, sketches, compression=COMPRESSION):
+        sketches = [sketch for sketch in sketches if len(sketch.means)]
+        if not sketches:
+            return cls(np.empty(0), np.empty(0), np.nan, np.nan)
+        means = np.concatenate([sketch.means for sketch in sketches])
+        weights = np.concatenate([sketch.weights for sketch in sketches])
+        order = np.argsort(means, kind='stable')
+        return cls._compress(means[order], weights[order], compression,
+                             min(sketch.minimum for sketch in sketches),
+                             max(sketch.maximum for sketch in sketches))
+
+    # Value at quantile q, interpolated between centroid centers
+    def quantile(self, q):
+        if not len(self.means):
+            return np.nan
+        centers = np.cumsum(self.weights) - self.weights / 2
+        positions = np.concatenate([[0], centers, [self.count]])
+        values = np.concatenate([[self.minimum], self.means, [self.maximum]])
+        return float(np.interp(q * self.count, positions, values))
+
+
+class Partition:
+    def __init__(self, rows, values):
+        stars = values['Number_of_Stars'][rows]
+
+        # Candidates per metric: positions, metric values and stars, best first
+        self.truncated = len(rows) > TOP_K
+        self.candidates = {}
+        for column in METRIC_COLUMNS:
+            metric = values[column][rows]
+            present = np.flatnonzero(~np.isnan(metric))
+            if len(present) > TOP_K:
+                present = present[np.argpartition(-metric[present], TOP_K - 1)[:TOP_K]]
+            self.candidates[column] = (rows[present], metric[present], stars[present])
+
+        # Running sums from the highest star value down; missing counts add nothing
+        star_values, inverse = np.unique(np.nan_to_num(stars, nan=-np.inf), return_inverse=True)
+        self.star_counts = np.bincount(inverse, minlength=len(star_values)).astype(float)
+        sums = [self.star_counts]
+        for column in METRIC_COLUMNS:
+            sums.append(np.bincount(inverse, weights=np.nan_to_num(values[column][rows]), minlength=len(star_values)))
+        suffix = np.cumsum(np.stack(sums, axis=1)[::-1], axis=0)[::-1]
+        self.star_values = star_values
+        self.suffix = np.vstack([suffix, np.zeros((1, len(sums)))])
+
+        self.quantiles = {column: QuantileSketch.from_values(values[column][rows]) for column in QUANTILE_COLUMNS}
+
+    def totals(self, min_stars):
+        return self.suffix[np.searchsorted(self.star_values, min_stars)]
+
+
+class Sketches:
+    def __init__(self, df):
+        self.frame = df
+        values = {column: df[column].to_numpy(dtype=float, na_value=np.nan) for column in METRIC_COLUMNS}
+
+        self._values = {}
+        codes = []
+        for column in CATEGORY_COLUMNS:
+            column_codes, uniques = pd.factorize(df[column], use_na_sentinel=True)
+            self._values[column] = {value: code for code, value in enumerate(uniques)}
+            codes.append(column_codes)
+        self._license_count = len(self._values['License_Type']) + 1
+        group = (codes[0] + 1) * self._license_count + (codes[1] + 1)
+
+        order = np.argsort(group, kind='stable')
+        keys, starts = np.unique(group[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        self.partitions = {
+            (int(key) // self._license_count - 1, int(key) % self._license_count - 1): Partition(order[start:end], values)
+            for key, start, end in zip(keys, starts, ends)
+        }
+        # The open-issues chart sums rows per repository name; the top rows are
+        # only its exact candidates when no name is shared by several rows
+        self.unique_names = bool(df['Repository_Name'].dropna().is_unique)
+
+    def _codes(self, column, values):
+        codes = set()
+        for value in values:
+            if value is None or (not isinstance(value, str) and pd.isna(value)):
+                codes.add(MISSING)
+            elif value in self._values[column]:
+                codes.add(self._values[column][value])
+        return codes
+
+    # Partitions matching the multiselects; an empty selection means no filter
+    def _selected(self, languages, licenses):
+        language_codes = self._codes(CATEGORY_COLUMNS[0], languages) if len(languages) > 0 else None
+        license_codes = self._codes(CATEGORY_COLUMNS[1], licenses) if len(licenses) > 0 else None
+        return [
+            partition for (language, license_type), partition in self.partitions.items()
+            if (language_codes is None or language in language_codes)
+            and (license_codes is None or license_type in license_codes)
+        ]
+
+    # Row count and sums of stars, forks and open issues of the matching rows
+    def totals(self, languages=(), licenses=(), min_stars=0):
+        sums = np.zeros(len(METRIC_COLUMNS) + 1)
+        for partition in self._selected(languages, licenses):
+            sums += partition.totals(min_stars)
+        return dict(zip(['count'] + METRIC_COLUMNS, sums))
+
+    # Positions of the top-n rows by column (ties in frame order, like
+    # nlargest), or None when the candidates can't guarantee the exact answer
+    def top(self, column, n, languages=(), licenses=(), min_stars=0):
+        if n > TOP_K:
+            return None
+        positions, metrics, bounds = [], [], []
+        for partition in self._selected(languages, licenses):
+            rows, metric, stars = partition.candidates[column]
+            keep = stars >= min_stars
+            positions.append(rows[keep])
+            metrics.append(metric[keep])
+            # Rows outside the candidates are no better than the worst candidate
+            if partition.truncated and len(metric):
+                bounds.append(metric.min())
+        if not positions:
+            return np.empty(0, dtype=np.int64)
+        positions, metrics = np.concatenate(positions), np.concatenate(metrics)
+        order = np.lexsort((positions, -metrics))[:n]
+        if bounds and (len(order) < n or metrics[order[-1]] <= max(bounds)):
+            return None
+        return positions[order]
+
+    # Candidate rows for the grouped open-issues chart of the top-n rows, or
+    # None when (as in top) the min-stars filter leaves too few candidates or
+    # repository names repeat (e.g. "dotfiles" of different owners), so the
+    # per-name sums need every row
+    def open_issue_candidates(self, n, languages=(), licenses=(), min_stars=0):
+        if not self.unique_names or self.top('Number_of_Open_Issues', n, languages, licenses, min_stars) is None:
+            return None
+        positions = []
+        for partition in self._selected(languages, licenses):
+            rows, _, stars = partition.candidates['Number_of_Open_Issues']
+            positions.append(rows[stars >= min_stars])
+        return np.sort(np.concatenate(positions)) if positions else np.empty(0, dtype=np.int64)
+
+    # Merged quantile sketch of the column for the matching rows, or None when
+    # a min-stars filter cuts into the partitions: the sketches can't be cut,
+    # so stars are then summarized from the star counts above the slider
+    # value, and forks fall back to the filtered frame
+    def quantiles(self, column, languages=(), licenses=(), min_stars=0):
+        partitions = self._selected(languages, licenses)
+        if not any(min_stars > partition.star_values[0] for partition in partitions):
+            return QuantileSketch.merge([partition.quantiles[column] for partition in partitions])
+        if column != 'Number_of_Stars':
+            return None
+        values, weights = [], []
+        for partition in partitions:
+            start = np.searchsorted(partition.star_values, min_stars)
+            values.append(partition.star_values[start:])
+            weights.append(partition.star_counts[start:])
+        values, weights = np.concatenate(values), np.concatenate(weights)
+        if not len(values):
+            return QuantileSketch.merge([])
+        order = np.argsort(values, kind='stable')
+        return QuantileSketch._compress(values[order], weights[order], COMPRESSION, values[order[0]], values[order[-1]])
+
+
+_cache = data_layer.FrameCache('sketches', Sketches)
+
+
+# Sketches of the given frame, built once per loaded frame
+def get_sketches(df):
+    return _cache.get(df)
+
+
+# The helpers below answer from the sketches of `df` (the loaded frame) when
+# they can, and otherwise from `filtered`; pass df=None to force the latter
+# (SQL results, keyword searches)
+
+def top_rows(df, filtered, column, n=10, languages=(), licenses=(), min_stars=0):
+    positions = None if df is None else get_sketches(df).top(column, n, languages, licenses, min_stars)
+    if positions is None:
+        return filtered.nlargest(n, column)
+    return df.take(positions)
+
+
+def totals(df, filtered, languages=(), licenses=(), min_stars=0):
+    if df is None:
+        return {
+            'count': len(filtered),
+            **{column: filtered[column].sum() for column in METRIC_COLUMNS},
+        }
+    return get_sketches(df).totals(languages, licenses, min_stars)
+
+
+# Value of the column at each quantile in qs
+def percentiles(df, filtered, column, qs, languages=(), licenses=(), min_stars=0):
+    sketch = None if df is None else get_sketches(df).quantiles(column, languages, licenses, min_stars)
+    if sketch is None:
+        values = filtered[column].to_numpy(dtype=float, na_value=np.nan)
+        values = values[~np.isnan(values)]
+        return {q: float(np.quantile(values, q)) if len(values) else np.nan for q in qs}
+    return {q: sketch.quantile(q) for q in qs}
+
+
+# Rows to group for the top-n open-issues chart: the per-partition top rows by
+# open issues when repository names are unique, the whole filtered frame otherwise
+def open_issue_rows(df, filtered, n=10, languages=(), licenses=(), min_stars=0):
+    positions = None if df is None else get_sketches(df).open_issue_candidates(n, languages, licenses, min_stars)
+    if positions is None:
+        return filtered
+    return df.take(positions)
+
+
+# Open issues per (language, repository) of the n repositories with the most
+# open issues overall, for the grouped open-issues chart
+def top_open_issues(rows, n=10):
+    grouped = (
+        rows.groupby(['Programming_Language', 'Repository_Name'], observed=True)['Number_of_Open_Issues']
+        .sum()
+        .reset_index()
+        .astype({'Programming_Language': object})  # Plot only the languages present
+    )
+    top_repositories = grouped.groupby('Repository_Name')['Number_of_Open_Issues'].sum().nlargest(n).index
+    return grouped[grouped['Repository_Name'].isin(top_repositories)]
+
+
+# Value at each quantile in qs of a distribution (value -> count, sorted by
+# value), interpolated like np.quantile over the expanded values
+def percentiles_from_counts(distribution, qs):
+    values = distribution.index.to_numpy(dtype=float)
+    cumulative = np.cumsum(distribution.to_numpy(dtype=float))
+    if not len(values) or not cumulative[-1]:
+        return {q: np.nan for q in qs}
+    result = {}
+    for q in qs:
+        rank = q * (cumulative[-1] - 1)
+        low, high = np.searchsorted(cumulative, [np.floor(rank), np.ceil(rank)], side='right')
+        result[q] = float(values[low] + (values[high] - values[low]) * (rank - np.floor(rank)))
+    return result
+
@@ -0,0 +1,227 @@
+# Columnar snapshot of the repositories table.
+#
+# The table is exported to a hive-partitioned Arrow IPC (or Parquet) dataset
+# and the app reads that instead of MySQL when GDD_DATA_SOURCE=snapshot.
+# Arrow IPC files are memory-mapped, so every app worker on the host reads the
+# same pages from the OS page cache, and filters are answered with column
+# projection and predicate pushdown (whole partitions are skipped).
+#
+# Export with:  python snapshot.py --partition-by language
+# Each export goes into its own directory and is published by atomically
+# rewriting the CURRENT pointer, so readers never see a half-written snapshot.
+import argparse
+import json
+import os
+import shutil
+import threading
+import time
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.dataset as ds
+from pyarrow import fs
+from sqlalchemy import text
+
+import data_layer
+import frame_schema
+
+SNAPSHOT_DIR = os.environ.get('GDD_SNAPSHOT_DIR', 'snapshots')
+CURRENT_FILE = 'CURRENT'
+MANIFEST_FILE = '_snapshot.json'
+EXPORT_CHUNK_ROWS = 100000
+# Previous exports kept next to the current one (readers may still map them)
+KEEP_SNAPSHOTS = 2
+
+PARTITION_COLUMNS = {
+    'language': 'Programming_Language',
+    'month': 'Creation_Month',
+}
+
+# Arrow types for the known columns; anything else is inferred
+ARROW_TYPES = dict(frame_schema.ARROW_TYPES, Creation_Month=pa.string())
+DATE_COLUMNS = ['Creation_Date', 'Last_Updated_Date']
+
+_dataset_lock = threading.Lock()
+_dataset_cache = {'name': None, 'dataset': None, 'manifest': None}
+
+
+def _partitioning(column):
+    return ds.partitioning(pa.schema([(column, pa.string())]), flavor='hive')
+
+
+def _prepare_chunk(chunk, partition_column):
+    for column in DATE_COLUMNS:
+        if column in chunk:
+            chunk[column] = pd.to_datetime(chunk[column], errors='coerce')
+    if partition_column == 'Creation_Month':
+        chunk['Creation_Month'] = chunk['Creation_Date'].dt.strftime('%Y-%m')
+    return chunk
+
+
+def _schema_for(chunk):
+    fields = []
+    for column in chunk.columns:
+        if column in ARROW_TYPES:
+            fields.append(pa.field(column, ARROW_TYPES[column]))
+        else:
+            fields.append(pa.Schema.from_pandas(chunk[[column]], preserve_index=False).field(column))
+    return pa.schema(fields)
+
+
+# Stream the table out of the database in chunks as Arrow record batches
+def _table_batches(engine, partition_column, chunk_rows):
+    chunks = pd.read_sql(text(f"SELECT * FROM {data_layer.TABLE_NAME}"), engine, chunksize=chunk_rows)
+    first = _prepare_chunk(next(chunks), partition_column)
+    schema = _schema_for(first)
+
+    def batches():
+        yield from pa.Table.from_pandas(first, schema=schema, preserve_index=False).to_batches()
+        for chunk in chunks:
+            chunk = _prepare_chunk(chunk, partition_column)
+            yield from pa.Table.from_pandas(chunk, schema=schema, preserve_index=False).to_batches()
+
+    return schema, batches()
+
+
+# Export the repositories table and publish it as the current snapshot
+def export_snapshot(directory=SNAPSHOT_DIR, partition_by='language', file_format='ipc',
+                    engine=None, chunk_rows=EXPORT_CHUNK_ROWS):
+    engine = engine or data_layer.get_engine()
+    partition_column = PARTITION_COLUMNS[partition_by]
+    name = time.strftime('%Y%m%dT%H%M%S') + f"-{time.time_ns() % 1000000:06d}"
+    target = os.path.join(directory, name)
+
+    start = time.perf_counter()
+    schema, batches = _table_batches(engine, partition_column, chunk_rows)
+    rows = {'count': 0}
+
+    def counted():
+        for batch in batches:
+            rows['count'] += batch.num_rows
+            yield batch
+
+    ds.write_dataset(
+        pa.RecordBatchReader.from_batches(schema, counted()),
+        target,
+        format=file_format,
+        partitioning=_partitioning(partition_column),
+        existing_data_behavior='error',
+    )
+
+    manifest = {
+        'name': name,
+        'format': file_format,
+        'partition_column': partition_column,
+        'rows': rows['count'],
+        'exported_at': time.time(),
+        'export_seconds': round(time.perf_counter() - start, 3),
+    }
+    with open(os.path.join(target, MANIFEST_FILE), 'w') as f:
+        json.dump(manifest, f, indent=2)
+    _publish(directory, name)
+    _prune(directory, name)
+    return manifest
+
+
+def _publish(directory, name):
+    temp_path = os.path.join(directory, CURRENT_FILE + '.tmp')
+    with open(temp_path, 'w') as f:
+        f.write(name)
+    os.replace(temp_path, os.path.join(directory, CURRENT_FILE))
+
+
+def _prune(directory, current):
+    exports = sorted(
+        entry for entry in os.listdir(directory)
+        if entry != current and os.path.isfile(os.path.join(directory, entry, MANIFEST_FILE))
+    )
+    for old in exports[:max(len(exports) - (KEEP_SNAPSHOTS - 1), 0)]:
+        shutil.rmtree(os.path.join(directory, old), ignore_errors=True)
+
+
+def current_name(directory=SNAPSHOT_DIR):
+    with open(os.path.join(directory, CURRENT_FILE)) as f:
+        return f.read().strip()
+
+
+# Open (once per published snapshot) the memory-mapped dataset
+def open_dataset(directory=SNAPSHOT_DIR):
+    name = current_name(directory)
+    with _dataset_lock:
+        if _dataset_cache['name'] != name:
+            path = os.path.join(directory, name)
+            with open(os.path.join(path, MANIFEST_FILE)) as f:
+                manifest = json.load(f)
+            dataset = ds.dataset(
+                path,
+                format=manifest['format'],
+                partitioning=_partitioning(manifest['partition_column']),
+                filesystem=fs.LocalFileSystem(use_mmap=True),
+                exclude_invalid_files=True,
+            )
+            _dataset_cache.update(name=name, dataset=dataset, manifest=manifest)
+        return _dataset_cache['dataset'], _dataset_cache['manifest']
+
+
+# Version of the published snapshot, shaped like data_layer.probe_version()
+def current_version(directory=SNAPSHOT_DIR):
+    _, manifest = open_dataset(directory)
+    return (manifest['rows'], manifest['name'])
+
+
+def _membership(column, values):
+    values = list(values)
+    present = [value for value in values if not pd.isna(value)]
+    expression = ds.field(column).isin(present)
+    if len(present) < len(values):
+        expression = expression | ds.field(column).is_null()
+    return expression
+
+
+# Predicate pushed into the scan; an empty multiselect means no filter
+def filter_expression(languages=(), licenses=(), min_stars=0):
+    expression = ds.field('Number_of_Stars') >= int(min_stars)
+    if len(languages) > 0:
+        expression = expression & _membership('Programming_Language', languages)
+    if len(licenses) > 0:
+        expression = expression & _membership('License_Type', licenses)
+    return expression
+
+
+# Read the projected columns of the rows matching the predicate
+def read_frame(columns=None, expression=None, directory=SNAPSHOT_DIR):
+    dataset, manifest = open_dataset(directory)
+    if columns is None:
+        columns = [name for name in dataset.schema.names if name != 'Creation_Month']
+    table = dataset.to_table(columns=list(columns), filter=expression)
+    # Low-cardinality columns arrive as categoricals and strings stay in the
+    # mapped Arrow buffers, so optimize_frame has nothing left to copy
+    for column in frame_schema.CATEGORY_COLUMNS:
+        if column in table.column_names:
+            index = table.column_names.index(column)
+            table = table.set_column(index, column, pc.dictionary_encode(table.column(column)))
+    return table.to_pandas(types_mapper=frame_schema.arrow_string_types, split_blocks=True)
+
+
+# Distinct values of one column, reading only that column
+def distinct_values(column, directory=SNAPSHOT_DIR):
+    dataset, _ = open_dataset(directory)
+    return dataset.to_table(columns=[column]).column(column).unique().to_pylist()
+
+
+def max_value(column, directory=SNAPSHOT_DIR):
+    dataset, _ = open_dataset(directory)
+    values = dataset.to_table(columns=[column]).column(column)
+    return pc.max(values).as_py()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Export the repositories table to a columnar snapshot.")
+    parser.add_argument('--dir', default=SNAPSHOT_DIR)
+    parser.add_argument('--partition-by', choices=sorted(PARTITION_COLUMNS), default='language')
+    parser.add_argument('--format', choices=['ipc', 'parquet'], default='ipc',
+                        help="ipc files are memory-mapped; parquet files are smaller on disk.")
+    args = parser.parse_args()
+
+    print(json.dumps(export_snapshot(args.dir, args.partition_by, args.format), indent=2))
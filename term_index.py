@@ -0,0 +1,254 @@
+# Term-frequency index over the repository descriptions.
+#
+# Descriptions are tokenized once per loaded frame (the same way WordCloud
+# tokenizes text) into sparse per-repository count vectors, per
+# (language, license) aggregates and an inverted index. A word cloud for any
+# filter is then a sum of count vectors handed to
+# WordCloud.generate_from_frequencies, and keyword search is an intersection
+# of posting lists. Frames merged by delta loads are indexed from the changed
+# rows alone.
+import re
+import threading
+
+import numpy as np
+import pandas as pd
+
+import data_layer
+
+# WordCloud's default tokenization: words of two or more characters
+TOKEN_PATTERN = re.compile(r"\w[\w']+")
+# WordCloud's STOPWORDS (lowercased), copied so the index doesn't import wordcloud
+STOP_WORDS = frozenset({
+    'a', 'about', 'above', 'after', 'again', 'against', 'all', 'also', 'am', 'an', 'and', 'any',
+    'are', "aren't", 'as', 'at', 'be', 'because', 'been', 'before', 'being', 'below', 'between',
+    'both', 'but', 'by', 'can', "can't", 'cannot', 'com', 'could', "couldn't", 'did', "didn't",
+    'do', 'does', "doesn't", 'doing', "don't", 'down', 'during', 'each', 'else', 'ever', 'few',
+    'for', 'from', 'further', 'get', 'had', "hadn't", 'has', "hasn't", 'have', "haven't",
+    'having', 'he', "he'd", "he'll", "he's", 'hence', 'her', 'here', "here's", 'hers',
+    'herself', 'him', 'himself', 'his', 'how', "how's", 'however', 'http', 'i', "i'd", "i'll",
+    "i'm", "i've", 'if', 'in', 'into', 'is', "isn't", 'it', "it's", 'its', 'itself', 'just',
+    'k', "let's", 'like', 'me', 'more', 'most', "mustn't", 'my', 'myself', 'no', 'nor', 'not',
+    'of', 'off', 'on', 'once', 'only', 'or', 'other', 'otherwise', 'ought', 'our', 'ours',
+    'ourselves', 'out', 'over', 'own', 'r', 'same', 'shall', "shan't", 'she', "she'd", "she'll",
+    "she's", 'should', "shouldn't", 'since', 'so', 'some', 'such', 'than', 'that', "that's",
+    'the', 'their', 'theirs', 'them', 'themselves', 'then', 'there', "there's", 'therefore',
+    'these', 'they', "they'd", "they'll", "they're", "they've", 'this', 'those', 'through',
+    'to', 'too', 'under', 'until', 'up', 'very', 'was', "wasn't", 'we', "we'd", "we'll",
+    "we're", "we've", 'were', "weren't", 'what', "what's", 'when', "when's", 'where', "where's",
+    'which', 'while', 'who', "who's", 'whom', 'why', "why's", 'with', "won't", 'would',
+    "wouldn't", 'www', 'you', "you'd", "you'll", "you're", "you've", 'your', 'yours',
+    'yourself', 'yourselves'
+})
+
+
+def tokenize(text):
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        if token.endswith("'s"):
+            token = token[:-2]
+        if token and token not in STOP_WORDS and not token.isdigit():
+            tokens.append(token)
+    return tokens
+
+
+# The form words are compared in: plurals fold into their singular the way
+# merge_plurals folds them ('models' -> 'model', but 'class' stays)
+def normalize(word):
+    return word[:-1] if word.endswith('s') and not word.endswith('ss') else word
+
+
+def _group_codes(values, labels):
+    codes = []
+    for value in values:
+        key = None if pd.isna(value) else str(value)
+        codes.append(labels.setdefault(key, len(labels)))
+    return codes
+
+
+class TermIndex:
+    def __init__(self):
+        self.vocabulary = {}
+        self.terms = []
+        self.languages = {}
+        self.licenses = {}
+        self.row_count = 0
+        # Sparse per-row vectors: row_ids/term_ids/counts triplets, sorted by row
+        self._row_ids = np.empty(0, dtype=np.int64)
+        self._term_ids = np.empty(0, dtype=np.int64)
+        self._counts = np.empty(0, dtype=np.int64)
+        self._row_language = np.empty(0, dtype=np.int64)
+        self._row_license = np.empty(0, dtype=np.int64)
+        self._postings = None
+        self._forms = None
+        self._groups = None
+        self._lock = threading.Lock()
+
+    # Index the descriptions of new rows; they get positions after the existing ones
+    def add_rows(self, rows):
+        row_ids, term_ids = [], []
+        for offset, description in enumerate(rows['Description']):
+            if isinstance(description, str):
+                for token in tokenize(description):
+                    term_id = self.vocabulary.get(token)
+                    if term_id is None:
+                        term_id = self.vocabulary[token] = len(self.terms)
+                        self.terms.append(token)
+                    row_ids.append(self.row_count + offset)
+                    term_ids.append(term_id)
+
+        # Collapse repeated (row, term) pairs into counts
+        vocabulary_size = max(len(self.terms), 1)
+        keys, counts = np.unique(np.array(row_ids, dtype=np.int64) * vocabulary_size + np.array(term_ids, dtype=np.int64), return_counts=True)
+        with self._lock:
+            self._row_ids = np.concatenate([self._row_ids, keys // vocabulary_size])
+            self._term_ids = np.concatenate([self._term_ids, keys % vocabulary_size])
+            self._counts = np.concatenate([self._counts, counts])
+            self._row_language = np.concatenate([self._row_language, _group_codes(rows['Programming_Language'], self.languages)])
+            self._row_license = np.concatenate([self._row_license, _group_codes(rows['License_Type'], self.licenses)])
+            self.row_count += len(rows)
+            self._postings = None
+            self._forms = None
+            self._groups = None
+
+    # Index of the frame merge_rows() makes from the indexed one: the replaced
+    # rows are dropped, the others keep their order, and new_rows follow.
+    # Loaded frames keep a RangeIndex, so old_rows' labels are their positions.
+    def merged(self, old_rows, new_rows):
+        if not len(old_rows) and not len(new_rows):
+            return self
+        index = TermIndex()
+        with self._lock:
+            kept = np.ones(self.row_count, dtype=bool)
+            kept[old_rows.index.to_numpy(dtype=np.int64)] = False
+            position = np.cumsum(kept) - 1
+            selected = kept[self._row_ids]
+            index.vocabulary = dict(self.vocabulary)
+            index.terms = list(self.terms)
+            index.languages = dict(self.languages)
+            index.licenses = dict(self.licenses)
+            index.row_count = int(kept.sum())
+            index._row_ids = position[self._row_ids[selected]]
+            index._term_ids = self._term_ids[selected]
+            index._counts = self._counts[selected]
+            index._row_language = self._row_language[kept]
+            index._row_license = self._row_license[kept]
+        index.add_rows(new_rows)
+        return index
+
+    # Per (language, license) term counts, built on first use
+    def _group_frequencies(self):
+        if self._groups is None:
+            group = self._row_language[self._row_ids] * len(self.licenses) + self._row_license[self._row_ids]
+            vocabulary_size = max(len(self.terms), 1)
+            totals = np.bincount(group * vocabulary_size + self._term_ids, weights=self._counts)
+            keys = np.flatnonzero(totals)
+            self._groups = (keys // vocabulary_size, keys % vocabulary_size, totals[keys])
+        return self._groups
+
+    def _selected_codes(self, labels, values):
+        wanted = {None if pd.isna(value) else str(value) for value in values}
+        return [code for label, code in labels.items() if label in wanted]
+
+    def _to_frequencies(self, term_ids, weights):
+        totals = np.bincount(term_ids, weights=weights, minlength=len(self.terms))
+        present = np.flatnonzero(totals)
+        frequencies = {self.terms[term_id]: float(totals[term_id]) for term_id in present}
+        return merge_plurals(frequencies)
+
+    # Word frequencies for the rows matching the language/license multiselects
+    # (an empty selection means no filter), summed from the group aggregates
+    def frequencies(self, languages=(), licenses=()):
+        with self._lock:
+            groups, term_ids, totals = self._group_frequencies()
+            selected = np.ones(len(groups), dtype=bool)
+            if len(languages) > 0:
+                codes = self._selected_codes(self.languages, languages)
+                selected &= np.isin(groups // len(self.licenses), codes)
+            if len(licenses) > 0:
+                codes = self._selected_codes(self.licenses, licenses)
+                selected &= np.isin(groups % len(self.licenses), codes)
+            return self._to_frequencies(term_ids[selected], totals[selected])
+
+    # Word frequencies for an arbitrary boolean mask over the indexed rows
+    def frequencies_for_mask(self, mask):
+        with self._lock:
+            selected = np.asarray(mask, dtype=bool)[self._row_ids]
+            return self._to_frequencies(self._term_ids[selected], self._counts[selected])
+
+    def _posting_lists(self):
+        if self._postings is None:
+            order = np.argsort(self._term_ids, kind='stable')
+            boundaries = np.searchsorted(self._term_ids[order], np.arange(len(self.terms) + 1))
+            self._postings = (self._row_ids[order], boundaries)
+        return self._postings
+
+    # Normalized word -> ids of the terms that normalize to it
+    def _term_forms(self):
+        if self._forms is None:
+            forms = {}
+            for term_id, term in enumerate(self.terms):
+                forms.setdefault(normalize(term), []).append(term_id)
+            self._forms = forms
+        return self._forms
+
+    # Positions of the rows whose description contains every word of the query,
+    # compared after normalize() like matches()
+    def search(self, query):
+        words = tokenize(query)
+        if not words:
+            return np.arange(self.row_count)
+        with self._lock:
+            rows, boundaries = self._posting_lists()
+            forms = self._term_forms()
+            matches = None
+            for word in dict.fromkeys(normalize(word) for word in words):
+                postings = [rows[boundaries[term_id]:boundaries[term_id + 1]] for term_id in forms.get(word, ())]
+                found = np.unique(np.concatenate(postings)) if postings else np.empty(0, dtype=np.int64)
+                matches = found if matches is None else np.intersect1d(matches, found, assume_unique=True)
+            return matches
+
+    def search_mask(self, query):
+        mask = np.zeros(self.row_count, dtype=bool)
+        mask[self.search(query)] = True
+        return mask
+
+
+# Fold plurals into their singular form, as WordCloud does when it counts words
+def merge_plurals(frequencies):
+    merged = dict(frequencies)
+    for word, count in frequencies.items():
+        singular = normalize(word)
+        if singular != word and singular in merged:
+            merged[singular] += count
+            del merged[word]
+    return merged
+
+
+# Keyword match without an index, for frames that weren't indexed (e.g. SQL
+# results); the same rows TermIndex.search finds
+def matches(descriptions, query):
+    words = {normalize(word) for word in tokenize(query)}
+    if not words:
+        return pd.Series(True, index=descriptions.index)
+    return descriptions.map(lambda text: isinstance(text, str) and words <= {normalize(word) for word in tokenize(text)}).astype(bool)
+
+
+def _build(df):
+    index = TermIndex()
+    index.add_rows(df)
+    return index
+
+
+# Only the rows changed by delta loads are tokenized
+def _update(index, df, changes):
+    for old_rows, new_rows in changes:
+        index = index.merged(old_rows, new_rows)
+    return index
+
+
+_cache = data_layer.FrameCache('term_index', _build, _update)
+
+
+# Index of the given frame, built once per loaded frame
+def get_index(df):
+    return _cache.get(df)
@@ -0,0 +1,122 @@
+# A frame merged by a delta load compared with a full reload of the same
+# table, along with the derived data updated from the changed rows alone
+# (FrameCache with changes_between) against the same data built from scratch.
+from datetime import datetime, timedelta
+
+import numpy as np
+import pandas as pd
+import pytest
+from sqlalchemy import text
+
+import data_layer
+import frame_schema
+import ingest
+import rollups
+import term_index
+
+LANGUAGES = ['Python', 'JavaScript', 'Go', None]
+LICENSES = ['MIT', 'Apache-2.0', None]
+WORDS = ['fast', 'model', 'models', 'web', 'framework', 'data', 'tool']
+
+
+def _rows(rng, ids, updated):
+    return [{
+        'id': int(repo_id),
+        'Repository_Name': f"repo-{repo_id}",
+        'Owner': f"owner-{repo_id % 7}",
+        'Description': ' '.join(rng.choice(WORDS, rng.integers(1, 4))) if rng.random() < 0.9 else None,
+        'URL': f"https://github.com/owner-{repo_id % 7}/repo-{repo_id}",
+        'Programming_Language': LANGUAGES[rng.integers(len(LANGUAGES))],
+        'Creation_Date': datetime(2015, 1, 1) + timedelta(days=int(rng.integers(0, 2000))),
+        'Last_Updated_Date': updated + timedelta(minutes=int(rng.integers(0, 600))),
+        'Number_of_Stars': int(rng.integers(0, 5000)),
+        'Number_of_Forks': int(rng.integers(0, 500)),
+        'Number_of_Open_Issues': int(rng.integers(0, 50)),
+        'License_Type': LICENSES[rng.integers(len(LICENSES))],
+    } for repo_id in ids]
+
+
+@pytest.fixture
+def database(tmp_path, monkeypatch):
+    monkeypatch.setattr(data_layer, 'DATABASE_URL', f"sqlite:///{tmp_path / 'repositories.db'}")
+    monkeypatch.setattr(data_layer, 'DATA_SOURCE', 'database')
+    monkeypatch.setattr(data_layer, 'BACKGROUND_REFRESH', False)
+    monkeypatch.setattr(data_layer, 'DELTA_LOAD', True)
+    monkeypatch.setattr(data_layer, 'PROBE_INTERVAL', 0)
+    # Small pages, so the changes are read over several keyset queries
+    monkeypatch.setattr(data_layer, 'DELTA_PAGE_SIZE', 7)
+    monkeypatch.setattr(rollups, 'ROLLUP_SOURCE', 'local')
+    data_layer.dispose_engine()
+    data_layer.invalidate()
+    for cache in (rollups._cache, term_index._cache):
+        cache.clear()
+    engine = data_layer.get_engine()
+    ingest.create_schema(engine)
+    yield engine
+    for cache in (rollups._cache, term_index._cache):
+        cache.clear()
+    data_layer.invalidate()
+    data_layer.dispose_engine()
+
+
+def _full_reload(engine):
+    df = pd.read_sql(text(f"SELECT * FROM {data_layer.TABLE_NAME}"), engine)
+    return frame_schema.optimize_frame(df)[0]
+
+
+def _by_id(df):
+    return df.sort_values('id').reset_index(drop=True).astype(object)
+
+
+def _canonical_rollup(rollup):
+    rollup = rollup.fillna('~').sort_values(rollups.GROUP_COLUMNS).reset_index(drop=True)
+    return rollup.astype({'repo_count': 'int64'})
+
+
+@pytest.mark.parametrize('seed', [1, 2])
+def test_delta_merge_equals_full_reload(database, seed):
+    rng = np.random.default_rng(seed)
+    ingest.upsert_rows(database, _rows(rng, range(200), datetime(2024, 1, 1)))
+    base = data_layer.get_data()
+    rollups.get_rollups(base)
+    term_index.get_index(base)
+
+    # Updated rows (some moving to a new language) and new rows, all stamped
+    # after the loaded frame's high-water mark
+    changed = _rows(rng, rng.choice(200, 30, replace=False), datetime(2024, 6, 1))
+    for row in changed[:5]:
+        row['Programming_Language'] = 'Zig'
+    ingest.upsert_rows(database, changed + _rows(rng, range(1000, 1040), datetime(2024, 6, 1)))
+
+    delta_loads = data_layer.get_metrics()['delta_loads']
+    merged = data_layer.get_data()
+    assert data_layer.get_metrics()['delta_loads'] == delta_loads + 1
+    assert data_layer.changes_between(base, merged) is not None
+
+    full = _full_reload(database)
+    pd.testing.assert_frame_equal(_by_id(merged), _by_id(full))
+
+    pd.testing.assert_frame_equal(_canonical_rollup(rollups.get_rollups(merged)),
+                                  _canonical_rollup(rollups.compute_rollups(full).pipe(rollups._restore_missing)))
+
+    updated_index = term_index.get_index(merged)
+    built_index = term_index._build(merged)
+    assert updated_index.frequencies() == built_index.frequencies()
+    assert updated_index.frequencies(['Zig'], ['MIT', None]) == built_index.frequencies(['Zig'], ['MIT', None])
+    for query in WORDS + ['fast models']:
+        np.testing.assert_array_equal(updated_index.search(query), built_index.search(query), err_msg=query)
+
+
+def test_deleted_rows_force_a_full_reload(database):
+    rng = np.random.default_rng(3)
+    ingest.upsert_rows(database, _rows(rng, range(100), datetime(2024, 1, 1)))
+    base = data_layer.get_data()
+    with database.begin() as conn:
+        conn.execute(text(f"DELETE FROM {data_layer.TABLE_NAME} WHERE id < 10"))
+    ingest.upsert_rows(database, _rows(rng, [500], datetime(2024, 6, 1)))
+
+    loads = data_layer.get_metrics()['loads']
+    reloaded = data_layer.get_data()
+    assert data_layer.get_metrics()['loads'] == loads + 1
+    assert data_layer.changes_between(base, reloaded) is None
+    pd.testing.assert_frame_equal(_by_id(reloaded), _by_id(_full_reload(database)))
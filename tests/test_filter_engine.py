@@ -0,0 +1,94 @@
+# FilterIndex results compared with the plain pandas masks they replace
+# (isin for the multiselects, >= for the slider), over random selections
+# including missing languages, licenses and star counts.
+import numpy as np
+import pandas as pd
+import pytest
+
+import filter_engine
+import frame_schema
+
+LANGUAGES = ['Python', 'JavaScript', 'Go', 'Rust', 'C', None]
+LICENSES = ['MIT', 'Apache-2.0', 'GPL-3.0', None]
+ROWS = 5000
+
+
+def _frame(seed, optimize):
+    rng = np.random.default_rng(seed)
+    stars = np.floor(rng.pareto(1.2, ROWS) * 10)
+    stars[rng.random(ROWS) < 0.02] = np.nan
+    df = pd.DataFrame({
+        'id': np.arange(ROWS),
+        'Description': None,
+        'Programming_Language': np.array(LANGUAGES, dtype=object)[rng.integers(0, len(LANGUAGES), ROWS)],
+        'License_Type': np.array(LICENSES, dtype=object)[rng.integers(0, len(LICENSES), ROWS)],
+        'Number_of_Stars': stars,
+    })
+    if optimize:
+        df, _ = frame_schema.optimize_frame(df)
+    return df
+
+
+def _selection(rng, values):
+    choices = values + [np.nan, 'Unknown']
+    return [choices[i] for i in rng.choice(len(choices), rng.integers(0, 4), replace=False)]
+
+
+def _expected(df, languages, licenses, min_stars):
+    if min_stars is None:
+        mask = np.ones(len(df), dtype=bool)
+    else:
+        mask = (df['Number_of_Stars'] >= min_stars).to_numpy()
+    for column, selected in (('Programming_Language', languages), ('License_Type', licenses)):
+        if len(selected) > 0:
+            present = [value for value in selected if not pd.isna(value)]
+            matched = df[column].isin(present).to_numpy()
+            if len(present) < len(selected):
+                matched |= df[column].isna().to_numpy()
+            mask &= matched
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize('optimize', [False, True])
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_positions_match_pandas_masks(seed, optimize):
+    df = _frame(seed, optimize)
+    index = filter_engine.FilterIndex(df)
+    rng = np.random.default_rng(seed + 100)
+    max_stars = int(np.nanmax(df['Number_of_Stars']))
+    # Slider values on, between and beyond the precomputed star levels
+    thresholds = [0, 1, 2, 5, 10, max_stars, max_stars + 1] + list(rng.integers(0, max_stars + 1, 20))
+    for min_stars in thresholds:
+        languages = _selection(rng, LANGUAGES[:-1])
+        licenses = _selection(rng, LICENSES[:-1])
+        positions = index.positions(languages, licenses, int(min_stars))
+        got = np.arange(len(df)) if positions is None else positions
+        np.testing.assert_array_equal(got, _expected(df, languages, licenses, min_stars),
+                                      err_msg=f'{languages} {licenses} {min_stars}')
+
+
+def test_filter_returns_matching_rows():
+    df = _frame(4, True)
+    index = filter_engine.FilterIndex(df)
+    filtered = index.filter(['Python', None], ['MIT'], 10)
+    expected = df.iloc[_expected(df, ['Python', None], ['MIT'], 10)]
+    pd.testing.assert_frame_equal(filtered, expected)
+
+
+@pytest.mark.parametrize('optimize', [False, True])
+def test_no_star_threshold_keeps_missing_star_counts(optimize):
+    df = _frame(6, optimize)
+    assert df['Number_of_Stars'].isna().any()
+    index = filter_engine.FilterIndex(df)
+    assert index.positions() is None
+    pd.testing.assert_frame_equal(index.filter(['Python', None]), df.iloc[_expected(df, ['Python', None], [], None)])
+
+
+def test_clear_unsets_only_the_given_rows():
+    rng = np.random.default_rng(5)
+    mask = rng.random(1003) < 0.5
+    bitmap = np.packbits(mask)
+    positions = rng.choice(len(mask), 200, replace=False)
+    filter_engine._clear(bitmap, positions)
+    mask[positions] = False
+    np.testing.assert_array_equal(np.unpackbits(bitmap, count=len(mask)).astype(bool), mask)
@@ -0,0 +1,152 @@
+# run_ingest against github_replay.py serving hand-written recordings: the
+# replay stub answers only the paths recorded for it (404 otherwise), so each
+# test also pins down exactly which search requests a run makes.
+import hashlib
+import json
+import math
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine, func, select
+
+import github_replay
+import ingest
+
+QUERY = 'topic:testing'
+NOW = datetime(2025, 1, 1)
+
+
+class FrozenDatetime(datetime):
+    @classmethod
+    def now(cls, tz=None):
+        return NOW if tz is None else NOW.replace(tzinfo=tz)
+
+
+def _item(repo_id, pushed_at):
+    stamp = pushed_at.strftime(ingest.TIME_FORMAT)
+    return {
+        'id': repo_id, 'name': f"repo-{repo_id}", 'owner': {'login': 'someone'},
+        'description': None, 'html_url': f"https://github.com/someone/repo-{repo_id}",
+        'language': 'Python', 'created_at': stamp, 'updated_at': stamp, 'pushed_at': stamp,
+        'stargazers_count': repo_id % 50, 'forks_count': 0, 'open_issues_count': 1, 'license': None,
+    }
+
+
+def _path(query, page=1):
+    return ingest.GitHubClient('').search_path(query, page)
+
+
+def _record(directory, path, status, headers, body, order=0):
+    name = f"{hashlib.sha1(path.encode()).hexdigest()}-{order}.json"
+    with open(directory / name, 'w') as f:
+        json.dump({'path': path, 'status': status, 'headers': headers, 'body': json.dumps(body)}, f)
+
+
+# Record the search pages of `query`; `pages` limits how many are recorded
+def _record_search(directory, query, items, etag=None, pages=None):
+    pages = pages or max(min(math.ceil(len(items) / ingest.PER_PAGE), ingest.MAX_PAGES), 1)
+    headers = {'ETag': etag} if etag else {}
+    for page in range(1, pages + 1):
+        chunk = items[(page - 1) * ingest.PER_PAGE:page * ingest.PER_PAGE]
+        _record(directory, _path(query, page), 200, headers, {'total_count': len(items), 'items': chunk})
+
+
+def _pushed(items):
+    return max(item['pushed_at'] for item in items)
+
+
+@pytest.fixture
+def replay(tmp_path):
+    directory = tmp_path / 'recordings'
+    directory.mkdir()
+    servers = []
+
+    def start():
+        server, base_url = github_replay.start_server(str(directory))
+        servers.append(server)
+        return base_url
+
+    yield directory, start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.fixture
+def engine(tmp_path):
+    return create_engine(f"sqlite:///{tmp_path / 'repositories.db'}")
+
+
+def _ingest(engine, state_path, base_url):
+    return ingest.run_ingest([QUERY], engine=engine, state_path=str(state_path), base_url=base_url, token=None)
+
+
+def _row_count(engine):
+    with engine.connect() as conn:
+        return conn.execute(select(func.count()).select_from(ingest.repositories)).scalar()
+
+
+def test_windows_split_at_the_result_cap(replay, engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, 'datetime', FrozenDatetime)
+    directory, start = replay
+    middle = (ingest.EARLIEST_PUSH + (NOW - ingest.EARLIEST_PUSH) // 2).replace(microsecond=0)
+    older = [_item(i, datetime(2010, 1, 1) + timedelta(hours=i)) for i in range(600)]
+    newer = [_item(1000 + i, datetime(2020, 1, 1) + timedelta(hours=i)) for i in range(900)]
+    assert _pushed(older) < middle.strftime(ingest.TIME_FORMAT)
+    # Over the cap as a whole, so only the first page is ever asked for
+    _record_search(directory, QUERY, newer + older, pages=1)
+    _record_search(directory, ingest.window_query(QUERY, None, middle), older)
+    _record_search(directory, ingest.window_query(QUERY, middle), newer)
+
+    summary = _ingest(engine, tmp_path / 'state.json', start())
+
+    assert summary['rows_upserted'] == 1500
+    assert summary['incomplete_windows'] == 0
+    assert summary['requests'] == 1 + 6 + 9
+    assert _row_count(engine) == 1500
+    assert ingest.load_state(str(tmp_path / 'state.json'))['cursors'] == {QUERY: _pushed(newer)}
+
+
+def test_cursor_and_etags_carry_over_between_runs(replay, engine, tmp_path):
+    directory, start = replay
+    state_path = tmp_path / 'state.json'
+    items = [_item(i, datetime(2024, 6, 1) + timedelta(days=i)) for i in range(5)]
+    cursor = _pushed(items)
+    later = ingest.window_query(QUERY, ingest._parse_time(cursor))
+    _record_search(directory, QUERY, items, etag='"first"')
+    _record_search(directory, later, [], etag='"later"')
+    base_url = start()
+
+    first = _ingest(engine, state_path, base_url)
+    assert first['rows_upserted'] == 5
+    assert ingest.load_state(str(state_path)) == {'cursors': {QUERY: cursor}, 'etags': {_path(QUERY): '"first"'}}
+
+    # The saved cursor narrows the search to newer pushes
+    second = _ingest(engine, state_path, base_url)
+    assert (second['requests'], second['not_modified'], second['rows_upserted']) == (1, 0, 0)
+    # ...and the first run's ETag is dropped once its path is no longer requested
+    assert ingest.load_state(str(state_path)) == {'cursors': {QUERY: cursor}, 'etags': {_path(later): '"later"'}}
+
+    third = _ingest(engine, state_path, base_url)
+    assert (third['requests'], third['not_modified'], third['rows_upserted']) == (1, 1, 0)
+    assert ingest.load_state(str(state_path))['cursors'] == {QUERY: cursor}
+    assert _row_count(engine) == 5
+
+
+def test_rate_limited_request_waits_and_retries(replay, engine, tmp_path, monkeypatch):
+    monkeypatch.setattr(ingest, 'MAX_RATE_LIMIT_WAIT', 0.3)
+    directory, start = replay
+    items = [_item(i, datetime(2024, 1, 1) + timedelta(days=i)) for i in range(3)]
+    # The reset is an hour away, so the wait is capped at MAX_RATE_LIMIT_WAIT
+    limited = {'X-RateLimit-Remaining': '0', 'X-RateLimit-Reset': str(int(time.time()) + 3600)}
+    _record(directory, _path(QUERY), 403, limited, {'message': 'API rate limit exceeded'}, order=0)
+    _record(directory, _path(QUERY), 200, {}, {'total_count': len(items), 'items': items}, order=1)
+
+    started = time.perf_counter()
+    summary = _ingest(engine, tmp_path / 'state.json', start())
+
+    assert time.perf_counter() - started >= 0.3
+    assert (summary['requests'], summary['rate_limited'], summary['retries']) == (2, 1, 1)
+    assert summary['rows_upserted'] == 3
+    assert _row_count(engine) == 3
@@ -0,0 +1,87 @@
+# Answers served from the sketches (top-N rows, totals, the open-issues
+# chart) compared with the same helpers run on the filtered frame, which is
+# what the pages fall back to, over random selections and min-stars values.
+import numpy as np
+import pandas as pd
+import pytest
+
+import frame_schema
+import sketches
+
+LANGUAGES = ['Python', 'JavaScript', 'Go', 'Rust', None]
+LICENSES = ['MIT', 'Apache-2.0', None]
+ROWS = 5000
+
+
+def _frame(seed, unique_names):
+    rng = np.random.default_rng(seed)
+    metrics = {column: np.floor(rng.pareto(1.1, ROWS) * scale)
+               for column, scale in zip(sketches.METRIC_COLUMNS, (50, 10, 5))}
+    for values in metrics.values():
+        values[rng.random(ROWS) < 0.02] = np.nan
+    names = np.arange(ROWS) if unique_names else rng.integers(0, ROWS // 4, ROWS)
+    df = pd.DataFrame({
+        'id': np.arange(ROWS),
+        'Repository_Name': [f"repo-{name}" for name in names],
+        'Programming_Language': np.array(LANGUAGES, dtype=object)[rng.integers(0, len(LANGUAGES), ROWS)],
+        'License_Type': np.array(LICENSES, dtype=object)[rng.integers(0, len(LICENSES), ROWS)],
+        **metrics,
+    })
+    return frame_schema.optimize_frame(df)[0]
+
+
+def _filtered(df, languages, licenses, min_stars):
+    mask = df['Number_of_Stars'] >= min_stars
+    for column, values in (('Programming_Language', languages), ('License_Type', licenses)):
+        if len(values) > 0:
+            selected = df[column].isin([value for value in values if value is not None])
+            if None in values:
+                selected |= df[column].isna()
+            mask &= selected
+    return df[mask]
+
+
+def _cases(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(25):
+        languages = [LANGUAGES[i] for i in rng.choice(len(LANGUAGES), rng.integers(0, 3), replace=False)]
+        licenses = [LICENSES[i] for i in rng.choice(len(LICENSES), rng.integers(0, 2), replace=False)]
+        # Up to values past most partitions' candidates, where the sketches fall back
+        yield languages, licenses, int(rng.choice([0, 1, 5, 20, 100, 1000, 10000]))
+
+
+@pytest.mark.parametrize('unique_names', [True, False])
+@pytest.mark.parametrize('seed', [1, 2])
+def test_sketch_answers_match_filtered_frame(seed, unique_names):
+    df = _frame(seed, unique_names)
+    for languages, licenses, min_stars in _cases(seed + 10):
+        filtered = _filtered(df, languages, licenses, min_stars)
+        filters = (languages, licenses, min_stars)
+        message = f'{languages} {licenses} {min_stars}'
+
+        got, expected = sketches.totals(df, filtered, *filters), sketches.totals(None, filtered)
+        assert got['count'] == expected['count'], message
+        for column in sketches.METRIC_COLUMNS:
+            assert got[column] == pytest.approx(expected[column]), message
+
+        for column in sketches.METRIC_COLUMNS:
+            pd.testing.assert_frame_equal(sketches.top_rows(df, filtered, column, 10, *filters),
+                                          sketches.top_rows(None, filtered, column, 10), obj=message)
+
+        got = sketches.top_open_issues(sketches.open_issue_rows(df, filtered, 10, *filters), 10)
+        expected = sketches.top_open_issues(sketches.open_issue_rows(None, filtered, 10), 10)
+        pd.testing.assert_frame_equal(got.reset_index(drop=True), expected.reset_index(drop=True), obj=message)
+
+
+def test_open_issue_candidates_need_unique_names():
+    assert sketches.Sketches(_frame(3, True)).open_issue_candidates(10) is not None
+    assert sketches.Sketches(_frame(3, False)).open_issue_candidates(10) is None
+
+
+def test_percentiles_from_counts_match_quantiles():
+    rng = np.random.default_rng(4)
+    values = np.floor(rng.pareto(1.1, 2000) * 20)
+    distribution = pd.Series(values).value_counts().sort_index()
+    qs = (0, 0.25, 0.5, 0.9, 0.99, 1)
+    got = sketches.percentiles_from_counts(distribution, qs)
+    assert got == pytest.approx({q: float(np.quantile(values, q)) for q in qs})
@@ -0,0 +1,36 @@
+# TermIndex.search compared with term_index.matches, the unindexed match used
+# for SQL results and exports: both must find the same rows, plural and
+# singular forms included.
+import numpy as np
+import pandas as pd
+import pytest
+
+import term_index
+
+WORDS = ['model', 'models', 'class', 'classes', 'data', 'bus', 'analysis', 'tool', 'tools', "tool's", 'web']
+QUERIES = ['model', 'models', 'class', 'classes', 'data', 'bus', 'analysis', 'tools', 'models tool', 'web classes', 'the', '']
+
+
+def _frame(seed, rows=2000):
+    rng = np.random.default_rng(seed)
+    descriptions = [' '.join(rng.choice(WORDS, rng.integers(0, 5))) for _ in range(rows)]
+    descriptions = [text.capitalize() if rng.random() < 0.5 else text for text in descriptions]
+    descriptions = pd.Series(descriptions, dtype=object)
+    descriptions[rng.random(rows) < 0.05] = None
+    return pd.DataFrame({'Description': descriptions, 'Programming_Language': 'Python', 'License_Type': 'MIT'})
+
+
+@pytest.mark.parametrize('seed', [1, 2])
+def test_search_matches_unindexed_match(seed):
+    df = _frame(seed)
+    index = term_index.TermIndex()
+    index.add_rows(df)
+    for query in QUERIES:
+        expected = np.flatnonzero(term_index.matches(df['Description'], query).to_numpy())
+        np.testing.assert_array_equal(index.search(query), expected, err_msg=query)
+
+
+def test_normalize_folds_plurals_only():
+    assert term_index.normalize('models') == term_index.normalize('model') == 'model'
+    assert term_index.normalize('class') == 'class'
+    assert term_index.normalize('classes') == 'classe'
@@ -0,0 +1,105 @@
+# TimeSeries buckets compared with the pandas groupby over period start
+# times they replace, for every granularity offered on the page, random
+# language/license selections and date ranges cutting periods in two.
+import numpy as np
+import pandas as pd
+import pytest
+
+import frame_schema
+import timeseries
+
+LANGUAGES = ['Python', 'JavaScript', 'Go', 'Rust', None]
+LICENSES = ['MIT', 'Apache-2.0', None]
+ROWS = 3000
+TODAY = pd.Timestamp('2024-10-01')
+
+
+def _frame(seed):
+    rng = np.random.default_rng(seed)
+    created = pd.Timestamp('2012-01-01') + pd.to_timedelta(rng.integers(0, 4000, ROWS), unit='D') \
+        + pd.to_timedelta(rng.integers(0, 86400, ROWS), unit='s')
+    updated = created + pd.to_timedelta(rng.integers(0, 800, ROWS), unit='D')
+    stars = rng.integers(0, 1000, ROWS).astype(float)
+    stars[rng.random(ROWS) < 0.02] = np.nan
+    df = pd.DataFrame({
+        'id': np.arange(ROWS),
+        'Programming_Language': np.array(LANGUAGES, dtype=object)[rng.integers(0, len(LANGUAGES), ROWS)],
+        'License_Type': np.array(LICENSES, dtype=object)[rng.integers(0, len(LICENSES), ROWS)],
+        'Creation_Date': created.where(rng.random(ROWS) > 0.02),
+        'Last_Updated_Date': updated.where(rng.random(ROWS) > 0.02),
+        'Number_of_Stars': stars,
+    })
+    return frame_schema.optimize_frame(df, TODAY)[0]
+
+
+def _selected(df, languages, licenses):
+    mask = pd.Series(True, index=df.index)
+    for column, values in (('Programming_Language', languages), ('License_Type', licenses)):
+        if len(values) > 0:
+            selected = df[column].isin([value for value in values if value is not None])
+            if None in values:
+                selected |= df[column].isna()
+            mask &= selected
+    return df[mask]
+
+
+def _expected(df, measure, languages, licenses, start, end, freq, by=None):
+    date_column, sum_column = timeseries.MEASURES[measure]
+    rows = _selected(df, languages, licenses)
+    by_values = sorted(rows[by].dropna().astype(object).unique()) if by else None
+    days = rows[date_column].dt.normalize()
+    rows = rows[days.notna() & (days >= start) & (days <= end)]
+    values = rows[sum_column].fillna(0) if sum_column else pd.Series(1, index=rows.index)
+    period = rows[date_column].dt.to_period(freq).dt.start_time
+    index = pd.DatetimeIndex(pd.period_range(start, end, freq=freq).start_time)
+    if by is None:
+        return values.groupby(period).sum().reindex(index, fill_value=0)
+    grouped = values.groupby([period, rows[by].astype(object)]).sum().unstack(fill_value=0)
+    return grouped.reindex(index=index, columns=by_values, fill_value=0)
+
+
+def _selection(rng, values):
+    return [values[i] for i in rng.choice(len(values), rng.integers(0, 3), replace=False)]
+
+
+@pytest.mark.parametrize('freq', list(timeseries.FREQUENCIES.values()))
+@pytest.mark.parametrize('measure', list(timeseries.MEASURES))
+def test_series_match_pandas_groupby(measure, freq):
+    df = _frame(1)
+    series = timeseries.TimeSeries(df)
+    first, last = series.date_range
+    rng = np.random.default_rng(2)
+    ranges = [(None, None)]
+    for _ in range(4):
+        start, end = sorted(first + pd.to_timedelta(rng.integers(0, (last - first).days + 1, 2), unit='D'))
+        ranges.append((start, end))
+    for start, end in ranges:
+        languages, licenses = _selection(rng, LANGUAGES), _selection(rng, LICENSES)
+        expected_start = first if start is None else start
+        expected_end = last if end is None else end
+        for by in (None, 'Programming_Language'):
+            got = series.series(measure, languages, licenses, start, end, freq, by=by)
+            expected = _expected(df, measure, languages, licenses, expected_start, expected_end, freq, by)
+            message = f'{languages} {licenses} {start} {end} {by}'
+            if by is None:
+                pd.testing.assert_series_equal(got, expected, check_dtype=False, check_names=False,
+                                               check_freq=False, obj=message)
+            else:
+                pd.testing.assert_frame_equal(got, expected, check_dtype=False, check_names=False,
+                                              check_freq=False, obj=message)
+
+
+@pytest.mark.parametrize('column', timeseries.HISTOGRAM_COLUMNS)
+def test_histograms_match_value_counts(column):
+    df = _frame(3)
+    series = timeseries.TimeSeries(df)
+    rng = np.random.default_rng(4)
+    for _ in range(10):
+        languages, licenses = _selection(rng, LANGUAGES), _selection(rng, LICENSES)
+        values, counts = series.histogram(column, languages, licenses)
+        rows = _selected(df, languages, licenses)
+        rows = rows[rows['Days_Since_Last_Update'].notna()]
+        expected = rows[column].dropna().astype(np.int64).value_counts().sort_index()
+        got = pd.Series(counts, index=values)
+        pd.testing.assert_series_equal(got[got > 0], expected, check_dtype=False, check_names=False,
+                                       obj=f'{languages} {licenses}')
@@ -0,0 +1,182 @@
+# Time series behind the activity and trend charts on the Visualizations page.
+#
+# Built once per loaded frame: rows are grouped by (Programming_Language,
+# License_Type), and per group the distinct calendar days are kept sorted
+# with a running total (repositories created, stars of the repositories
+# created, and repositories last updated), so the index grows with the number
+# of distinct (group, day) pairs, never with groups x days. A granularity and
+# date range is answered by binary search at the bucket edges of each
+# selected group, or, when that would touch more edges than there are pairs,
+# by bucketing the selected groups' pairs directly. The activity and age
+# histograms are kept the same way per Days_Since_Last_Update /
+# Repository_Age value.
+import numpy as np
+import pandas as pd
+
+import data_layer
+
+CATEGORY_COLUMNS = ['Programming_Language', 'License_Type']
+# Period frequencies offered on the page
+FREQUENCIES = {'Day': 'D', 'Week': 'W', 'Month': 'M', 'Quarter': 'Q', 'Year': 'Y'}
+# measure -> (date column, column summed, or None to count repositories)
+MEASURES = {
+    'created': ('Creation_Date', None),
+    'stars': ('Creation_Date', 'Number_of_Stars'),
+    'updated': ('Last_Updated_Date', None),
+}
+HISTOGRAM_COLUMNS = ['Days_Since_Last_Update', 'Repository_Age']
+
+
+def _days(dates):
+    # Whole days since the epoch (NaT becomes the minimum int64)
+    return dates.to_numpy(dtype='datetime64[ns]').astype('datetime64[D]').astype(np.int64)
+
+
+# Positions start..end-1 of every (start, end) range, concatenated
+def _ranges(starts, ends):
+    lengths = ends - starts
+    offsets = np.repeat(starts - np.cumsum(lengths) + lengths, lengths)
+    return np.arange(lengths.sum()) + offsets
+
+
+# Sums per group and value (0 <= value < span), stored as the sorted distinct
+# (group, value) keys with a running total over them
+class _GroupedSums:
+    def __init__(self, group, values, valid, group_count, span, weights=None):
+        self.span = max(span, 1)
+        keys, inverse = np.unique(group[valid].astype(np.int64) * self.span + values[valid], return_inverse=True)
+        sums = np.bincount(inverse, weights=None if weights is None else weights[valid], minlength=len(keys))
+        self.keys = keys
+        self.totals = np.zeros(len(keys) + 1, dtype=np.int64)
+        self.totals[1:] = np.cumsum(sums.astype(np.int64))
+        # keys[bounds[g]:bounds[g + 1]] belong to group g
+        self.bounds = np.searchsorted(keys, np.arange(group_count + 1, dtype=np.int64) * self.span)
+
+    # Sums over [edges[i], edges[i + 1]) per label (labels: 0..label_count-1,
+    # one per selected group) as a label_count x (len(edges) - 1) array
+    def bucket_sums(self, groups, labels, label_count, edges):
+        buckets = len(edges) - 1
+        starts, ends = self.bounds[groups], self.bounds[groups + 1]
+        if len(groups) * len(edges) <= (ends - starts).sum():
+            # Binary search at the edges of each selected group
+            positions = np.searchsorted(self.keys, groups[:, None].astype(np.int64) * self.span + edges[None, :])
+            sums = np.diff(self.totals[positions], axis=1)
+            result = np.zeros((label_count, buckets), dtype=np.int64)
+            np.add.at(result, labels, sums)
+            return result
+        # Fewer pairs than edges: bucket the pairs themselves
+        lengths = ends - starts
+        positions = _ranges(starts, ends)
+        values = self.keys[positions] - np.repeat(groups.astype(np.int64) * self.span, lengths)
+        bucket = np.searchsorted(edges, values, side='right') - 1
+        inside = (bucket >= 0) & (bucket < buckets)
+        flat = np.repeat(labels, lengths)[inside] * buckets + bucket[inside]
+        sums = (self.totals[positions + 1] - self.totals[positions])[inside]
+        return np.bincount(flat, weights=sums, minlength=label_count * buckets).astype(np.int64).reshape(label_count, buckets)
+
+
+class TimeSeries:
+    def __init__(self, df):
+        # Missing languages and licenses form groups of their own
+        column_codes, column_values = [], []
+        for column in CATEGORY_COLUMNS:
+            values_codes, uniques = pd.factorize(df[column].astype(object), use_na_sentinel=False)
+            column_codes.append(values_codes)
+            column_values.append(np.asarray(uniques, dtype=object))
+        keys, codes = np.unique(column_codes[0].astype(np.int64) * len(column_values[1]) + column_codes[1], return_inverse=True)
+        group_count = len(keys)
+        self.groups = pd.DataFrame({
+            CATEGORY_COLUMNS[0]: column_values[0][keys // max(len(column_values[1]), 1)],
+            CATEGORY_COLUMNS[1]: column_values[1][keys % max(len(column_values[1]), 1)],
+        })
+
+        # Calendar days (from origin) shared by every measure
+        days = {column: _days(df[column]) for column in ('Creation_Date', 'Last_Updated_Date')}
+        dated = {column: ~df[column].isna().to_numpy() for column in days}
+        present = np.concatenate([days[column][dated[column]] for column in days])
+        self.origin = int(present.min()) if len(present) else 0
+        self.length = int(present.max()) - self.origin + 1 if len(present) else 0
+
+        self._sums = {}
+        for measure, (date_column, sum_column) in MEASURES.items():
+            weights = None
+            if sum_column is not None:
+                weights = df[sum_column].to_numpy(dtype=float, na_value=0.0)
+            self._sums[measure] = _GroupedSums(
+                codes, days[date_column] - self.origin, dated[date_column], group_count, self.length, weights)
+
+        # Histograms over the rows with a valid update date, as the page draws them
+        self._histograms = {}
+        active = ~df['Days_Since_Last_Update'].isna().to_numpy()
+        for column in HISTOGRAM_COLUMNS:
+            values = df[column].to_numpy(dtype=float, na_value=np.nan)
+            valid = active & ~np.isnan(values)
+            low = int(values[valid].min()) if valid.any() else 0
+            high = int(values[valid].max()) if valid.any() else -1
+            values = np.where(valid, values, low).astype(np.int64) - low
+            self._histograms[column] = (np.arange(low, high + 1), _GroupedSums(codes, values, valid, group_count, high - low + 1))
+
+    # First and last calendar day with any repository (None when there are no dates)
+    @property
+    def date_range(self):
+        if not self.length:
+            return None
+        origin = pd.Timestamp(np.datetime64(self.origin, 'D'))
+        return origin, origin + pd.Timedelta(days=self.length - 1)
+
+    # Groups matching the multiselects; an empty selection means no filter
+    def _selected(self, languages, licenses):
+        mask = np.ones(len(self.groups), dtype=bool)
+        for column, values in zip(CATEGORY_COLUMNS, (languages, licenses)):
+            if len(values) > 0:
+                selected = self.groups[column].isin(values).to_numpy()
+                if any(pd.isna(value) for value in values):
+                    selected |= self.groups[column].isna().to_numpy()
+                mask &= selected
+        return mask
+
+    # The measure per period (freq: a pandas period alias) between start and
+    # end (inclusive days; the first and last periods are cut to the range),
+    # indexed by period start; with `by`, one column per value of that column
+    def series(self, measure, languages=(), licenses=(), start=None, end=None, freq='M', by=None):
+        mask = self._selected(languages, licenses)
+        if self.date_range is None:
+            return pd.Series(dtype=float) if by is None else pd.DataFrame()
+        first, last = self.date_range
+        start = first if start is None else max(pd.Timestamp(start).normalize(), first)
+        end = last if end is None else min(pd.Timestamp(end).normalize(), last)
+        if start > end:
+            return pd.Series(dtype=float) if by is None else pd.DataFrame()
+
+        periods = pd.period_range(start, end, freq=freq)
+        after_end = end + pd.Timedelta(days=1)
+        edges = np.append(periods.start_time.to_numpy(dtype='datetime64[ns]'), after_end.to_datetime64())
+        edges = np.clip(edges, start.to_datetime64(), after_end.to_datetime64())
+        offsets = edges.astype('datetime64[D]').astype(np.int64) - self.origin
+        index = pd.DatetimeIndex(periods.start_time)
+        groups = np.flatnonzero(mask)
+
+        if by is None:
+            values = self._sums[measure].bucket_sums(groups, np.zeros(len(groups), dtype=np.int64), 1, offsets)
+            return pd.Series(values[0], index=index)
+        # Groups without a value for `by` are left out
+        labels, uniques = pd.factorize(self.groups[by].to_numpy()[groups])
+        keep = labels >= 0
+        values = self._sums[measure].bucket_sums(groups[keep], labels[keep], len(uniques), offsets)
+        by_value = pd.DataFrame(values.T, index=index, columns=pd.Index(uniques, dtype=object))
+        return by_value.sort_index(axis=1)
+
+    # Distinct values of a histogram column and how many matching rows have each
+    def histogram(self, column, languages=(), licenses=()):
+        values, sums = self._histograms[column]
+        groups = np.flatnonzero(self._selected(languages, licenses))
+        edges = np.arange(len(values) + 1, dtype=np.int64)
+        return values, sums.bucket_sums(groups, np.zeros(len(groups), dtype=np.int64), 1, edges)[0]
+
+
+_cache = data_layer.FrameCache('timeseries', TimeSeries)
+
+
+# Time series of the given frame, built once per loaded frame
+def get_series(df):
+    return _cache.get(df)